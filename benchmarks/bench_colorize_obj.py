@@ -0,0 +1,66 @@
+"""
+Benchmark the per-line and NumPy-vectorized OBJ rewrite paths.
+
+A synthetic triangle mesh is written to a temp directory, rewritten once per
+mode, and the outputs are compared byte for byte.
+
+    python benchmarks/bench_colorize_obj.py --vertices 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from colorize_obj import ObjConfig, rewrite_obj  # noqa: E402
+from fixtures import write_synthetic_obj  # noqa: E402
+
+
+def time_mode(source: Path, workdir: Path, label: str, **modes: bool) -> tuple[float, bytes]:
+    target = workdir / label / source.name
+    target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(source, target)
+    config = ObjConfig(texture_path="palette.png", material_name="bench_texture")
+    start = time.perf_counter()
+    rewrite_obj(target, config, **modes)
+    elapsed = time.perf_counter() - start
+    return elapsed, target.read_bytes()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vertices", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        source = workdir / "mesh.obj"
+        write_synthetic_obj(source, args.vertices)
+        size_mb = source.stat().st_size / 1e6
+        print(f"{args.vertices:,} vertices, {args.vertices * 2:,} faces ({size_mb:.1f} MB)")
+
+        baseline_time, baseline = time_mode(
+            source, workdir, "per-line", streaming=False, vectorized=False
+        )
+        print(f"  per-line            {baseline_time:7.2f}s")
+        for streaming in (False, True):
+            label = "vectorized+streaming" if streaming else "vectorized"
+            elapsed, output = time_mode(
+                source, workdir, label, streaming=streaming, vectorized=True
+            )
+            status = "identical" if output == baseline else "MISMATCH"
+            print(
+                f"  {label:<20}{elapsed:7.2f}s  "
+                f"{baseline_time / elapsed:5.1f}x  {status}"
+            )
+            if output != baseline:
+                raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
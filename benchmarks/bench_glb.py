@@ -0,0 +1,85 @@
+"""
+Compare the OBJ + MTL output of `colorize_obj` with the float and quantized
+GLB exports: payload size (raw and gzip, as a CDN would serve it) and the
+time to get from file to float position/UV/index arrays.
+
+The OBJ path is timed as `mesh_lod.load_mesh` (vectorized text parse, no
+`.meshcache`) plus the planar UVs. The GLB path is `mesh_gltf.load_glb`.
+The texture is referenced rather than embedded, since both paths ship the
+same PNG. Sizes default to the range of the lwli/la5ar models; real meshes
+can be added with `--obj`:
+
+    python benchmarks/bench_glb.py
+    python benchmarks/bench_glb.py --vertices 50000 --obj lwli.obj la5ar.obj
+"""
+from __future__ import annotations
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from colorize_obj import ObjConfig, planar_uvs, rewrite_obj  # noqa: E402
+from fixtures import obj_fixture  # noqa: E402
+from mesh_gltf import GlbOptions, export_glb, glb_path, load_glb  # noqa: E402
+from mesh_lod import load_mesh, mesh_bounds  # noqa: E402
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> float:
+    times: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def load_obj_arrays(path: Path) -> None:
+    positions, _ = load_mesh(path)
+    planar_uvs(positions, mesh_bounds(positions))
+
+
+def sizes(*paths: Path) -> str:
+    data = b"".join(path.read_bytes() for path in paths)
+    return f"{len(data) / 1024:9.0f} KiB{len(zlib.compress(data, 6)) / 1024:9.0f} KiB"
+
+
+def compare(source: Path, workdir: Path, repeat: int) -> None:
+    path = workdir / source.name
+    shutil.copyfile(source, path)
+    config = ObjConfig(f"{path.stem}_palette.png", f"{path.stem}_texture")
+    rewrite_obj(path, config, vectorized=True)
+    obj_time = best_of(lambda: load_obj_arrays(path), repeat)
+    print(f"{source.name}")
+    print(f"  {'':<16}{'raw':>13}{'gzip':>13}{'parse':>10}")
+    print(f"  {'obj + mtl':<16}{sizes(path, path.with_suffix('.mtl'))}{obj_time * 1000:8.1f}ms")
+    for label, quantize in (("glb float", False), ("glb quantized", True)):
+        export_glb(path, config, GlbOptions(quantize=quantize, embed_texture=False))
+        output = glb_path(path)
+        glb_time = best_of(lambda: load_glb(output), repeat)
+        print(
+            f"  {label:<16}{sizes(output)}{glb_time * 1000:8.1f}ms"
+            f"  ({obj_time / glb_time:.0f}x faster)"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vertices", type=int, nargs="+", default=[20_000, 100_000])
+    parser.add_argument("--obj", type=Path, nargs="*", default=[], help="real OBJs to compare too")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for source in [obj_fixture(count) for count in args.vertices] + args.obj:
+            compare(source, Path(workdir), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Compare palette quality and runtime of `kmeans_palette` against the original
+per-cluster-mask implementation on synthetic "photos" of several sizes.
+
+Quality is the mean squared RGB distance from each usable pixel to its
+closest palette colour (lower is better).
+
+    python benchmarks/bench_kmeans_palette.py --sizes 256 1024 2048
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from create_palette_textures import kmeans_palette, nearest_centroid  # noqa: E402
+from fixtures import synthetic_photo  # noqa: E402
+
+
+def legacy_kmeans_palette(
+    pixels: np.ndarray, clusters: int, rng: np.random.Generator, iterations: int = 12
+) -> np.ndarray:
+    """The original implementation: (N, k, 3) distances, one mask per cluster."""
+    flat = pixels.reshape(-1, 3)
+    usable = flat[flat.mean(axis=1) > 0.05]
+    if usable.size == 0:
+        usable = flat
+    centroids = usable[rng.choice(usable.shape[0], size=clusters, replace=False)]
+    for _ in range(iterations):
+        distances = np.linalg.norm(usable[:, None, :] - centroids[None, :, :], axis=2)
+        labels = distances.argmin(axis=1)
+        new_centroids: List[np.ndarray] = []
+        for idx in range(clusters):
+            members = usable[labels == idx]
+            if members.size == 0:
+                new_centroids.append(usable[rng.integers(0, usable.shape[0])])
+            else:
+                new_centroids.append(members.mean(axis=0))
+        new_centroids_array = np.vstack(new_centroids)
+        if np.allclose(new_centroids_array, centroids, atol=1e-3):
+            centroids = new_centroids_array
+            break
+        centroids = new_centroids_array
+    return centroids[np.argsort(centroids.mean(axis=1))[::-1]]
+
+
+def quantisation_error(pixels: np.ndarray, palette: np.ndarray) -> float:
+    flat = pixels.reshape(-1, 3)
+    usable = flat[flat.mean(axis=1) > 0.05]
+    labels = nearest_centroid(usable, palette.astype(np.float64))
+    return float(((usable - palette[labels]) ** 2).sum(axis=1).mean())
+
+
+def run(label: str, fn: Callable[[], np.ndarray], pixels: np.ndarray) -> None:
+    start = time.perf_counter()
+    palette = fn()
+    elapsed = time.perf_counter() - start
+    error = quantisation_error(pixels, palette)
+    print(f"  {label:<22}{elapsed:8.3f}s  error {error:.5f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[256, 1024, 2048])
+    parser.add_argument("--clusters", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=4096)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        pixels = synthetic_photo(size)
+        print(f"{size}x{size} ({size * size:,} pixels), k={args.clusters}")
+        run(
+            "legacy",
+            lambda: legacy_kmeans_palette(pixels, args.clusters, np.random.default_rng(42)),
+            pixels,
+        )
+        run(
+            "k-means++ / bincount",
+            lambda: kmeans_palette(pixels, args.clusters, rng=np.random.default_rng(42)),
+            pixels,
+        )
+        run(
+            f"mini-batch {args.batch_size}",
+            lambda: kmeans_palette(
+                pixels,
+                args.clusters,
+                iterations=50,
+                batch_size=args.batch_size,
+                rng=np.random.default_rng(42),
+            ),
+            pixels,
+        )
+
+
+if __name__ == "__main__":
+    main()
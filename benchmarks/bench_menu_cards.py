@@ -0,0 +1,63 @@
+"""
+Compare the `menu_cards` tokenizer with the old DOTALL card regex from
+`convert_menu_cards.py` on synthetic menus of growing size.
+
+Every card is already converted (image overlay, no bottom buttons), which is
+the case where the regex cannot match and backtracks across the rest of the
+page. The tokenizer time per card should stay flat as the menu grows; the
+regex grows exponentially (about 8s for 8 cards here), so it only runs on
+the tiny `--legacy-cards` menus.
+
+    python benchmarks/bench_menu_cards.py --cards 625 1250 2500 5000 --legacy-cards 2 4 6
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from fixtures import synthetic_menu  # noqa: E402
+from menu_cards import iter_cards  # noqa: E402
+
+LEGACY_PATTERN = re.compile(
+    r'(<article class="product-card"[^>]*>.*?<div class="product-media">.*?<span class="product-badge[^"]*">([^<]+)</span>.*?<img[^>]+>.*?<span class="product-category-overlay">([^<]+)</span>.*?</div>.*?<div class="product-info">.*?<div class="product-header">.*?<h3>([^<]+)</h3>.*?<p class="product-price">([^<]+)</p>.*?</div>.*?)<div class="product-actions">.*?data-quickview="([^"]+)".*?data-add-to-cart="([^"]+)".*?</div>.*?(</div>.*?</article>)',
+    re.DOTALL,
+)
+
+
+def timed(fn) -> tuple[float, int]:
+    start = time.perf_counter()
+    count = fn()
+    return time.perf_counter() - start, count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cards", type=int, nargs="+", default=[625, 1250, 2500, 5000])
+    parser.add_argument("--legacy-cards", type=int, nargs="*", default=[2, 4, 6])
+    args = parser.parse_args()
+
+    print(f"{'cards':>6} {'MB':>6} {'tokenizer':>10} {'us/card':>8} {'regex':>9} {'us/card':>8}")
+    for cards in sorted(set(args.legacy_cards) | set(args.cards)):
+        page = synthetic_menu(cards)
+        tokenizer, found = timed(lambda: len(list(iter_cards(page))))
+        if found != cards:
+            raise SystemExit(f"tokenizer found {found} of {cards} cards")
+        row = (
+            f"{cards:6d} {len(page) / 1e6:6.2f} {tokenizer:9.3f}s "
+            f"{tokenizer / cards * 1e6:8.1f}"
+        )
+        if cards in args.legacy_cards:
+            legacy, _ = timed(lambda: len(LEGACY_PATTERN.findall(page)))
+            row += f" {legacy:8.3f}s {legacy / cards * 1e6:8.1f}"
+        else:
+            row += f" {'skipped':>9}"
+        print(row, flush=True)
+
+
+if __name__ == "__main__":
+    main()
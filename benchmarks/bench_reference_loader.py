@@ -0,0 +1,124 @@
+"""
+Compare `load_reference_pixels` against the original full-resolution loader
+on real product photos and on synthetic JPEG/PNG fixtures.
+
+For every image it prints the mean absolute pixel difference between the
+two loaders (0-255 units). It also runs `kmeans_palette` with the same seed
+on each loader's pixels and prints the quantisation error of both palettes
+against the legacy pixels (as in bench_kmeans_palette.py). The palettes
+themselves can land in different local optima, so comparing the errors
+says more than comparing colours. The last line times a batch loaded
+sequentially and through `prefetch_references`.
+
+    python benchmarks/bench_reference_loader.py
+    python benchmarks/bench_reference_loader.py --sizes 2048 4096 --limit 20
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from bench_kmeans_palette import quantisation_error  # noqa: E402
+from create_palette_textures import (  # noqa: E402
+    DOWNSAMPLE_LIMIT,
+    kmeans_palette,
+    load_reference_pixels,
+    prefetch_references,
+)
+from fixtures import ROOT, image_fixture  # noqa: E402
+
+
+def legacy_load_reference_pixels(path: Path, limit: int = DOWNSAMPLE_LIMIT) -> np.ndarray:
+    """The original loader: full decode, RGB convert, LANCZOS, then scale."""
+    image = Image.open(path).convert("RGB")
+    width, height = image.size
+    scale = max(width, height) / limit
+    if scale > 1:
+        image = image.resize(
+            (int(width / scale), int(height / scale)),
+            resample=Image.Resampling.LANCZOS,
+        )
+    return np.asarray(image, dtype=np.float32) / 255.0
+
+
+def best_of(fn: Callable[[], np.ndarray], repeat: int) -> Tuple[float, np.ndarray]:
+    times: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def compare(path: Path, repeat: int, clusters: int) -> Tuple[float, float, float]:
+    legacy_time, legacy = best_of(lambda: legacy_load_reference_pixels(path), repeat)
+    fast_time, fast = best_of(lambda: load_reference_pixels(path), repeat)
+    difference = float(np.abs(legacy - fast).mean() * 255)
+    legacy_error = quantisation_error(
+        legacy, kmeans_palette(legacy, clusters, rng=np.random.default_rng(42))
+    )
+    fast_error = quantisation_error(
+        legacy, kmeans_palette(fast, clusters, rng=np.random.default_rng(42))
+    )
+    with Image.open(path) as image:
+        size = f"{image.format} {image.size[0]}x{image.size[1]}"
+    print(
+        f"  {path.name[:36]:<38}{size:<16}{legacy_time * 1000:8.1f}ms"
+        f"{fast_time * 1000:8.1f}ms{legacy_time / fast_time:7.1f}x"
+        f"{difference:7.2f}{legacy_error:10.5f}{fast_error:10.5f}"
+    )
+    return legacy_time, fast_time, difference
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2048, 4096])
+    parser.add_argument("--limit", type=int, default=12, help="real photos to compare")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--clusters", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    photos = sorted(
+        (ROOT / "public" / "images").glob("**/*.*"),
+        key=lambda path: path.stat().st_size,
+        reverse=True,
+    )
+    photos = [path for path in photos if "variants" not in path.parts][: args.limit]
+    fixtures = [image_fixture(size, format) for size in args.sizes for format in ("JPEG", "PNG")]
+
+    print(
+        f"  {'image':<38}{'source':<16}{'legacy':>10}{'fast':>10}{'speedup':>8}"
+        f"{'diff':>7}{'err old':>10}{'err new':>10}"
+    )
+    totals = [compare(path, args.repeat, args.clusters) for path in fixtures + photos]
+    legacy_total = sum(total[0] for total in totals)
+    fast_total = sum(total[1] for total in totals)
+    print(
+        f"  {len(totals)} images: {legacy_total:.2f}s -> {fast_total:.2f}s "
+        f"({legacy_total / fast_total:.1f}x), max pixel diff {max(total[2] for total in totals):.2f}"
+    )
+
+    batch = fixtures + photos
+    start = time.perf_counter()
+    for path in batch:
+        load_reference_pixels(path)
+    sequential = time.perf_counter() - start
+    start = time.perf_counter()
+    with prefetch_references(batch, threads=args.threads) as futures:
+        for future in futures.values():
+            future.result()
+    prefetched = time.perf_counter() - start
+    print(f"  batch of {len(batch)}: sequential {sequential:.2f}s, {args.threads} threads {prefetched:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
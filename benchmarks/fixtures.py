@@ -0,0 +1,179 @@
+"""
+Deterministic synthetic inputs for the benchmarks.
+
+Every generator is seeded, so the same parameters always produce the same
+bytes. File fixtures are written once under `.cache/bench_fixtures/` and
+reused, because the big ones (a 5M-vertex OBJ is ~300 MB) take longer to
+create than to benchmark:
+
+    obj_fixture(1_000_000)   # .cache/bench_fixtures/v1/mesh-1000000.obj
+    image_fixture(2048)      # reference "photo", PNG
+    catalog_fixture(10_000)  # products.json with 10k records
+    menu_fixture(2500)       # menu page with 2500 cards
+"""
+from __future__ import annotations
+
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from atomic_files import staged_file, write_atomic  # noqa: E402
+from catalog import Product  # noqa: E402
+from render_menu import card_fields, render_card  # noqa: E402
+
+FIXTURE_VERSION = 1
+FIXTURE_DIR = ROOT / ".cache" / "bench_fixtures"
+_CHUNK = 100_000
+
+CATEGORIES = ("gluten-free", "healthy", "vegetarian", "raw-materials", "low-carb")
+_WORDS = (
+    "almond", "date", "honey", "oat", "matilda", "cake", "cookie", "bread", "tart",
+    "sesame", "pistachio", "carrot", "cocoa", "lemon", "fig", "walnut", "coconut",
+)
+_WORDS_AR = (
+    "كعكة", "خبز", "لوز", "تمر", "عسل", "شوفان", "بسكويت", "فستق", "جزر",
+    "الكاكاو", "ليمون", "تين", "جوز", "خالية", "من", "الغلوتين", "السكر",
+)
+_TAGS = ("Vegan", "Sugar Free", "Gluten Free", "Keto", "Protein", "Seasonal")
+
+
+def _cached(name: str, write: Callable[[Path], None]) -> Path:
+    path = FIXTURE_DIR / f"v{FIXTURE_VERSION}" / name
+    if not path.exists():
+        write(path)
+    return path
+
+
+# -- meshes -----------------------------------------------------------------
+
+
+def write_synthetic_obj(path: Path, vertices: int, seed: int = 7) -> None:
+    """A triangle soup of `vertices` points and twice as many `v//vn` faces."""
+    rng = np.random.default_rng(seed)
+    with staged_file(path) as temp, temp.open("w", encoding="utf-8") as handle:
+        handle.write("# synthetic benchmark mesh\nmtllib old.mtl\no pastry\n")
+        for start in range(0, vertices, _CHUNK):
+            count = min(_CHUNK, vertices - start)
+            positions = rng.uniform(-1.0, 1.0, size=(count, 3))
+            handle.write(("v %.6f %.6f %.6f\n" * count) % tuple(positions.ravel().tolist()))
+        handle.write("vn 0.0 1.0 0.0\nusemtl old\ns off\n")
+        for start in range(0, vertices * 2, _CHUNK):
+            count = min(_CHUNK, vertices * 2 - start)
+            faces = rng.integers(1, vertices + 1, size=(count, 3))
+            handle.write(("f %d//1 %d//1 %d//1\n" * count) % tuple(faces.ravel().tolist()))
+
+
+def obj_fixture(vertices: int) -> Path:
+    return _cached(f"mesh-{vertices}.obj", lambda path: write_synthetic_obj(path, vertices))
+
+
+def vertex_lines(path: Path) -> List[str]:
+    """The `v` records of an OBJ fixture, as `generate_uvs` receives them."""
+    with path.open() as handle:
+        return [line for line in handle if line.startswith("v ")]
+
+
+# -- images -----------------------------------------------------------------
+
+
+def synthetic_photo(size: int, seed: int = 3) -> np.ndarray:
+    """Blocky colour regions with a soft vignette and sensor-like noise."""
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(0.15, 0.95, size=(6, 3)).astype(np.float32)
+    cells = rng.integers(0, len(base), size=(16, 16))
+    labels = np.kron(cells, np.ones((size // 16 + 1, size // 16 + 1), dtype=int))[:size, :size]
+    image = base[labels]
+    y, x = np.indices((size, size), dtype=np.float32) / size - 0.5
+    image *= (1.0 - 0.6 * (x**2 + y**2))[..., None]
+    image += rng.normal(0.0, 0.03, size=image.shape).astype(np.float32)
+    return np.clip(image, 0.0, 1.0)
+
+
+def image_fixture(size: int, format: str = "PNG") -> Path:
+    def write(path: Path) -> None:
+        pixels = (synthetic_photo(size) * 255).astype(np.uint8)
+        with staged_file(path) as temp:
+            Image.fromarray(pixels).save(temp, format=format)
+
+    return _cached(f"photo-{size}.{format.lower()}", write)
+
+
+# -- catalogs ---------------------------------------------------------------
+
+
+def synthetic_catalog(count: int, seed: int = 11) -> List[Dict[str, Any]]:
+    """`count` products.json records shaped like the real catalog."""
+    rng = random.Random(seed)
+    records = []
+    for index in range(1, count + 1):
+        category = CATEGORIES[index % len(CATEGORIES)]
+        record: Dict[str, Any] = {
+            "id": index,
+            "name": " ".join(rng.choices(_WORDS, k=rng.randint(2, 5))).title(),
+            "price": rng.choice((15, 20, 30, 45, 60, 80, 120)),
+            "category": category,
+            "status": "active" if rng.random() < 0.95 else "inactive",
+            "image": f"/images/{category}/{index:06d}.jpeg",
+            "description": " ".join(rng.choices(_WORDS, k=rng.randint(0, 12))),
+            "featured": rng.random() < 0.1,
+            "bestSeller": rng.random() < 0.1,
+            "inStock": rng.random() < 0.9,
+            "tags": rng.sample(_TAGS, k=rng.randint(0, 3)),
+            "nameAr": " ".join(rng.choices(_WORDS_AR, k=rng.randint(2, 6))),
+            "descriptionAr": " ".join(rng.choices(_WORDS_AR, k=rng.randint(0, 10))),
+        }
+        if rng.random() < 0.85:  # some real records lack updatedAt
+            record["updatedAt"] = f"2026-02-{1 + index % 28:02d}T03:39:52.{index % 1000:03d}Z"
+        records.append(record)
+    return records
+
+
+def catalog_fixture(count: int) -> Path:
+    def write(path: Path) -> None:
+        payload = json.dumps(synthetic_catalog(count), ensure_ascii=False, indent=2)
+        write_atomic(path, payload)
+
+    return _cached(f"products-{count}.json", write)
+
+
+# -- menus ------------------------------------------------------------------
+
+
+def synthetic_menu(cards: int) -> str:
+    """A menu page of `cards` converted cards (category overlay after the image)."""
+    parts = ['<html><body><div class="product-grid">\n']
+    for index in range(cards):
+        fields = card_fields(
+            Product.from_dict({
+                "id": index,
+                "name": f"Product {index}",
+                "price": 20 + index % 40,
+                "category": ("gluten-free", "healthy", "low-carb")[index % 3],
+            })
+        )
+        card = render_card(fields)
+        parts.append(
+            card.replace(
+                ' loading="lazy">',
+                ' loading="lazy">\n                        '
+                f'<span class="product-category-overlay">{fields["category"]}</span>',
+            )
+        )
+    parts.append("</div></body></html>\n")
+    return "".join(parts)
+
+
+def menu_fixture(cards: int) -> Path:
+    def write(path: Path) -> None:
+        page = synthetic_menu(cards)
+        write_atomic(path, page)
+
+    return _cached(f"menu-{cards}.html", write)
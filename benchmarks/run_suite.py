@@ -0,0 +1,386 @@
+"""
+Run the benchmark suite and check it against a stored baseline.
+
+Each case times one hot function at several input sizes on the fixtures
+from `fixtures.py`. Only the call itself is timed; fixture loading and
+per-run resets are excluded. The best of `--repeat` runs is kept. Every run
+is appended to a JSON history file. Results are then compared with the
+baseline, and the exit status is 1 when any case got slower than
+`--threshold` (and by more than `--min-delta` seconds, so sub-millisecond
+jitter does not fail the build):
+
+    python benchmarks/run_suite.py                   # default sizes
+    python benchmarks/run_suite.py --size quick      # smallest size only
+    python benchmarks/run_suite.py --size full       # up to 5M vertices / 100k products
+    python benchmarks/run_suite.py --only kmeans --save-baseline
+
+History and baseline live in `.cache/benchmarks/` by default. Timings are
+machine-specific, so each box keeps its own.
+"""
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from atomic_files import write_atomic  # noqa: E402
+from catalog import parse_catalog  # noqa: E402
+from colorize_obj import ObjConfig, format_uv_block, generate_uvs, rewrite_obj, vertex_bounds  # noqa: E402
+from create_palette_textures import (  # noqa: E402
+    generate_radial_gradient,
+    kmeans_palette,
+    load_reference_pixels,
+    render_radial_gradient,
+)
+from fixtures import (  # noqa: E402
+    ROOT,
+    catalog_fixture,
+    image_fixture,
+    menu_fixture,
+    obj_fixture,
+    synthetic_photo,
+    vertex_lines,
+)
+from menu_cards import iter_cards  # noqa: E402
+from render_menu import card_fields, render_card  # noqa: E402
+from search_index import product_terms  # noqa: E402
+
+HISTORY_VERSION = 1
+RESULTS_DIR = ROOT / ".cache" / "benchmarks"
+SIZES = ("quick", "default", "full")
+PALETTE = np.array([[0.95, 0.85, 0.7], [0.7, 0.5, 0.3], [0.4, 0.25, 0.1]], dtype=np.float32)
+
+
+@dataclass
+class Bench:
+    """A prepared measurement: `run` is timed, `reset` runs untimed before each call."""
+
+    run: Callable[[], Any]
+    reset: Optional[Callable[[], None]] = None
+
+
+@dataclass
+class Case:
+    name: str
+    unit: str
+    scales: Dict[str, List[int]]
+    setup: Callable[[int, Path], Bench]
+
+    def scales_for(self, size: str) -> List[int]:
+        return self.scales[size]
+
+
+@dataclass
+class Result:
+    case: str
+    scale: int
+    unit: str
+    best: float
+    median: float
+    runs: List[float] = field(default_factory=list)
+
+    @property
+    def key(self) -> str:
+        return f"{self.case}[{self.scale}]"
+
+
+def _scales(quick: List[int], default: List[int], full: List[int]) -> Dict[str, List[int]]:
+    return {"quick": quick, "default": default, "full": full}
+
+
+MESH_SCALES = _scales([10_000], [10_000, 100_000, 1_000_000], [10_000, 100_000, 1_000_000, 5_000_000])
+IMAGE_SCALES = _scales([256], [256, 512, 1024], [256, 512, 1024, 2048])
+PHOTO_SCALES = _scales([512], [512, 1024, 2048], [512, 1024, 2048, 4096])
+CATALOG_SCALES = _scales([100], [100, 1_000, 10_000], [100, 1_000, 10_000, 100_000])
+MENU_SCALES = _scales([100], [100, 1_000, 5_000], [100, 1_000, 5_000, 20_000])
+
+
+def _generate_uvs(vertices: int, workdir: Path) -> Bench:
+    lines = vertex_lines(obj_fixture(vertices))
+    return Bench(lambda: generate_uvs(lines))
+
+
+def _format_uv_block(vertices: int, workdir: Path) -> Bench:
+    lines = vertex_lines(obj_fixture(vertices))
+    return Bench(lambda: format_uv_block(lines, vertex_bounds(lines, vectorized=True)))
+
+
+def _rewrite_obj(vertices: int, workdir: Path) -> Bench:
+    source = obj_fixture(vertices)
+    target = workdir / source.name
+    config = ObjConfig(texture_path="palette.png", material_name="bench_texture")
+    return Bench(
+        lambda: rewrite_obj(target, config, vectorized=True),
+        reset=lambda: shutil.copyfile(source, target),
+    )
+
+
+def _kmeans_palette(size: int, workdir: Path) -> Bench:
+    pixels = synthetic_photo(size)
+    return Bench(lambda: kmeans_palette(pixels, 5, rng=np.random.default_rng(42)))
+
+
+def _generate_radial_gradient(size: int, workdir: Path) -> Bench:
+    return Bench(lambda: generate_radial_gradient(PALETTE, size, rng=np.random.default_rng(42)))
+
+
+def _render_radial_gradient(size: int, workdir: Path) -> Bench:
+    return Bench(lambda: render_radial_gradient(PALETTE, size, seed=42))
+
+
+def _load_reference_pixels(size: int, workdir: Path) -> Bench:
+    path = image_fixture(size)
+    return Bench(lambda: load_reference_pixels(path))
+
+
+def _parse_catalog(count: int, workdir: Path) -> Bench:
+    path = catalog_fixture(count)
+    return Bench(lambda: parse_catalog(path))
+
+
+def _product_terms(count: int, workdir: Path) -> Bench:
+    products = parse_catalog(catalog_fixture(count)).active()
+    return Bench(lambda: [product_terms(product) for product in products])
+
+
+def _render_cards(count: int, workdir: Path) -> Bench:
+    products = parse_catalog(catalog_fixture(count)).active()
+    return Bench(lambda: [render_card(card_fields(product)) for product in products])
+
+
+def _iter_cards(cards: int, workdir: Path) -> Bench:
+    page = menu_fixture(cards).read_text(encoding="utf-8")
+    return Bench(lambda: sum(1 for _ in iter_cards(page)))
+
+
+CASES: List[Case] = [
+    Case("colorize.generate_uvs", "vertices", MESH_SCALES, _generate_uvs),
+    Case("colorize.format_uv_block", "vertices", MESH_SCALES, _format_uv_block),
+    Case("colorize.rewrite_obj", "vertices", MESH_SCALES, _rewrite_obj),
+    Case("palette.kmeans_palette", "px", IMAGE_SCALES, _kmeans_palette),
+    Case("palette.generate_radial_gradient", "px", IMAGE_SCALES, _generate_radial_gradient),
+    Case("palette.render_radial_gradient", "px", IMAGE_SCALES, _render_radial_gradient),
+    Case("palette.load_reference_pixels", "px", PHOTO_SCALES, _load_reference_pixels),
+    Case("catalog.parse_catalog", "products", CATALOG_SCALES, _parse_catalog),
+    Case("search.product_terms", "products", CATALOG_SCALES, _product_terms),
+    Case("menu.render_cards", "products", CATALOG_SCALES, _render_cards),
+    Case("menu.iter_cards", "cards", MENU_SCALES, _iter_cards),
+]
+
+
+def measure(bench: Bench, repeat: int, budget: float) -> List[float]:
+    """Up to `repeat` timed calls; stops early once `budget` seconds are spent."""
+    runs: List[float] = []
+    while len(runs) < repeat and (not runs or sum(runs) < budget):
+        if bench.reset is not None:
+            bench.reset()
+        start = time.perf_counter()
+        bench.run()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+def run_suite(
+    cases: Sequence[Case], size: str, repeat: int, budget: float
+) -> List[Result]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for case in cases:
+            for scale in case.scales_for(size):
+                bench = case.setup(scale, Path(tmp))
+                runs = measure(bench, repeat, budget)
+                result = Result(
+                    case.name, scale, case.unit, min(runs), statistics.median(runs), runs
+                )
+                results.append(result)
+                print(
+                    f"{result.key:<44}{result.best * 1000:11.2f}ms"
+                    f"  (median {result.median * 1000:.2f}ms, {len(runs)} runs)",
+                    flush=True,
+                )
+                del bench
+    return results
+
+
+def machine_info() -> Dict[str, Any]:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "cpus": os.cpu_count(),
+        "revision": revision,
+    }
+
+
+def _load_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data if data.get("version") == HISTORY_VERSION else None
+
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    write_atomic(path, json.dumps(data, indent=1))
+
+
+def append_history(path: Path, run: Dict[str, Any]) -> None:
+    history = _load_json(path) or {"version": HISTORY_VERSION, "runs": []}
+    history["runs"].append(run)
+    _write_json(path, history)
+
+
+def save_baseline(path: Path, run: Dict[str, Any]) -> None:
+    """Merge this run's results into the baseline (cases not run are kept)."""
+    baseline = _load_json(path) or {"version": HISTORY_VERSION, "results": {}}
+    baseline["machine"] = run["machine"]
+    baseline["updated"] = run["started"]
+    baseline["results"].update(run["results"])
+    _write_json(path, baseline)
+
+
+@dataclass
+class Comparison:
+    key: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float("inf")
+
+
+def compare(
+    results: Sequence[Result], baseline: Dict[str, float], threshold: float, min_delta: float
+) -> List[Comparison]:
+    """Cases slower than the baseline by more than `threshold` and `min_delta`."""
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.key)
+        if previous is None:
+            continue
+        comparison = Comparison(result.key, previous, result.best)
+        if comparison.ratio > 1 + threshold and result.best - previous > min_delta:
+            regressions.append(comparison)
+    return regressions
+
+
+def format_comparison(results: Sequence[Result], baseline: Dict[str, float]) -> str:
+    lines = []
+    for result in results:
+        previous = baseline.get(result.key)
+        if previous is None:
+            lines.append(f"  {result.key:<44}{'new':>11}")
+            continue
+        change = (result.best / previous - 1) * 100 if previous else 0.0
+        lines.append(
+            f"  {result.key:<44}{previous * 1000:9.2f}ms -> {result.best * 1000:9.2f}ms"
+            f"  {change:+6.1f}%"
+        )
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", choices=SIZES, default="default", help="input sizes to run")
+    parser.add_argument(
+        "--only", nargs="+", metavar="PATTERN", help="case names or globs (substring match)"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="timed calls per case and size")
+    parser.add_argument(
+        "--budget", type=float, default=3.0, help="stop repeating a case after this many seconds"
+    )
+    parser.add_argument("--history", type=Path, default=RESULTS_DIR / "history.json")
+    parser.add_argument("--baseline", type=Path, default=RESULTS_DIR / "baseline.json")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%% (default)"
+    )
+    parser.add_argument(
+        "--min-delta", type=float, default=0.002, help="ignore slowdowns under this many seconds"
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="store these results as the new baseline"
+    )
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    return parser.parse_args(argv)
+
+
+def select_cases(patterns: Optional[Sequence[str]]) -> List[Case]:
+    if not patterns:
+        return list(CASES)
+    return [
+        case
+        for case in CASES
+        if any(pattern in case.name or fnmatch.fnmatch(case.name, pattern) for pattern in patterns)
+    ]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    cases = select_cases(args.only)
+    if args.list:
+        for case in cases:
+            for size in SIZES:
+                scales = ", ".join(f"{scale:,}" for scale in case.scales_for(size))
+                print(f"{case.name:<36}{size:<9}{scales} {case.unit}")
+        return
+    if not cases:
+        raise SystemExit(f"No benchmark matches {args.only}")
+
+    started = time.strftime("%Y-%m-%dT%H:%M:%S")
+    results = run_suite(cases, args.size, max(1, args.repeat), args.budget)
+    run = {
+        "started": started,
+        "size": args.size,
+        "machine": machine_info(),
+        "results": {result.key: result.best for result in results},
+        "runs": {result.key: result.runs for result in results},
+    }
+    append_history(args.history, run)
+
+    stored = _load_json(args.baseline)
+    baseline: Dict[str, float] = stored["results"] if stored else {}
+    if args.save_baseline:
+        save_baseline(args.baseline, run)
+        print(f"baseline saved to {args.baseline}")
+    if not baseline:
+        print(f"no baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+    print(f"\nagainst baseline of {stored.get('updated')}:")
+    print(format_comparison(results, baseline))
+    regressions = compare(results, baseline, args.threshold, args.min_delta)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression.key}: {regression.ratio:.2f}x slower")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,22 @@
+import argparse
 import os
+import sys
+from pathlib import Path
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+from image_variants import load_variant_manifest, responsive_img
+from profiling import add_profile_arguments, profile_run, stage
+
+parser = argparse.ArgumentParser(description="Print menu cards for the gluten/sugar free images")
+add_profile_arguments(parser)
+args = parser.parse_args()
 
 images_dir = "images" 
 if not os.path.exists(images_dir):
     print("Error: images dir not found")
     exit(1)
 
-files = os.listdir(images_dir)
-gluten_free = sorted([f for f in files if f.startswith("gluten_free")])
-sugar_free = sorted([f for f in files if f.startswith("sugar_free")])
-
 def create_card(filename, type_name):
     # Name formatting: gluten_free1.png -> Gluten Free 1
     # User asked for "Gluten Free" category and "Sugar Free" category tags
@@ -17,13 +25,14 @@ def create_card(filename, type_name):
     full_name = f"{formatted_type} {name_suffix}"
     
     category_slug = type_name.replace("_", "-") # gluten-free
+    img = responsive_img(f"../images/{filename}", full_name, variants.get(f"/images/{quote(filename)}"), extra="")
     
     return f"""                <article class="product-card" data-product data-category="{category_slug}"
                     data-description="Delicious {full_name} made with natural ingredients."
                     data-tags="{formatted_type}">
                     <div class="product-media">
                         <span class="product-badge">{formatted_type}</span>
-                        <img src="../images/{filename}" alt="{full_name}">
+                        {img}
                         <span class="product-category-overlay">{formatted_type}</span>
                     </div>
                     <div class="product-info">
@@ -39,9 +48,18 @@ def create_card(filename, type_name):
                     </div>
                 </article>"""
 
-print("<!-- START GENERATED CONTENT -->")
-for f in gluten_free:
-    print(create_card(f, "gluten_free"))
-for f in sugar_free:
-    print(create_card(f, "sugar_free"))
-print("<!-- END GENERATED CONTENT -->")
+with profile_run(args, "generate_menu"):
+    with stage("scan"):
+        files = os.listdir(images_dir)
+        gluten_free = sorted([f for f in files if f.startswith("gluten_free")])
+        sugar_free = sorted([f for f in files if f.startswith("sugar_free")])
+        # srcset/sizes for images that image_variants.py has resized
+        variants = load_variant_manifest(Path(images_dir) / "variants" / "manifest.json")
+
+    with stage("render"):
+        print("<!-- START GENERATED CONTENT -->")
+        for f in gluten_free:
+            print(create_card(f, "gluten_free"))
+        for f in sugar_free:
+            print(create_card(f, "sugar_free"))
+        print("<!-- END GENERATED CONTENT -->")
@@ -0,0 +1,80 @@
+// Client for the prebuilt product search index (scripts/search_index.py).
+// Usage: const ids = await window.MenuSearch.query('كعكة');
+(() => {
+    const INDEX_URL = '/data/search-index.json';
+    const ARTICLE = 'ال';
+
+    // Keep in step with normalize() in scripts/search_index.py.
+    const ARABIC_DROP = /[\u064B-\u0652\u0670\u0640]/g;
+    const ARABIC_FOLD = {
+        'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+        'ى': 'ي', 'ئ': 'ي', 'ؤ': 'و', 'ة': 'ه'
+    };
+
+    const normalize = (value) => String(value || '')
+        .replace(ARABIC_DROP, '')
+        .replace(/[أإآٱىئؤة]/g, (char) => ARABIC_FOLD[char])
+        .replace(/[\u0660-\u0669]/g, (char) => String(char.charCodeAt(0) - 0x0660))
+        .replace(/[\u06F0-\u06F9]/g, (char) => String(char.charCodeAt(0) - 0x06F0))
+        .toLowerCase()
+        .normalize('NFKD')
+        .replace(/\p{M}/gu, '');
+
+    const tokenize = (value) => (normalize(value).match(/[\p{L}\p{N}]+/gu) || []);
+
+    const variants = (token) => (
+        token.startsWith(ARTICLE) && token.length > ARTICLE.length + 1
+            ? [token, token.slice(ARTICLE.length)]
+            : [token]
+    );
+
+    let indexPromise = null;
+    const decoded = new Map();
+
+    const load = () => {
+        if (!indexPromise) {
+            indexPromise = fetch(INDEX_URL, { cache: 'no-cache' })
+                .then((response) => {
+                    if (!response.ok) throw new Error(`Fetch failed: ${INDEX_URL}`);
+                    return response.json();
+                })
+                .catch((err) => {
+                    indexPromise = null;
+                    throw err;
+                });
+        }
+        return indexPromise;
+    };
+
+    const postings = (index, term) => {
+        if (decoded.has(term)) return decoded.get(term);
+        // Own keys only: 'constructor' or '__proto__' must not hit Object.prototype.
+        const deltas = Object.hasOwn(index.terms, term) ? index.terms[term] : [];
+        const positions = new Array(deltas.length);
+        let total = 0;
+        for (let i = 0; i < deltas.length; i++) {
+            total += deltas[i];
+            positions[i] = total;
+        }
+        decoded.set(term, positions);
+        return positions;
+    };
+
+    // Product ids matching every query word (prefix match), in catalog order.
+    const query = async (text) => {
+        const index = await load();
+        let result = null;
+        for (const token of tokenize(text)) {
+            const matches = new Set();
+            variants(token).forEach((variant) => {
+                postings(index, variant.slice(0, index.maxPrefix)).forEach((pos) => matches.add(pos));
+            });
+            result = result === null ? matches : new Set([...result].filter((pos) => matches.has(pos)));
+            if (!result.size) return [];
+        }
+        if (result === null) return [];
+        return [...result].sort((a, b) => a - b).map((pos) => index.docs[pos]);
+    };
+
+    window.MenuSearch = { load, query, normalize };
+})();
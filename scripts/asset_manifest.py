@@ -0,0 +1,325 @@
+"""
+Fingerprint the static assets and point the deploy copies of the menu page
+and products.json at the fingerprinted names.
+
+Every file under `public/images` and `public/assets` (which includes the
+generated variants, palette textures and meshes) is hashed on a thread
+pool. Digests are cached in `.cache/asset_hashes.json` and reused while a
+file's size and mtime are unchanged. Each file is hardlinked (or copied,
+across devices or with `--copy`) into the deploy directory under a
+content-hashed name:
+
+    /images/gluten free/abc.jpeg -> /static/images/gluten%20free/abc.3f2a9c1b07de.jpeg
+
+Since a name only ever refers to one content, `/static/` can be served with
+`Cache-Control: public, max-age=31536000, immutable`. The deploy directory
+mirrors `public/` and is laid over it: server.js serves `dist/` ahead of
+`public/`, and the Vercel build (`npm run vercel-build`) runs this script
+and copies `dist/` over `public/` before the static output is published.
+
+    dist/static/manifest.json   {"/images/gluten free/abc.jpeg": {"url": ..., "sha256": ..., "size": ...}}
+    dist/static/...             fingerprinted files
+    dist/pages/menu.html        src/srcset/href rewritten to /static/...
+    dist/data/products.json     "/images/..." and "/assets/..." strings rewritten
+
+The sources in `public/` are never modified. Fingerprinted files from
+earlier runs stay, so pages still cached by clients keep working, until
+`--prune` removes those no longer in the manifest.
+
+    python scripts/asset_manifest.py
+    python scripts/asset_manifest.py --copy --prune
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import quote, unquote, urljoin, urlsplit
+
+from atomic_files import copy_atomic, write_atomic
+from profiling import add_profile_arguments, profile_run, stage
+
+MANIFEST_VERSION = 1
+CACHE_VERSION = 1
+HASH_LENGTH = 12
+ROOT = Path(__file__).resolve().parent.parent
+PUBLIC_DIR = ROOT / "public"
+DEPLOY_DIR = ROOT / "dist"
+CACHE_PATH = ROOT / ".cache" / "asset_hashes.json"
+ASSET_DIRS = ("images", "assets")
+STATIC_PREFIX = "static"
+PAGES = ("pages/menu.html",)
+CATALOG = "data/products.json"
+
+# Attribute values that can hold asset URLs; srcset is a comma-separated list.
+_URL_ATTRIBUTE = re.compile(r'\b(src|href|srcset|poster|content)="([^"]*)"')
+
+
+@dataclass
+class RewriteStats:
+    path: Path
+    rewritten: int = 0
+    missing: int = 0
+
+
+def fingerprint_name(relative: str, sha256: str) -> str:
+    """`images/a b.jpeg` -> `images/a b.<hash>.jpeg`."""
+    path = PurePosixPath(relative)
+    return str(path.with_name(f"{path.stem}.{sha256[:HASH_LENGTH]}{path.suffix}"))
+
+
+def discover(public: Path = PUBLIC_DIR, dirs: Sequence[str] = ASSET_DIRS) -> List[str]:
+    """Every file under `dirs`, as sorted POSIX paths relative to `public`."""
+    found = []
+    for name in dirs:
+        for path in (public / name).rglob("*"):
+            if path.is_file() and not path.name.startswith("."):
+                found.append(path.relative_to(public).as_posix())
+    return sorted(found)
+
+
+def load_cache(path: Path) -> Dict[str, List[Any]]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data.get("files", {}) if data.get("version") == CACHE_VERSION else {}
+
+
+def _hash_file(path: Path) -> Tuple[int, int, str]:
+    stat = path.stat()
+    with path.open("rb") as handle:
+        digest = hashlib.file_digest(handle, "sha256").hexdigest()
+    return stat.st_size, stat.st_mtime_ns, digest
+
+
+def hash_assets(
+    public: Path,
+    files: Sequence[str],
+    cache: Dict[str, List[Any]],
+    workers: Optional[int] = None,
+) -> Tuple[Dict[str, List[Any]], int]:
+    """
+    `{relative path: [size, mtime_ns, sha256]}` for `files`, re-reading only
+    files whose stat differs from `cache`. Hashing runs on `workers` threads
+    (hashlib releases the GIL). Also returns how many files were read.
+    """
+    hashes: Dict[str, List[Any]] = {}
+    pending = []
+    for relative in files:
+        stat = (public / relative).stat()
+        entry = cache.get(relative)
+        if entry is not None and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+            hashes[relative] = entry
+        else:
+            pending.append(relative)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for relative, entry in zip(pending, pool.map(lambda rel: _hash_file(public / rel), pending)):
+            hashes[relative] = list(entry)
+    return hashes, len(pending)
+
+
+def link_or_copy(source: Path, target: Path, copy: bool = False) -> bool:
+    """Place `source` at `target` unless it is already there; True if written."""
+    if target.exists():
+        return False  # the name carries the content hash
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if not copy:
+        try:
+            os.link(source, target)
+            return True
+        except OSError:  # cross-device, or no hardlinks on this filesystem
+            pass
+    copy_atomic(source, target)
+    return True
+
+
+def build_manifest(hashes: Mapping[str, Sequence[Any]]) -> Dict[str, Dict[str, Any]]:
+    """`{"/images/a b.jpeg": {"url": "/static/images/a%20b.<hash>.jpeg", ...}}`."""
+    return {
+        f"/{relative}": {
+            "url": "/" + quote(f"{STATIC_PREFIX}/{fingerprint_name(relative, entry[2])}"),
+            "sha256": entry[2],
+            "size": entry[0],
+        }
+        for relative, entry in sorted(hashes.items())
+    }
+
+
+def hashed_url(url: str, manifest: Mapping[str, Mapping[str, Any]], base: str = "/") -> Optional[str]:
+    """The fingerprinted URL for `url` (relative to page URL `base`), or None if unknown."""
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path or url.startswith("#"):
+        return None
+    entry = manifest.get(unquote(urljoin(base, parts.path)))
+    if entry is None:
+        return None
+    suffix = (f"?{parts.query}" if parts.query else "") + (f"#{parts.fragment}" if parts.fragment else "")
+    return entry["url"] + suffix
+
+
+def rewrite_html(
+    html: str, manifest: Mapping[str, Mapping[str, Any]], base: str
+) -> Tuple[str, int, int]:
+    """Rewrite asset URLs in attribute values; returns (html, rewritten, unknown local URLs)."""
+    counts = [0, 0]
+
+    def swap(url: str) -> str:
+        target = hashed_url(url, manifest, base)
+        if target is None:
+            if url.startswith(("/images/", "/assets/", "../images/", "../assets/")):
+                counts[1] += 1
+            return url
+        counts[0] += 1
+        return target
+
+    def replace(match: re.Match[str]) -> str:
+        attribute, value = match.groups()
+        if attribute == "srcset":
+            candidates = []
+            for candidate in value.split(","):
+                url, _, descriptor = candidate.strip().partition(" ")
+                candidates.append(f"{swap(url)} {descriptor}".strip())
+            value = ", ".join(candidates)
+        else:
+            value = swap(value)
+        return f'{attribute}="{value}"'
+
+    return _URL_ATTRIBUTE.sub(replace, html), counts[0], counts[1]
+
+
+def rewrite_json(data: Any, manifest: Mapping[str, Mapping[str, Any]]) -> Tuple[Any, int, int]:
+    """Rewrite every string that is a known `/images/...` or `/assets/...` URL."""
+    counts = [0, 0]
+
+    def walk(value: Any) -> Any:
+        if isinstance(value, dict):
+            return {key: walk(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [walk(item) for item in value]
+        if isinstance(value, str) and value.startswith(("/images/", "/assets/")):
+            target = hashed_url(value, manifest)
+            counts[0 if target is not None else 1] += 1
+            return target if target is not None else value
+        return value
+
+    return walk(data), counts[0], counts[1]
+
+
+def prune(static: Path, manifest: Mapping[str, Mapping[str, Any]]) -> int:
+    """Delete fingerprinted files the manifest no longer lists."""
+    keep = {unquote(entry["url"]).lstrip("/") for entry in manifest.values()}
+    removed = 0
+    for path in static.rglob("*"):
+        relative = path.relative_to(static.parent).as_posix()
+        if path.is_file() and path.name != "manifest.json" and relative not in keep:
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def publish(
+    public: Path = PUBLIC_DIR,
+    deploy: Path = DEPLOY_DIR,
+    cache_path: Path = CACHE_PATH,
+    workers: Optional[int] = None,
+    copy: bool = False,
+    pages: Iterable[str] = PAGES,
+    catalog: str = CATALOG,
+    remove_stale: bool = False,
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, int], List[RewriteStats]]:
+    """Hash, place and rewrite; returns the manifest, counters and per-file rewrite stats."""
+    with stage("scan"):
+        files = discover(public)
+    with stage("hash"):
+        hashes, read = hash_assets(public, files, load_cache(cache_path), workers)
+    write_atomic(cache_path, json.dumps({"version": CACHE_VERSION, "files": hashes}))
+    manifest = build_manifest(hashes)
+
+    static = deploy / STATIC_PREFIX
+    with stage("link"):
+        placed = sum(
+            link_or_copy(public / relative, static / fingerprint_name(relative, entry[2]), copy)
+            for relative, entry in hashes.items()
+        )
+    write_atomic(
+        static / "manifest.json",
+        json.dumps({"version": MANIFEST_VERSION, "assets": manifest}, indent=1, ensure_ascii=False) + "\n",
+    )
+
+    rewrites = []
+    with stage("rewrite"):
+        for page in pages:
+            if (public / page).exists():
+                html, rewritten, missing = rewrite_html(
+                    (public / page).read_text(encoding="utf-8"), manifest, f"/{page}"
+                )
+                write_atomic(deploy / page, html, mode_from=public / page)
+                rewrites.append(RewriteStats(deploy / page, rewritten, missing))
+        if (public / catalog).exists():
+            data, rewritten, missing = rewrite_json(
+                json.loads((public / catalog).read_text(encoding="utf-8-sig")), manifest
+            )
+            write_atomic(
+                deploy / catalog,
+                json.dumps(data, ensure_ascii=False, indent=2) + "\n",
+                mode_from=public / catalog,
+            )
+            rewrites.append(RewriteStats(deploy / catalog, rewritten, missing))
+
+    removed = prune(static, manifest) if remove_stale else 0
+    counts = {"files": len(files), "read": read, "placed": placed, "pruned": removed}
+    return manifest, counts, rewrites
+
+
+def format_report(counts: Mapping[str, int], rewrites: Sequence[RewriteStats], seconds: float) -> str:
+    lines = [
+        f"{stats.path}: {stats.rewritten} references rewritten"
+        + (f", {stats.missing} unknown" if stats.missing else "")
+        for stats in rewrites
+    ]
+    lines.append(
+        f"{counts['files']} assets ({counts['read']} hashed, {counts['files'] - counts['read']} cached), "
+        f"{counts['placed']} placed, {counts['pruned']} pruned in {seconds:.2f}s"
+    )
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--public", type=Path, default=PUBLIC_DIR)
+    parser.add_argument("--deploy", type=Path, default=DEPLOY_DIR, help="where the deploy copies go")
+    parser.add_argument("--cache", type=Path, default=CACHE_PATH)
+    parser.add_argument("--workers", type=int, default=None, help="hashing threads")
+    parser.add_argument("--copy", action="store_true", help="copy instead of hardlinking")
+    parser.add_argument(
+        "--prune", action="store_true", help="delete fingerprinted files no longer in the manifest"
+    )
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    start = time.perf_counter()
+    with profile_run(args, "asset_manifest"):
+        _, counts, rewrites = publish(
+            args.public,
+            args.deploy,
+            args.cache,
+            workers=args.workers,
+            copy=args.copy,
+            remove_stale=args.prune,
+        )
+    print(format_report(counts, rewrites, time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
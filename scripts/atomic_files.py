@@ -0,0 +1,78 @@
+"""
+Atomic file replacement shared by the asset scripts.
+
+Writers stage into a sibling temp file and `os.replace` it over the target,
+so the dev server or a concurrent build never sees a half-written file.
+`tempfile` creates those files 0600 (and directories 0700), which would
+make published pages and images unreadable to a web server running as
+another user. `publish` therefore gives the staged path the mode the
+target would normally have before swapping it in: that of `mode_from`,
+else that of the existing target, else the umask default for a new file.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import stat
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+
+def _read_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Read once at import: os.umask can only be read by setting it, which would
+# race with threads creating files.
+UMASK = _read_umask()
+
+
+def default_mode(directory: bool = False) -> int:
+    return (0o777 if directory else 0o666) & ~UMASK
+
+
+def publish(staged: Path, target: Path, mode_from: Optional[Path] = None) -> None:
+    """Give `staged` the mode `target` should have, then move it into place."""
+    source = mode_from if mode_from is not None else target
+    try:
+        os.chmod(staged, stat.S_IMODE(os.stat(source).st_mode))
+    except FileNotFoundError:
+        os.chmod(staged, default_mode(os.path.isdir(staged)))
+    os.replace(staged, target)
+
+
+@contextmanager
+def staged_file(path: Path, mode_from: Optional[Path] = None) -> Iterator[Path]:
+    """
+    A sibling temp path for writers that want a filename (Pillow, NumPy).
+    It replaces `path` when the block exits cleanly and is removed otherwise.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle, temp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    os.close(handle)
+    try:
+        yield Path(temp)
+        publish(Path(temp), path, mode_from)
+    except BaseException:
+        Path(temp).unlink(missing_ok=True)
+        raise
+
+
+def write_atomic(
+    path: Path, data: Union[str, bytes], mode_from: Optional[Path] = None
+) -> None:
+    """Replace `path` with `data`; text is written as UTF-8 without newline translation."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    with staged_file(path, mode_from) as temp:
+        temp.write_bytes(data)
+
+
+def copy_atomic(source: Path, target: Path) -> None:
+    """Copy `source` (contents, mode and times) over `target`."""
+    with staged_file(target, mode_from=source) as temp:
+        shutil.copy2(source, temp)
@@ -0,0 +1,273 @@
+"""
+Indexed, in-memory view of `public/data/products.json`.
+
+`load_catalog` parses the catalog once into compact `__slots__` `Product`
+records and builds secondary indexes, so generator scripts can ask for
+"active gluten-free products" or "product 42" without rescanning the list:
+
+    catalog = load_catalog()
+    catalog.get(42)                     # O(1)
+    catalog.in_category("gluten-free")  # O(k) in the number of matches
+
+The indexed catalog is pickled to `.cache/catalog.pickle` and reused while
+the source file's size and mtime are unchanged.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import pickle
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+from atomic_files import staged_file
+from profiling import add_profile_arguments, profile_run, stage
+
+CACHE_VERSION = 1
+ROOT = Path(__file__).resolve().parent.parent
+PRODUCTS_PATH = ROOT / "public" / "data" / "products.json"
+CACHE_PATH = ROOT / ".cache" / "catalog.pickle"
+
+ProductId = Union[int, str]
+
+# products.json key -> Product attribute
+_FIELDS = {
+    "id": "id",
+    "name": "name",
+    "nameAr": "name_ar",
+    "price": "price",
+    "category": "category",
+    "status": "status",
+    "image": "image",
+    "description": "description",
+    "descriptionAr": "description_ar",
+    "featured": "featured",
+    "bestSeller": "best_seller",
+    "inStock": "in_stock",
+    "tags": "tags",
+    "updatedAt": "updated_at",
+}
+
+
+class Product:
+    """One catalog entry; unknown keys are kept in `extra` for round-trips."""
+
+    __slots__ = (*_FIELDS.values(), "extra")
+
+    def __init__(
+        self,
+        id: ProductId,
+        name: str = "",
+        name_ar: str = "",
+        price: float = 0,
+        category: str = "",
+        status: str = "active",
+        image: str = "",
+        description: str = "",
+        description_ar: str = "",
+        featured: bool = False,
+        best_seller: bool = False,
+        in_stock: bool = True,
+        tags: Tuple[str, ...] = (),
+        updated_at: str = "",
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.id = id
+        self.name = name
+        self.name_ar = name_ar
+        self.price = price
+        self.category = category
+        self.status = status
+        self.image = image
+        self.description = description
+        self.description_ar = description_ar
+        self.featured = featured
+        self.best_seller = best_seller
+        self.in_stock = in_stock
+        self.tags = tags
+        self.updated_at = updated_at
+        self.extra = extra or {}
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "Product":
+        """Build from a products.json record; a missing status counts as active."""
+        values: Dict[str, Any] = {}
+        extra: Dict[str, Any] = {}
+        for key, value in data.items():
+            attribute = _FIELDS.get(key)
+            if attribute is None:
+                extra[key] = value
+            elif value is not None:
+                values[attribute] = value
+        tags = values.get("tags", ())
+        values["tags"] = tuple(tags) if isinstance(tags, (list, tuple)) else (str(tags),)
+        values["in_stock"] = values.get("in_stock") is not False
+        return cls(extra=extra, **values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {key: getattr(self, attribute) for key, attribute in _FIELDS.items()}
+        data["tags"] = list(self.tags)
+        data.update(self.extra)
+        return data
+
+    @property
+    def is_active(self) -> bool:
+        return self.status == "active"
+
+    def __getstate__(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state: Tuple[Any, ...]) -> None:
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+
+    def __repr__(self) -> str:
+        return f"Product(id={self.id!r}, name={self.name!r})"
+
+
+class Catalog:
+    """
+    Products plus secondary indexes.
+
+    Indexes hold positions into `products`, so every query is a dict lookup
+    followed by one pass over the matches. Results keep catalog order.
+    """
+
+    __slots__ = (
+        "products",
+        "by_id",
+        "by_category",
+        "by_tag",
+        "by_status",
+        "by_stock",
+        "featured_ids",
+        "best_seller_ids",
+    )
+
+    def __init__(self, products: Iterable[Product]) -> None:
+        self.products: Tuple[Product, ...] = tuple(products)
+        self.by_id: Dict[str, int] = {}
+        self.by_category: Dict[str, List[int]] = {}
+        self.by_tag: Dict[str, List[int]] = {}
+        self.by_status: Dict[str, List[int]] = {}
+        self.by_stock: Dict[bool, List[int]] = {True: [], False: []}
+        self.featured_ids: List[int] = []
+        self.best_seller_ids: List[int] = []
+        for position, product in enumerate(self.products):
+            self.by_id.setdefault(str(product.id), position)
+            self.by_category.setdefault(product.category, []).append(position)
+            for tag in product.tags:
+                self.by_tag.setdefault(tag.lower(), []).append(position)
+            self.by_status.setdefault(product.status, []).append(position)
+            self.by_stock[product.in_stock].append(position)
+            if product.featured:
+                self.featured_ids.append(position)
+            if product.best_seller:
+                self.best_seller_ids.append(position)
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def __iter__(self) -> Iterator[Product]:
+        return iter(self.products)
+
+    def _select(self, positions: Sequence[int]) -> List[Product]:
+        return [self.products[position] for position in positions]
+
+    def get(self, product_id: ProductId) -> Optional[Product]:
+        """Product by id (`42` and `"42"` are the same); first one wins on duplicates."""
+        position = self.by_id.get(str(product_id))
+        return None if position is None else self.products[position]
+
+    def categories(self) -> List[str]:
+        return list(self.by_category)
+
+    def in_category(self, category: str) -> List[Product]:
+        return self._select(self.by_category.get(category, ()))
+
+    def with_tag(self, tag: str) -> List[Product]:
+        return self._select(self.by_tag.get(tag.lower(), ()))
+
+    def with_status(self, status: str) -> List[Product]:
+        return self._select(self.by_status.get(status, ()))
+
+    def active(self) -> List[Product]:
+        return self.with_status("active")
+
+    def in_stock(self, in_stock: bool = True) -> List[Product]:
+        return self._select(self.by_stock[in_stock])
+
+    def featured(self) -> List[Product]:
+        return self._select(self.featured_ids)
+
+    def best_sellers(self) -> List[Product]:
+        return self._select(self.best_seller_ids)
+
+    def __getstate__(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state: Tuple[Any, ...]) -> None:
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+
+
+def parse_catalog(path: Path = PRODUCTS_PATH) -> Catalog:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if isinstance(data, dict):  # API-style {"data": [...]} payloads
+        data = data.get("data", [])
+    return Catalog(Product.from_dict(record) for record in data)
+
+
+def _source_key(path: Path) -> Tuple[str, int, int]:
+    stat = path.stat()
+    return str(path.resolve()), stat.st_size, stat.st_mtime_ns
+
+
+def load_catalog(
+    path: Path = PRODUCTS_PATH, cache_path: Optional[Path] = CACHE_PATH
+) -> Catalog:
+    """
+    Load the catalog, reusing the pickle at `cache_path` while `path` keeps
+    the same size and mtime. Pass `cache_path=None` to always parse.
+    """
+    if cache_path is None:
+        return parse_catalog(path)
+    key = (CACHE_VERSION, *_source_key(path))
+    try:
+        with cache_path.open("rb") as handle:
+            cached_key, catalog = pickle.load(handle)
+        if cached_key == key:
+            return catalog
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError, TypeError):
+        pass  # missing, stale or written by an older layout
+    catalog = parse_catalog(path)
+    with staged_file(cache_path) as temp, temp.open("wb") as stream:
+        pickle.dump((key, catalog), stream, protocol=pickle.HIGHEST_PROTOCOL)
+    return catalog
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=Path, default=PRODUCTS_PATH)
+    parser.add_argument("--cache", type=Path, default=CACHE_PATH)
+    parser.add_argument("--no-cache", action="store_true")
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    start = time.perf_counter()
+    with profile_run(args, "catalog"), stage("load", bytes_in=args.products.stat().st_size):
+        catalog = load_catalog(args.products, None if args.no_cache else args.cache)
+    elapsed = time.perf_counter() - start
+    print(f"{len(catalog)} products loaded in {elapsed * 1000:.1f}ms")
+    print(f"  active {len(catalog.active())}, in stock {len(catalog.in_stock())}")
+    print(f"  featured {len(catalog.featured())}, best sellers {len(catalog.best_sellers())}")
+    for category in catalog.categories():
+        print(f"  {category:<16}{len(catalog.in_category(category)):5d}")
+
+
+if __name__ == "__main__":
+    main()
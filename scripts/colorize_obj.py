@@ -4,12 +4,73 @@ Utility to inject planar UV mapping and textured materials into OBJ files.
 The script normalizes vertex coordinates on the XZ plane to generate UVs that
 project the original reference image onto the mesh. It also writes a companion
 MTL file so the OBJ keeps a link to the texture.
+
+Both rewrite modes share the same generator stages (`iter_sections`,
+`iter_batches`, `iter_rewritten`). The default mode loads the whole file in
+memory; the streaming mode makes two passes over the file (bounds, then
+rewrite) and writes through a temp file so memory stays flat for very large
+meshes. Either mode can swap the per-line UV/face stages for NumPy versions
+that parse and format whole batches at once with byte-identical output.
+
+With `cache=True` the mesh is also written to a `.meshcache` sidecar directory
+of `.npy` arrays (float32 positions/UVs, uint32 indices) keyed by the OBJ
+hash; later runs skip an already rewritten OBJ and `load_mesh_cache` maps the
+arrays zero-copy instead of parsing text.
+
+Many meshes can be rewritten at once from a JSON/TOML manifest or a glob;
+`rewrite_batch` fans them out over a process pool and isolates failures.
+With `optimize`, the rewritten mesh is welded, stripped of unused vertices
+and cache-ordered by `mesh_optimize.optimize_obj`. With `lod` ratios, each
+rewritten mesh also gets decimated level-of-detail variants and a manifest
+from `mesh_lod.build_lods`. With `glb`, each mesh is also exported as a
+single binary glTF file (optionally quantized, texture embedded or
+referenced) by `mesh_gltf.export_glb`.
 """
 from __future__ import annotations
 
+import argparse
+import glob
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import time
+import tomllib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Sequence
+from typing import IO, TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+from atomic_files import publish
+from profiling import add_profile_arguments, profile_run, record, stage
+
+if TYPE_CHECKING:
+    from mesh_gltf import GlbOptions
+    from mesh_optimize import OptimizeReport
+
+HEADER = "header"
+VERTEX = "vertex"
+FACE = "face"
+TAIL = "tail"
+BATCH_SIZE = 65536
+CACHE_SUFFIX = ".meshcache"
+CACHE_ARRAYS = {
+    "positions": np.float32,
+    "uvs": np.float32,
+    "indices": np.uint32,
+    "face_sizes": np.uint32,
+}
+
+# Bytes `str.split()` treats as whitespace, and the literals appended after a
+# face batch for `_face_gather_index` (offsets +0..+3).
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[list(b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f")] = True
+_FACE_LITERALS = b" /\nf"
+_SLASH = ord("/")
 
 
 @dataclass
@@ -18,115 +79,412 @@ class ObjConfig:
     material_name: str
 
 
-def read_sections(lines: Sequence[str]) -> tuple[List[str], List[str], List[str]]:
+@dataclass(frozen=True)
+class PlanarBounds:
+    """XZ bounding box used to normalise vertices into UV space."""
+
+    xmin: float
+    zmin: float
+    x_range: float
+    z_range: float
+
+
+@dataclass
+class RewriteResult:
+    path: Path
+    seconds: float
+    error: Optional[str] = None
+    detail: Optional[str] = None
+
+
+@dataclass
+class MeshArrays:
+    """Mesh data as stored in the `.meshcache` sidecar."""
+
+    positions: np.ndarray  # (N, 3) float32
+    uvs: np.ndarray  # (N, 2) float32
+    indices: np.ndarray  # flat uint32, zero-based; `face_sizes` corners per face
+    face_sizes: np.ndarray  # (M,) uint32
+
+
+class LineSpool:
+    """Append-only line buffer backed by a temp file instead of a list."""
+
+    def __init__(self) -> None:
+        self._handle: IO[str] = tempfile.TemporaryFile("w+")
+
+    def append(self, line: str) -> None:
+        self._handle.write(line)
+
+    def __iter__(self) -> Iterator[str]:
+        self._handle.flush()
+        self._handle.seek(0)
+        return iter(self._handle)
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+def iter_sections(lines: Iterable[str]) -> Iterator[tuple[str, str]]:
     """
-    Split the OBJ into three sections:
+    Tag each OBJ line with the section it belongs to:
     - header (before the first vertex)
     - vertex block (all consecutive `v ` lines)
     - tail (everything after the vertex block)
     """
-    header: List[str] = []
-    vertices: List[str] = []
-    tail: List[str] = []
+    section = HEADER
+    for line in lines:
+        if section == HEADER:
+            if line.startswith("v "):
+                section = VERTEX
+        elif section == VERTEX:
+            if not line.startswith("v "):
+                section = TAIL
+        yield section, line
 
-    it = iter(enumerate(lines))
-    index = 0
-    for index, line in it:
-        if line.startswith("v "):
-            break
-        header.append(line)
-    else:
-        # No vertex data -- return the original line grouping.
-        return header, vertices, tail
-
-    # We already consumed the first vertex line in the previous loop.
-    vertices.append(lines[index])
-
-    line_count = len(lines)
-    for index in range(index + 1, line_count):
-        line = lines[index]
-        if not line.startswith("v "):
-            tail = list(lines[index:])
-            break
-        vertices.append(line)
+
+def iter_batches(
+    lines: Iterable[str], batch_size: int = BATCH_SIZE
+) -> Iterator[tuple[str, List[str]]]:
+    """
+    Group consecutive lines of the same kind into batches of `batch_size`.
+
+    Kinds are the sections from `iter_sections`, with `f` records in the tail
+    split out as FACE so they can be rewritten a batch at a time.
+    """
+    # Same state machine as `iter_sections`, inlined: this loop runs once per
+    # line and dominates the vectorized mode otherwise.
+    section = HEADER
+    kind: Optional[str] = None
+    batch: List[str] = []
+    for line in lines:
+        if section == HEADER or section == VERTEX:
+            if line.startswith("v "):
+                section = VERTEX
+            elif section == VERTEX:
+                section = TAIL
+        if section == VERTEX or section == HEADER:
+            line_kind = section
+        else:
+            line_kind = FACE if line.startswith("f ") else TAIL
+        if line_kind is not kind or len(batch) >= batch_size:
+            if batch:
+                yield kind, batch  # type: ignore[misc]
+            kind, batch = line_kind, []
+        batch.append(line)
+    if batch:
+        yield kind, batch  # type: ignore[misc]
+
+
+def _chunked(lines: Iterable[str], size: int) -> Iterator[List[str]]:
+    it = iter(lines)
+    while chunk := list(itertools.islice(it, size)):
+        yield chunk
+
+
+def iter_vertex_block(lines: Iterable[str]) -> Iterator[str]:
+    """Yield the vertex block and stop reading once the tail starts."""
+    for section, line in iter_sections(lines):
+        if section == TAIL:
+            return
+        if section == VERTEX:
+            yield line
+
+
+def read_sections(lines: Sequence[str]) -> tuple[List[str], List[str], List[str]]:
+    """Split the OBJ into header, vertex block and tail lists."""
+    grouped: dict[str, List[str]] = {HEADER: [], VERTEX: [], TAIL: []}
+    for section, line in iter_sections(lines):
+        grouped[section].append(line)
+    return grouped[HEADER], grouped[VERTEX], grouped[TAIL]
+
+
+def parse_vertex(line: str) -> tuple[float, float, float]:
+    """Return the (x, y, z) coordinates of a `v` record."""
+    try:
+        _, x_str, y_str, z_str = line.strip().split()
+    except ValueError as exc:  # defensive
+        raise ValueError(f"Unexpected vertex format: {line!r}") from exc
+    return float(x_str), float(y_str), float(z_str)
+
+
+def parse_vertex_block(vertex_lines: Sequence[str]) -> np.ndarray:
+    """Bulk-parse `v` records into an `(N, 3)` float64 array."""
+    try:
+        positions = np.loadtxt(
+            [line[2:] for line in vertex_lines], comments=None, ndmin=2
+        )
+    except ValueError:
+        positions = None
+    if positions is None or positions.shape != (len(vertex_lines), 3):
+        # Let the per-line parser raise the precise error for the bad record.
+        positions = np.array([parse_vertex(line) for line in vertex_lines], dtype=np.float64)
+    return positions.reshape(-1, 3)
+
+
+def vertex_bounds(vertex_lines: Iterable[str], vectorized: bool = False) -> PlanarBounds:
+    """Compute the XZ bounding box in a single pass with constant memory."""
+    xmin = zmin = float("inf")
+    xmax = zmax = float("-inf")
+    count = 0
+    if vectorized:
+        for chunk in _chunked(vertex_lines, BATCH_SIZE):
+            positions = parse_vertex_block(chunk)
+            xmin = min(xmin, float(positions[:, 0].min()))
+            xmax = max(xmax, float(positions[:, 0].max()))
+            zmin = min(zmin, float(positions[:, 2].min()))
+            zmax = max(zmax, float(positions[:, 2].max()))
+            count += len(chunk)
     else:
-        tail = []
+        for line in vertex_lines:
+            x, _, z = parse_vertex(line)
+            xmin = min(xmin, x)
+            xmax = max(xmax, x)
+            zmin = min(zmin, z)
+            zmax = max(zmax, z)
+            count += 1
+    if not count:
+        raise ValueError("No vertices to project")
+    return PlanarBounds(
+        xmin=xmin,
+        zmin=zmin,
+        x_range=xmax - xmin or 1.0,
+        z_range=zmax - zmin or 1.0,
+    )
 
-    return header, vertices, tail
+
+def format_uv(line: str, bounds: PlanarBounds) -> str:
+    """Project a single `v` record onto the XZ plane as a `vt` record."""
+    x, _, z = parse_vertex(line)
+    u = (x - bounds.xmin) / bounds.x_range
+    v = 1.0 - ((z - bounds.zmin) / bounds.z_range)
+    return f"vt {u:.6f} {v:.6f}\n"
+
+
+def iter_uvs(vertex_lines: Iterable[str], bounds: PlanarBounds) -> Iterator[str]:
+    """Yield `vt` records for each vertex line."""
+    for line in vertex_lines:
+        yield format_uv(line, bounds)
 
 
 def generate_uvs(vertex_lines: Iterable[str]) -> List[str]:
     """Create `vt` records by projecting vertices onto the XZ plane."""
-    xs: List[float] = []
-    zs: List[float] = []
-    verts: List[tuple[float, float, float]] = []
+    vertex_lines = list(vertex_lines)
+    return list(iter_uvs(vertex_lines, vertex_bounds(vertex_lines)))
 
-    for line in vertex_lines:
-        try:
-            _, x_str, y_str, z_str = line.strip().split()
-        except ValueError as exc:  # defensive
-            raise ValueError(f"Unexpected vertex format: {line!r}") from exc
-        x = float(x_str)
-        z = float(z_str)
-        xs.append(x)
-        zs.append(z)
-        verts.append((x, float(y_str), z))
-
-    xmin, xmax = min(xs), max(xs)
-    zmin, zmax = min(zs), max(zs)
-    x_range = xmax - xmin or 1.0
-    z_range = zmax - zmin or 1.0
-
-    vt_lines: List[str] = []
-    for x, _, z in verts:
-        u = (x - xmin) / x_range
-        v = 1.0 - ((z - zmin) / z_range)
-        vt_lines.append(f"vt {u:.6f} {v:.6f}\n")
-    return vt_lines
-
-
-def rewrite_obj(path: Path, config: ObjConfig) -> None:
-    original_lines = path.read_text().splitlines(keepends=True)
-    header, vertex_block, tail = read_sections(original_lines)
-
-    if not vertex_block:
-        raise ValueError(f"No vertices found in {path}")
 
-    mtllib_name = path.with_suffix(".mtl").name
-    vt_lines = generate_uvs(vertex_block)
+def planar_uvs(positions: np.ndarray, bounds: PlanarBounds) -> np.ndarray:
+    """Vectorised counterpart of `format_uv`: return an `(N, 2)` UV array."""
+    uvs = np.empty((positions.shape[0], 2), dtype=np.float64)
+    uvs[:, 0] = (positions[:, 0] - bounds.xmin) / bounds.x_range
+    uvs[:, 1] = 1.0 - ((positions[:, 2] - bounds.zmin) / bounds.z_range)
+    return uvs
+
+
+def format_uvs(uvs: np.ndarray) -> str:
+    """Format a UV array as `vt` records in one batched `%` operation."""
+    return ("vt %.6f %.6f\n" * uvs.shape[0]) % tuple(uvs.ravel().tolist())
+
+
+def format_uv_block(vertex_lines: Sequence[str], bounds: PlanarBounds) -> str:
+    return format_uvs(planar_uvs(parse_vertex_block(vertex_lines), bounds))
+
+
+def rewrite_face(line: str) -> str:
+    """Rewrite an `f` record so every corner references `v/vt` by the same index."""
+    face_tokens: List[str] = []
+    for part in line.strip().split()[1:]:
+        vertex_index = part.split("/")[0] if "/" in part else part
+        face_tokens.append(f"{vertex_index}/{vertex_index}")
+    return "f " + " ".join(face_tokens) + "\n"
+
+
+def _face_tokens(
+    buf: np.ndarray, line_lengths: np.ndarray
+) -> Optional[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Locate the whitespace-delimited tokens of a face batch.
+
+    Returns `(starts, prefix_lengths, is_f)`: the byte offset of each token,
+    the length of its vertex-index prefix (up to the first `/`) and whether
+    it is the leading `f`. Returns None when a face has no corners.
+    """
+    size = buf.size
+    ws = _WHITESPACE[buf]
+    prev_ws = np.concatenate(([True], ws[:-1]))
+    next_ws = np.concatenate((ws[1:], [True]))
+    starts = np.flatnonzero(~ws & prev_ws)
+    ends = np.flatnonzero(~ws & next_ws) + 1
+
+    # Every line starts with "f ", so the `f` tokens are the ones sitting on a
+    # line start; a face without corners shows up as two `f` tokens in a row.
+    line_start = np.zeros(size, dtype=bool)
+    line_start[np.cumsum(line_lengths) - line_lengths] = True
+    is_f = line_start[starts]
+    if is_f[-1] or (is_f[1:] & is_f[:-1]).any():
+        return None
+
+    slashes = np.append(np.flatnonzero(buf == _SLASH), size)
+    prefix = np.minimum(slashes[np.searchsorted(slashes, starts)], ends) - starts
+    return starts, prefix, is_f
+
+
+def _face_gather_index(data: bytes, line_lengths: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Map every output byte of a rewritten face batch to a byte of `data`.
+
+    Each corner token is cut at its first `/` and that prefix is gathered
+    twice around a `/`, so indices are copied verbatim. Returns None for
+    batches the per-line path should handle (a face without corners).
+    """
+    size = len(data)
+    tokens = _face_tokens(np.frombuffer(data, dtype=np.uint8), line_lengths)
+    if tokens is None:
+        return None
+    starts, prefix, is_f = tokens
+
+    # Four segments per token, as (source offset, length). An `f` token emits
+    # "\nf" (no newline before the first line); a corner emits
+    # " <prefix>/<prefix>". Literal bytes live just past the end of `data`.
+    space, slash, newline, f_byte = size, size + 1, size + 2, size + 3
+    seg_src = np.empty((starts.size + 1, 4), dtype=np.int64)
+    seg_len = np.empty_like(seg_src)
+    seg_src[:-1, 0] = np.where(is_f, newline, space)
+    seg_src[:-1, 1] = np.where(is_f, f_byte, starts)
+    seg_src[:-1, 2] = slash
+    seg_src[:-1, 3] = starts
+    seg_len[:-1, 0] = 1
+    seg_len[0, 0] = 0
+    seg_len[:-1, 1] = np.where(is_f, 1, prefix)
+    seg_len[:-1, 2] = ~is_f
+    seg_len[:-1, 3] = np.where(is_f, 0, prefix)
+    seg_src[-1] = newline
+    seg_len[-1] = (1, 0, 0, 0)
+
+    seg_src, seg_len = seg_src.ravel(), seg_len.ravel()
+    seg_out = np.cumsum(seg_len) - seg_len
+    return np.repeat(seg_src - seg_out, seg_len) + np.arange(int(seg_len.sum()))
+
+
+def parse_face_block(face_lines: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Parse `f` records into a flat int64 array of (1-based, possibly negative)
+    vertex indices plus the number of corners of each face.
+    """
+    try:
+        data = "".join(face_lines).encode("ascii")
+    except UnicodeEncodeError as exc:
+        raise ValueError("Unexpected face format: non-ASCII data") from exc
+    buf = np.frombuffer(data, dtype=np.uint8)
+    line_lengths = np.fromiter(map(len, face_lines), dtype=np.int64, count=len(face_lines))
+    tokens = _face_tokens(buf, line_lengths)
+    if tokens is None:
+        raise ValueError("Unexpected face format: face without corners")
+    starts, prefix, is_f = tokens
+    face_sizes = np.diff(np.flatnonzero(np.append(is_f, True))) - 1
+    starts, prefix = starts[~is_f], prefix[~is_f]
+
+    # Decode the decimal prefixes column by column: (corners, widest) digits.
+    width = int(prefix.max())
+    if prefix.min() < 1 or width > 18:
+        raise ValueError("Unexpected face format: bad vertex index")
+    column = np.arange(width)
+    chars = buf[np.minimum(starts[:, None] + column, buf.size - 1)]
+    negative = chars[:, 0] == ord("-")
+    digit_mask = (column < prefix[:, None]) & ~((column == 0) & negative[:, None])
+    digits = chars.astype(np.int64) - ord("0")
+    if ((digits < 0) | (digits > 9))[digit_mask].any() or (negative & (prefix < 2)).any():
+        raise ValueError("Unexpected face format: bad vertex index")
+    powers = 10 ** np.maximum(prefix[:, None] - 1 - column, 0)
+    values = np.where(digit_mask, digits * powers, 0).sum(axis=1)
+    return np.where(negative, -values, values), face_sizes
+
+
+def rewrite_face_block(face_lines: Sequence[str]) -> str:
+    """Vectorised counterpart of `rewrite_face` for a batch of `f` records."""
+    try:
+        data = "".join(face_lines).encode("ascii")
+    except UnicodeEncodeError:
+        return _rewrite_faces_per_line(face_lines)
+    line_lengths = np.fromiter(map(len, face_lines), dtype=np.int64, count=len(face_lines))
+    index = _face_gather_index(data, line_lengths)
+    if index is None:
+        return _rewrite_faces_per_line(face_lines)
+    source = np.frombuffer(data + _FACE_LITERALS, dtype=np.uint8)
+    return source[index].tobytes().decode("ascii")
+
+
+def _format_uvs_per_line(vertex_lines: Sequence[str], bounds: PlanarBounds) -> str:
+    return "".join(iter_uvs(vertex_lines, bounds))
+
+
+def _rewrite_faces_per_line(face_lines: Sequence[str]) -> str:
+    return "".join(map(rewrite_face, face_lines))
 
-    cleaned_header = [line for line in header if not line.startswith("mtllib ")]
-    rewritten: List[str] = []
-    rewritten.extend(cleaned_header)
-    rewritten.append(f"mtllib {mtllib_name}\n")
 
-    rewritten.extend(vertex_block)
-    rewritten.extend(vt_lines)
+def iter_rewritten(
+    lines: Iterable[str],
+    bounds: PlanarBounds,
+    mtllib_name: str,
+    material_name: str,
+    vt_buffer: Optional[Union[List[str], LineSpool]] = None,
+    vectorized: bool = False,
+    mesh_sink: Optional[MeshCacheWriter] = None,
+) -> Iterator[str]:
+    """
+    Yield the rewritten OBJ in batch-sized chunks.
 
+    `vt` records are collected into `vt_buffer` while the vertex block streams
+    past and are emitted once it ends. Any object with `append` and iteration
+    works, so callers can hand in a `LineSpool` to keep them off the heap.
+    Vertex and face batches are also handed to `mesh_sink` when given.
+    """
+    if vt_buffer is None:
+        vt_buffer = []
+    if vectorized:
+        uv_stage, face_stage = format_uv_block, rewrite_face_block
+    else:
+        uv_stage, face_stage = _format_uvs_per_line, _rewrite_faces_per_line
+    mtllib_written = False
+    uvs_written = False
     material_inserted = False
-    for line in tail:
-        if line.startswith("vt "):
+
+    for kind, batch in iter_batches(lines):
+        if kind == HEADER:
+            yield from (line for line in batch if not line.startswith("mtllib "))
             continue
-        if line.startswith("usemtl "):
+        if kind == VERTEX:
+            if not mtllib_written:
+                yield f"mtllib {mtllib_name}\n"
+                mtllib_written = True
+            vt_buffer.append(uv_stage(batch, bounds))
+            if mesh_sink is not None:
+                mesh_sink.add_vertices(batch, bounds)
+            yield "".join(batch)
             continue
-        if line.startswith("f "):
+
+        if not uvs_written:
+            yield from vt_buffer
+            uvs_written = True
+        if kind == FACE:
             if not material_inserted:
-                rewritten.append(f"usemtl {config.material_name}\n")
+                yield f"usemtl {material_name}\n"
                 material_inserted = True
-            parts = line.strip().split()[1:]
-            face_tokens: List[str] = []
-            for part in parts:
-                vertex_index = part.split("/")[0] if "/" in part else part
-                face_tokens.append(f"{vertex_index}/{vertex_index}")
-            rewritten.append("f " + " ".join(face_tokens) + "\n")
+            if mesh_sink is not None:
+                mesh_sink.add_faces(batch)
+            yield face_stage(batch)
         else:
-            rewritten.append(line)
+            yield from (
+                line for line in batch if not line.startswith(("vt ", "usemtl "))
+            )
 
+    if not uvs_written:
+        yield from vt_buffer
     if not material_inserted:
-        rewritten.append(f"usemtl {config.material_name}\n")
+        yield f"usemtl {material_name}\n"
 
-    path.write_text("".join(rewritten))
 
+def write_mtl(path: Path, config: ObjConfig) -> None:
     mtl_contents = (
         f"newmtl {config.material_name}\n"
         "Ka 1.000000 1.000000 1.000000\n"
@@ -139,9 +497,452 @@ def rewrite_obj(path: Path, config: ObjConfig) -> None:
     path.with_suffix(".mtl").write_text(mtl_contents)
 
 
-def main() -> None:
+def mesh_cache_dir(path: Path) -> Path:
+    return path.with_suffix(CACHE_SUFFIX)
+
+
+def file_digest(path: Path) -> str:
+    with path.open("rb") as handle:
+        return hashlib.file_digest(handle, "sha256").hexdigest()
+
+
+class MeshCacheWriter:
+    """
+    Collect mesh arrays batch by batch into raw staging files, then publish
+    them as `.npy` files in the sidecar directory. Memory stays bounded by
+    the batch size, so it also works alongside the streaming mode.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.vertex_count = 0
+        self.face_count = 0
+        self.index_count = 0
+        self._staging = Path(
+            tempfile.mkdtemp(dir=directory.parent, prefix=f".{directory.name}.")
+        )
+        self._handles = {
+            name: (self._staging / f"{name}.raw").open("wb") for name in CACHE_ARRAYS
+        }
+
+    def add_vertices(self, vertex_lines: Sequence[str], bounds: PlanarBounds) -> None:
+        positions = parse_vertex_block(vertex_lines)
+        positions.astype(np.float32).tofile(self._handles["positions"])
+        planar_uvs(positions, bounds).astype(np.float32).tofile(self._handles["uvs"])
+        self.vertex_count += positions.shape[0]
+
+    def add_faces(self, face_lines: Sequence[str]) -> None:
+        indices, face_sizes = parse_face_block(face_lines)
+        indices = np.where(indices < 0, self.vertex_count + indices, indices - 1)
+        if indices.size and (indices.min() < 0 or indices.max() >= self.vertex_count):
+            raise ValueError("Mesh cache faces must reference the leading vertex block")
+        indices.astype(np.uint32).tofile(self._handles["indices"])
+        face_sizes.astype(np.uint32).tofile(self._handles["face_sizes"])
+        self.index_count += indices.size
+        self.face_count += face_sizes.size
+
+    def commit(self, meta: Dict[str, Any]) -> None:
+        shapes = {
+            "positions": (self.vertex_count, 3),
+            "uvs": (self.vertex_count, 2),
+            "indices": (self.index_count,),
+            "face_sizes": (self.face_count,),
+        }
+        for name, dtype in CACHE_ARRAYS.items():
+            self._handles[name].close()
+            raw_path = self._staging / f"{name}.raw"
+            array = np.lib.format.open_memmap(
+                self._staging / f"{name}.npy", mode="w+", dtype=dtype, shape=shapes[name]
+            )
+            if array.size:
+                array[...] = np.memmap(raw_path, dtype=dtype, mode="r", shape=shapes[name])
+            array.flush()
+            del array
+            raw_path.unlink()
+        meta = {**meta, "vertices": self.vertex_count, "faces": self.face_count}
+        (self._staging / "meta.json").write_text(json.dumps(meta, indent=2) + "\n")
+        shutil.rmtree(self.directory, ignore_errors=True)
+        publish(self._staging, self.directory)  # mkdtemp directories are 0700
+
+    def abort(self) -> None:
+        for handle in self._handles.values():
+            handle.close()
+        shutil.rmtree(self._staging, ignore_errors=True)
+
+
+def read_cache_meta(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads((mesh_cache_dir(path) / "meta.json").read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _is_cached_output(path: Path, meta: Dict[str, Any]) -> bool:
+    """True when `path` is still the OBJ the cache was written alongside."""
+    stat = path.stat()
+    if (stat.st_size, stat.st_mtime_ns) == (meta.get("obj_size"), meta.get("obj_mtime_ns")):
+        return True
+    return file_digest(path) == meta.get("obj_sha256")
+
+
+def load_mesh_cache(path: Path, material_name: Optional[str] = None) -> Optional[MeshArrays]:
+    """
+    Memory-map the cached arrays for `path`, or return None when there is no
+    cache or it no longer matches the OBJ (by stat, then by content hash;
+    both the rewritten OBJ and its original source are accepted).
+    """
+    meta = read_cache_meta(path)
+    if meta is None or not path.exists():
+        return None
+    if material_name is not None and meta.get("material_name") != material_name:
+        return None
+    if not _is_cached_output(path, meta) and file_digest(path) != meta.get("source_sha256"):
+        return None
+    directory = mesh_cache_dir(path)
+    try:
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in CACHE_ARRAYS
+        }
+    except (OSError, ValueError):
+        return None
+    return MeshArrays(**arrays)
+
+
+def _rewrite_in_memory(
+    path: Path,
+    config: ObjConfig,
+    vectorized: bool,
+    mesh_sink: Optional[MeshCacheWriter] = None,
+) -> None:
+    with stage("read", bytes_in=path.stat().st_size):
+        text = path.read_text()
+        original_lines = text.splitlines(keepends=True)
+    with stage("bounds"):
+        vertex_block = list(iter_vertex_block(original_lines))
+        if not vertex_block:
+            raise ValueError(f"No vertices found in {path}")
+        bounds = vertex_bounds(vertex_block, vectorized)
+
+    mtllib_name = path.with_suffix(".mtl").name
+    with stage("rewrite"):
+        output = "".join(
+            iter_rewritten(
+                original_lines,
+                bounds,
+                mtllib_name,
+                config.material_name,
+                vectorized=vectorized,
+                mesh_sink=mesh_sink,
+            )
+        )
+    with stage("write") as write:
+        path.write_text(output)
+        write.bytes_out = path.stat().st_size
+
+
+def _rewrite_streaming(
+    path: Path,
+    config: ObjConfig,
+    vectorized: bool,
+    mesh_sink: Optional[MeshCacheWriter] = None,
+) -> None:
+    # Pass 1: bounding box only, stopping as soon as the vertex block ends.
+    with stage("bounds"), path.open() as source:
+        vertices = iter_vertex_block(source)
+        first = next(vertices, None)
+        if first is None:
+            raise ValueError(f"No vertices found in {path}")
+        bounds = vertex_bounds(itertools.chain([first], vertices), vectorized)
+
+    # Pass 2: stream the rewrite into a sibling temp file, then swap it in.
+    mtllib_name = path.with_suffix(".mtl").name
+    spool = LineSpool()
+    handle = tempfile.NamedTemporaryFile(
+        "w", dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False
+    )
+    try:
+        with stage("rewrite", bytes_in=path.stat().st_size) as rewrite, handle, path.open() as source:
+            handle.writelines(
+                iter_rewritten(
+                    source,
+                    bounds,
+                    mtllib_name,
+                    config.material_name,
+                    spool,
+                    vectorized=vectorized,
+                    mesh_sink=mesh_sink,
+                )
+            )
+        rewrite.bytes_out = os.path.getsize(handle.name)
+        shutil.copymode(path, handle.name)
+        os.replace(handle.name, path)
+    except BaseException:
+        Path(handle.name).unlink(missing_ok=True)
+        raise
+    finally:
+        spool.close()
+
+
+def rewrite_obj(
+    path: Path,
+    config: ObjConfig,
+    *,
+    streaming: bool = False,
+    vectorized: bool = False,
+    cache: bool = False,
+    optimize: bool = False,
+) -> Optional[OptimizeReport]:
+    """
+    Add planar UVs and a material to `path` and write its MTL file.
+
+    With `cache`, an OBJ that still matches its `.meshcache` sidecar, and was
+    written with the same `optimize` setting and weld epsilon, is left
+    untouched; otherwise the sidecar is rebuilt alongside the rewrite. With
+    `optimize`, the rewritten mesh is welded and cache-ordered (the sidecar
+    then holds the optimized mesh) and the optimization report is returned.
+    """
+    rewrite = _rewrite_streaming if streaming else _rewrite_in_memory
+    weld_epsilon = None
+    if optimize:
+        from mesh_optimize import WELD_EPSILON, optimize_obj  # mesh_optimize imports this module
+
+        weld_epsilon = WELD_EPSILON
+    if not cache:
+        rewrite(path, config, vectorized)
+        report = optimize_obj(path) if optimize else None
+        write_mtl(path, config)
+        return report
+
+    with stage("cache check"):
+        meta = read_cache_meta(path)
+        fresh = (
+            meta is not None
+            and meta.get("material_name") == config.material_name
+            and meta.get("optimized", False) == optimize
+            and meta.get("weld_epsilon") == weld_epsilon
+            and _is_cached_output(path, meta)
+        )
+    if fresh:
+        write_mtl(path, config)
+        return None
+
+    source_sha256 = file_digest(path)
+    writer = MeshCacheWriter(mesh_cache_dir(path))
+    report = None
+    try:
+        if optimize:
+            rewrite(path, config, vectorized)
+            report = optimize_obj(path)
+            with stage("cache fill"), path.open() as optimized:
+                for kind, batch in iter_batches(optimized):
+                    if kind == VERTEX:
+                        writer.add_vertices(batch, report.bounds)
+                    elif kind == FACE:
+                        writer.add_faces(batch)
+        else:
+            rewrite(path, config, vectorized, writer)
+        stat = path.stat()
+        with stage("cache commit"):
+            writer.commit(
+                {
+                    "source_sha256": source_sha256,
+                    "obj_sha256": file_digest(path),
+                    "obj_size": stat.st_size,
+                    "obj_mtime_ns": stat.st_mtime_ns,
+                    "material_name": config.material_name,
+                    "optimized": optimize,
+                    "weld_epsilon": weld_epsilon,
+                }
+            )
+    except BaseException:
+        writer.abort()
+        raise
+    write_mtl(path, config)
+    return report
+
+
+def load_manifest(manifest: Path) -> Dict[Path, ObjConfig]:
+    """
+    Read `[[meshes]]` entries (`path`, `texture_path`, `material_name`) from a
+    JSON or TOML manifest. Mesh paths are relative to the manifest.
+    """
+    if manifest.suffix == ".toml":
+        data = tomllib.loads(manifest.read_text())
+    else:
+        data = json.loads(manifest.read_text())
+    configs: Dict[Path, ObjConfig] = {}
+    for entry in data.get("meshes", []):
+        try:
+            configs[manifest.parent / entry["path"]] = ObjConfig(
+                texture_path=entry["texture_path"],
+                material_name=entry["material_name"],
+            )
+        except KeyError as exc:
+            raise ValueError(f"Manifest entry {entry!r} is missing {exc}") from exc
+    return configs
+
+
+def configs_from_glob(
+    pattern: str, texture_template: str, material_template: str
+) -> Dict[Path, ObjConfig]:
+    """Build one config per matching OBJ, filling `{stem}` in both templates."""
+    return {
+        Path(match): ObjConfig(
+            texture_path=texture_template.format(stem=Path(match).stem),
+            material_name=material_template.format(stem=Path(match).stem),
+        )
+        for match in sorted(glob.glob(pattern, recursive=True))
+    }
+
+
+def _rewrite_job(
+    path: Path,
+    config: ObjConfig,
+    options: Dict[str, bool],
+    lod: Optional[Sequence[float]] = None,
+    glb: Optional[GlbOptions] = None,
+) -> RewriteResult:
+    start = time.perf_counter()
+    details = []
+    try:
+        report = rewrite_obj(path, config, **options)
+        if report is not None:
+            details.append(
+                f"vertices {report.vertices_before} -> {report.vertices_after}, "
+                f"ACMR {report.acmr_before:.3f} -> {report.acmr_after:.3f}"
+            )
+        if lod:
+            from mesh_lod import build_lods  # mesh_lod imports this module
+
+            build_lods(path, config.material_name, lod)
+        if glb is not None:
+            from mesh_gltf import export_glb  # mesh_gltf imports this module
+
+            exported = export_glb(path, config, glb)
+            details.append(f"{exported.path.name} {exported.bytes / 1024:.0f} KiB")
+    except Exception as exc:  # isolate one bad mesh from the rest of the batch
+        return RewriteResult(path, time.perf_counter() - start, f"{type(exc).__name__}: {exc}")
+    return RewriteResult(path, time.perf_counter() - start, detail="; ".join(details) or None)
+
+
+def rewrite_batch(
+    configs: Mapping[Path, ObjConfig],
+    workers: Optional[int] = None,
+    lod: Optional[Sequence[float]] = None,
+    glb: Optional[GlbOptions] = None,
+    **options: bool,
+) -> List[RewriteResult]:
+    """
+    Rewrite every mesh in `configs`, spread over `workers` processes
+    (default: one per core; 1 runs in-process). Results keep input order.
+    `lod` lists the triangle ratios to build LOD variants for; `glb` also
+    exports each mesh as binary glTF.
+    """
+    if workers == 1 or len(configs) <= 1:
+        ordered = []
+        for path, cfg in configs.items():
+            with stage(f"mesh {path.name}"):
+                ordered.append(_rewrite_job(path, cfg, options, lod, glb))
+        return ordered
+
+    results: Dict[Path, RewriteResult] = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_rewrite_job, path, cfg, options, lod, glb): path
+            for path, cfg in configs.items()
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+            except Exception as exc:  # worker died (e.g. out of memory)
+                results[path] = RewriteResult(path, 0.0, f"{type(exc).__name__}: {exc}")
+            record(f"mesh {path.name}", results[path].seconds, worker=True)
+    return [results[path] for path in configs]
+
+
+def format_report(results: Sequence[RewriteResult], wall_seconds: float) -> str:
+    lines = []
+    for result in results:
+        status = "ok" if result.error is None else f"FAILED {result.error}"
+        if result.detail:
+            status += f" ({result.detail})"
+        lines.append(f"{result.seconds:8.2f}s  {result.path}  {status}")
+    failed = sum(result.error is not None for result in results)
+    busy = sum(result.seconds for result in results)
+    lines.append(
+        f"{len(results) - failed}/{len(results)} meshes rewritten in "
+        f"{wall_seconds:.2f}s wall ({busy:.2f}s summed)"
+    )
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--manifest", type=Path, help="JSON/TOML list of meshes to rewrite")
+    source.add_argument("--glob", help="rewrite every OBJ matching this pattern")
+    parser.add_argument(
+        "--texture-template",
+        default="assets/textures/{stem}_palette.png",
+        help="texture path for --glob meshes; {stem} is the OBJ name",
+    )
+    parser.add_argument(
+        "--material-template",
+        default="{stem}_texture",
+        help="material name for --glob meshes; {stem} is the OBJ name",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="worker processes (default: one per core)",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="rewrite in two passes through a temp file to keep memory flat",
+    )
+    parser.add_argument(
+        "--vectorized",
+        action="store_true",
+        help="parse and format vertex/face batches with NumPy",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="write a .meshcache sidecar and skip OBJs that still match it",
+    )
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="weld duplicate vertices and reorder triangles for the vertex cache",
+    )
+    parser.add_argument(
+        "--lod",
+        type=float,
+        nargs="+",
+        metavar="RATIO",
+        help="also write decimated LODs at these triangle ratios, e.g. 1 0.5 0.2 0.05",
+    )
+    parser.add_argument("--glb", action="store_true", help="also export each mesh as binary glTF")
+    parser.add_argument(
+        "--glb-quantize",
+        action="store_true",
+        help="store GLB positions/UVs as int16/uint16 (KHR_mesh_quantization)",
+    )
+    parser.add_argument(
+        "--glb-reference-texture",
+        action="store_true",
+        help="reference the palette texture from the GLB instead of embedding it",
+    )
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def default_configs() -> Dict[Path, ObjConfig]:
     root = Path(__file__).resolve().parent.parent
-    configs = {
+    return {
         Path(root / "lwli.obj"): ObjConfig(
             texture_path="assets/textures/lwli_palette.png",
             material_name="lwli_texture",
@@ -152,10 +953,38 @@ def main() -> None:
         ),
     }
 
-    for obj_path, cfg in configs.items():
-        rewrite_obj(obj_path, cfg)
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.manifest is not None:
+        configs = load_manifest(args.manifest)
+    elif args.glob is not None:
+        configs = configs_from_glob(args.glob, args.texture_template, args.material_template)
+    else:
+        configs = default_configs()
+
+    glb = None
+    if args.glb:
+        from mesh_gltf import GlbOptions  # mesh_gltf imports this module
+
+        glb = GlbOptions(quantize=args.glb_quantize, embed_texture=not args.glb_reference_texture)
+
+    start = time.perf_counter()
+    with profile_run(args, "colorize_obj"):
+        results = rewrite_batch(
+            configs,
+            workers=args.workers,
+            lod=args.lod,
+            glb=glb,
+            streaming=args.streaming,
+            vectorized=args.vectorized,
+            cache=args.cache,
+            optimize=args.optimize,
+        )
+    print(format_report(results, time.perf_counter() - start))
+    if any(result.error is not None for result in results):
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
     main()
-
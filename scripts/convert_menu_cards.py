@@ -1,11 +1,17 @@
-import re
+import argparse
+from pathlib import Path
 
-# Read the menu file
-with open('pages/menu.html', 'r', encoding='utf-8') as f:
-    content = f.read()
+from menu_cards import Card, Edit, apply_edits, iter_cards, line_indent, strip_leading_whitespace
+from profiling import add_profile_arguments, profile_run, stage
 
-# Pattern to match product cards with bottom buttons
-pattern = r'(<article class="product-card"[^>]*>.*?<div class="product-media">.*?<span class="product-badge[^"]*">([^<]+)</span>.*?<img[^>]+>.*?<span class="product-category-overlay">([^<]+)</span>.*?</div>.*?<div class="product-info">.*?<div class="product-header">.*?<h3>([^<]+)</h3>.*?<p class="product-price">([^<]+)</p>.*?</div>.*?)<div class="product-actions">.*?data-quickview="([^"]+)".*?data-add-to-cart="([^"]+)".*?</div>.*?(</div>.*?</article>)'
+parser = argparse.ArgumentParser(description="Move menu card buttons into the image overlay")
+parser.add_argument(
+    "--page",
+    type=Path,
+    default=Path(__file__).resolve().parent.parent / "public" / "pages" / "menu.html",
+)
+add_profile_arguments(parser)
+args = parser.parse_args()
 
 # SVG icons
 eye_svg = '''<svg width="20" height="20" viewBox="0 0 24 24" fill="none" stroke="currentColor"
@@ -21,37 +27,51 @@ cart_svg = '''<svg width="20" height="20" viewBox="0 0 24 24" fill="none" stroke
                                     <path d="M1 1h4l2.68 13.39a2 2 0 0 0 2 1.61h9.72a2 2 0 0 0 2-1.61L23 6H6" />
                                 </svg>'''
 
-def replace_card(match):
-    before_actions = match.group(1)
-    quickview_name = match.group(6)
-    addtocart_name = match.group(7)
-    after_actions = match.group(8)
-    
-    # Build the overlay
+def convert_card(card: Card) -> list[Edit]:
+    """Move a card's bottom buttons into an overlay on the product image."""
+    if (card.actions is None or card.actions_overlay is not None or card.media_close is None
+            or card.overlay is None or card.quickview is None or card.add_to_cart is None):
+        return []  # already converted, or not a card with bottom buttons
+
+    media_indent = line_indent(content, card.media[0])
     overlay = f'''<div class="product-actions-overlay">
-                            <button class="btn-icon" aria-label="Quick View" data-quickview="{quickview_name}">
+                            <button class="btn-icon" aria-label="Quick View" data-quickview="{card.quickview}">
                                 {eye_svg}
                             </button>
-                            <button class="btn-icon" aria-label="Add to Cart" data-add-to-cart="{addtocart_name}">
+                            <button class="btn-icon" aria-label="Add to Cart" data-add-to-cart="{card.add_to_cart}">
                                 {cart_svg}
                             </button>
                         </div>'''
-    
+
     # Insert overlay before </div> that closes product-media
-    before_actions = re.sub(r'(<span class="product-category-overlay">[^<]+</span>\s*)(</div>)', 
-                            r'\1' + overlay + r'\n                    \2', before_actions)
-    
+    gap_start = strip_leading_whitespace(content, (card.media_close, card.media_close))[0]
+    edits = [(gap_start, card.media_close, f'\n{media_indent}    {overlay}\n{media_indent}')]
+
     # Add loading="lazy" to images that don't have it
-    before_actions = re.sub(r'(<img[^>]+)(?<!loading="lazy")>',
-                           r'\1 loading="lazy">', before_actions)
-    
-    return before_actions + after_actions
+    if card.img_span is not None and not card.img_lazy:
+        img_end = card.img_span[1] - 1
+        if content[img_end - 1] == '/':
+            img_end -= 1
+        edits.append((img_end, img_end, ' loading="lazy"'))
+
+    # Drop the bottom buttons
+    start, end = strip_leading_whitespace(content, card.actions)
+    edits.append((start, end, ''))
+    return edits
+
+with profile_run(args, "convert_menu_cards"):
+    # Read the menu file
+    with stage("read", bytes_in=args.page.stat().st_size), open(args.page, 'r', encoding='utf-8') as f:
+        content = f.read()
 
-# Replace all cards
-content = re.sub(pattern, replace_card, content, flags=re.DOTALL)
+    # Convert all cards
+    with stage("edit"):
+        edits = [edit for card in iter_cards(content) for edit in convert_card(card)]
+        content = apply_edits(content, edits)
 
-# Write back
-with open('pages/menu.html', 'w', encoding='utf-8') as f:
-    f.write(content)
+    # Write back
+    with stage("write") as write, open(args.page, 'w', encoding='utf-8') as f:
+        f.write(content)
+        write.bytes_out = len(content.encode('utf-8'))
 
 print("✅ Successfully updated all menu cards to match homepage structure!")
@@ -4,38 +4,204 @@ their reference photography.
 
 Each texture is built from scratch: we extract a concise palette from the photo,
 then paint a soft radial gradient with gentle noise to mimic frosting depth.
+Photos are decoded only at the resolution the palette needs (JPEG DCT
+scaling, integer reduction otherwise) before the final 256px resample.
+
+Palettes and baked textures are kept in a content-addressed cache keyed by the
+reference image hash and the spec parameters, so unchanged textures are
+neither re-clustered nor re-baked on the next run.
+
+Many specs can be built at once from a JSON/TOML manifest or from the product
+images in `public/data/products.json`, spread over a process pool. Every spec
+carries its own seed, so results do not depend on the worker count.
 """
 from __future__ import annotations
 
-from dataclasses import dataclass
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+import tomllib
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Iterable, List, Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+from urllib.parse import unquote
 
 import numpy as np
 from PIL import Image
 
+from atomic_files import copy_atomic, write_atomic
+from catalog import load_catalog
+from profiling import add_profile_arguments, profile_run, record
+from profiling import stage as profile_stage
+
 
 DOWNSAMPLE_LIMIT = 256
+REDUCING_GAP = 2.0
 TEXTURE_SIZE = 1024
 NOISE_STRENGTH = 0.035
-RNG = np.random.default_rng(42)
+ASSIGN_CHUNK = 1 << 18
+STRIP_ROWS = 64
+DEFAULT_SEED = 42
+CACHE_VERSION = 2
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+STAGES = ("load", "resize", "kmeans", "bake", "encode")
+
+
+def _default_rng() -> np.random.Generator:
+    return np.random.default_rng(DEFAULT_SEED)
+
+
+@contextmanager
+def _timed(timings: Dict[str, float], stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        with profile_stage(stage):
+            yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+
+def _target_size(size: tuple[int, int], limit: int) -> tuple[int, int]:
+    width, height = size
+    scale = max(width, height) / limit
+    if scale <= 1:
+        return width, height
+    return int(width / scale), int(height / scale)
+
+
+def open_reference(path: Path, limit: Optional[int] = None) -> Image.Image:
+    """
+    Decode a reference photo to RGB.
+
+    With a `limit`, only enough resolution for the final `limit` px resample
+    is decoded: JPEGs use DCT scaling via `draft()`, other formats are
+    box-reduced by an integer factor. Both stop at REDUCING_GAP times the
+    target size so the LANCZOS pass still has detail to filter. The
+    undecoded size is kept in `info["full_size"]` for `downsample_pixels`.
+    """
+    image = Image.open(path)
+    if limit is None:
+        return image.convert("RGB")
+    full_size = image.size
+    target = _target_size(full_size, limit)
+    image.draft("RGB", (int(target[0] * REDUCING_GAP), int(target[1] * REDUCING_GAP)))
+    if image.mode != "RGB":
+        image = image.convert("RGB")  # before reducing: P images cannot be filtered
+    factor = int(min(image.size[0] / target[0], image.size[1] / target[1]) / REDUCING_GAP)
+    if factor > 1:
+        image = image.reduce(factor)
+    image.info["full_size"] = full_size
+    return image
 
 
-def load_reference_pixels(path: Path) -> np.ndarray:
+def downsample_pixels(image: Image.Image, limit: int = DOWNSAMPLE_LIMIT) -> np.ndarray:
+    """Shrink `image` to at most `limit` px per side; float32 array in [0, 1]."""
+    target = _target_size(image.info.get("full_size", image.size), limit)
+    if target != image.size:
+        image = image.resize(target, resample=Image.Resampling.LANCZOS)
+    return np.divide(np.asarray(image), np.float32(255.0), dtype=np.float32)
+
+
+def load_reference_pixels(path: Path, limit: int = DOWNSAMPLE_LIMIT) -> np.ndarray:
     """Return image pixels as float32 array in range [0, 1]."""
-    image = Image.open(path).convert("RGB")
-    width, height = image.size
-    scale = max(width, height) / DOWNSAMPLE_LIMIT
-    if scale > 1:
-        image = image.resize(
-            (int(width / scale), int(height / scale)),
-            resample=Image.Resampling.LANCZOS,
-        )
-    return np.asarray(image, dtype=np.float32) / 255.0
+    return downsample_pixels(open_reference(path, limit), limit)
+
+
+@contextmanager
+def prefetch_references(
+    paths: Iterable[Path], limit: int = DOWNSAMPLE_LIMIT, threads: int = 4
+) -> Iterator[Dict[Path, Future[np.ndarray]]]:
+    """
+    Start loading every distinct reference on a thread pool (Pillow releases
+    the GIL while decoding) and yield `{path: future}`. Loads that were
+    never waited on are cancelled on exit.
+    """
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = {
+            path: pool.submit(load_reference_pixels, path, limit) for path in dict.fromkeys(paths)
+        }
+        try:
+            yield futures
+        finally:
+            for future in futures.values():
+                future.cancel()
+
+
+def nearest_centroid(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """
+    Label each point with its closest centroid.
+
+    Uses ||x||^2 - 2x.c + ||c||^2 (the ||x||^2 term does not change the argmin)
+    in row chunks, so only a `(ASSIGN_CHUNK, k)` block is ever materialised.
+    """
+    centroid_sq = np.einsum("ij,ij->i", centroids, centroids)
+    labels = np.empty(points.shape[0], dtype=np.intp)
+    for start in range(0, points.shape[0], ASSIGN_CHUNK):
+        block = points[start : start + ASSIGN_CHUNK]
+        distances = centroid_sq - 2.0 * (block @ centroids.T)
+        labels[start : start + block.shape[0]] = distances.argmin(axis=1)
+    return labels
+
+
+def cluster_sums(
+    points: np.ndarray, labels: np.ndarray, clusters: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Per-cluster coordinate sums and member counts via `np.bincount`."""
+    counts = np.bincount(labels, minlength=clusters)
+    sums = np.stack(
+        [
+            np.bincount(labels, weights=points[:, channel], minlength=clusters)
+            for channel in range(points.shape[1])
+        ],
+        axis=1,
+    )
+    return sums, counts
+
 
+def kmeans_plus_plus(
+    points: np.ndarray, clusters: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Pick initial centroids with k-means++ (D^2-weighted) seeding."""
+    count = points.shape[0]
+    point_sq = np.einsum("ij,ij->i", points, points, dtype=np.float64)
+    centroids = np.empty((clusters, points.shape[1]), dtype=points.dtype)
+    centroids[0] = points[rng.integers(0, count)]
+    closest = np.full(count, np.inf)
+    for idx in range(clusters):
+        if idx:
+            cumulative = np.cumsum(closest)
+            if cumulative[-1] > 0:
+                pick = np.searchsorted(cumulative, rng.random() * cumulative[-1], side="right")
+            else:  # every pixel already sits on a centroid
+                pick = rng.integers(0, count)
+            centroids[idx] = points[min(pick, count - 1)]
+        centre = centroids[idx].astype(np.float64)
+        distance = point_sq - 2.0 * (points @ centre) + centre @ centre
+        np.minimum(closest, np.maximum(distance, 0.0), out=closest)
+    return centroids
 
-def kmeans_palette(pixels: np.ndarray, clusters: int = 5, iterations: int = 12) -> np.ndarray:
-    """Simple k-means to derive a small palette from an image."""
+
+def kmeans_palette(
+    pixels: np.ndarray,
+    clusters: int = 5,
+    iterations: int = 12,
+    *,
+    batch_size: Optional[int] = None,
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    """
+    K-means to derive a small palette from an image.
+
+    Seeds with k-means++ and updates centroids with `np.bincount`. With
+    `batch_size`, each iteration is a mini-batch step on that many sampled
+    pixels (running-mean updates), which keeps full-resolution photos cheap.
+    """
+    rng = _default_rng() if rng is None else rng
     flat = pixels.reshape(-1, 3)
     # Filter out dark pixels so the palette focuses on frosting/topping.
     brightness = flat.mean(axis=1)
@@ -46,41 +212,46 @@ def kmeans_palette(pixels: np.ndarray, clusters: int = 5, iterations: int = 12)
     if usable.shape[0] < clusters:
         clusters = max(1, usable.shape[0])
 
-    seeds = RNG.choice(usable.shape[0], size=clusters, replace=False)
-    centroids = usable[seeds]
+    count = usable.shape[0]
+    mini_batch = batch_size is not None and batch_size < count
+    centroids = kmeans_plus_plus(usable, clusters, rng).astype(np.float64)
+    seen = np.zeros(clusters)
 
     for _ in range(iterations):
-        distances = np.linalg.norm(usable[:, None, :] - centroids[None, :, :], axis=2)
-        labels = distances.argmin(axis=1)
-        new_centroids: List[np.ndarray] = []
-        for idx in range(clusters):
-            members = usable[labels == idx]
-            if members.size == 0:
-                # Re-seed empty cluster with a random pixel.
-                new_centroids.append(usable[RNG.integers(0, usable.shape[0])])
-            else:
-                new_centroids.append(members.mean(axis=0))
-        new_centroids_array = np.vstack(new_centroids)
-        if np.allclose(new_centroids_array, centroids, atol=1e-3):
-            centroids = new_centroids_array
+        points = usable[rng.integers(0, count, size=batch_size)] if mini_batch else usable
+        labels = nearest_centroid(points, centroids)
+        sums, counts = cluster_sums(points, labels, clusters)
+        new_centroids = centroids.copy()
+        filled = counts > 0
+        if mini_batch:
+            # Running mean over every pixel a centroid has absorbed so far.
+            seen += counts
+            new_centroids[filled] += (
+                sums[filled] - counts[filled, None] * centroids[filled]
+            ) / seen[filled, None]
+        else:
+            new_centroids[filled] = sums[filled] / counts[filled, None]
+            # Re-seed empty clusters with a random pixel.
+            empty = np.flatnonzero(~filled)
+            new_centroids[empty] = usable[rng.integers(0, count, size=empty.size)]
+        if np.allclose(new_centroids, centroids, atol=1e-3):
+            centroids = new_centroids
             break
-        centroids = new_centroids_array
+        centroids = new_centroids
 
     # Sort palette from lightest to darkest for gradient layering.
     brightness = centroids.mean(axis=1)
     order = np.argsort(brightness)[::-1]
-    return centroids[order]
+    return centroids[order].astype(usable.dtype)
 
 
-def generate_radial_gradient(palette: np.ndarray, size: int = TEXTURE_SIZE) -> np.ndarray:
+def generate_radial_gradient(
+    palette: np.ndarray,
+    size: int = TEXTURE_SIZE,
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
     """Paint a radial gradient with palette bands and subtle stochastic details."""
-    palette = palette.copy()
-    palette = np.clip(palette, 0.0, 1.0)
-
-    bands = len(palette)
-    if bands == 1:
-        palette = np.vstack([palette, palette])
-        bands = 2
+    palette, bands = _gradient_palette(palette)
 
     y, x = np.indices((size, size), dtype=np.float32)
     center = (size - 1) / 2.0
@@ -104,16 +275,92 @@ def generate_radial_gradient(palette: np.ndarray, size: int = TEXTURE_SIZE) -> n
     rim = np.clip(radial**1.8, 0.0, 1.0)[..., None]
     base_color *= (1 - 0.25 * rim)
 
-    noise = RNG.normal(0.0, NOISE_STRENGTH, size=(size, size, 1))
+    rng = _default_rng() if rng is None else rng
+    noise = rng.normal(0.0, NOISE_STRENGTH, size=(size, size, 1))
     texture = np.clip(base_color + noise, 0.0, 1.0)
     return texture
 
 
-def bake_texture(palette: np.ndarray, output_path: Path) -> None:
-    texture = generate_radial_gradient(palette)
-    image = Image.fromarray((texture * 255).astype(np.uint8), mode="RGB")
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    image.save(output_path, format="PNG")
+def _gradient_palette(palette: np.ndarray) -> tuple[np.ndarray, int]:
+    palette = np.clip(palette, 0.0, 1.0)
+    if len(palette) == 1:
+        palette = np.vstack([palette, palette])
+    return palette, len(palette)
+
+
+def _render_strip(
+    palette: np.ndarray, size: int, seed: int, rows: range, out: np.ndarray
+) -> None:
+    """Render `rows` of the gradient in float32 straight into `out`."""
+    bands = len(palette)
+    center = (size - 1) / 2.0
+    xs = (np.arange(size, dtype=np.float32) - center) / center
+    ys = ((np.arange(rows.start, rows.stop, dtype=np.float32) - center) / center)[:, None]
+    radial = np.clip(np.sqrt(xs**2 + ys**2), 0.0, 1.0)
+    angle = (np.arctan2(ys, xs) + np.pi) / (2 * np.pi)
+
+    swirl = (radial * 0.8 + angle * 0.6) * (bands - 1)
+    base_indices = np.clip(np.floor(swirl).astype(np.intp), 0, bands - 1)
+    blend = np.clip(swirl - base_indices, 0.0, 1.0)[..., None]
+    upper_indices = np.minimum(base_indices + 1, bands - 1)
+    color = palette[base_indices] * (1 - blend) + palette[upper_indices] * blend
+    color *= (1 - 0.25 * np.clip(radial**1.8, 0.0, 1.0))[..., None]
+
+    # One generator per row, so the noise does not depend on how rows are
+    # grouped into strips or spread over threads.
+    for offset, row in enumerate(rows):
+        noise = np.random.default_rng([seed, row]).standard_normal(size, dtype=np.float32)
+        color[offset] += (noise * NOISE_STRENGTH)[:, None]
+    np.clip(color, 0.0, 1.0, out=color)
+    color *= 255
+    out[rows.start : rows.stop] = color
+
+
+def render_radial_gradient(
+    palette: np.ndarray,
+    size: int = TEXTURE_SIZE,
+    seed: int = DEFAULT_SEED,
+    strip_rows: int = STRIP_ROWS,
+    workers: int = 1,
+) -> np.ndarray:
+    """
+    Tiled counterpart of `generate_radial_gradient` returning uint8 RGB.
+
+    Rows are rendered in float32 strips of `strip_rows` into a preallocated
+    output, optionally across a thread pool (NumPy releases the GIL), so
+    peak memory is a few strips rather than several full-size arrays. The
+    result is identical for any `strip_rows` and `workers`.
+    """
+    palette, _ = _gradient_palette(np.asarray(palette, dtype=np.float32))
+    out = np.empty((size, size, 3), dtype=np.uint8)
+    strips = [range(start, min(start + strip_rows, size)) for start in range(0, size, strip_rows)]
+    if workers <= 1:
+        for rows in strips:
+            _render_strip(palette, size, seed, rows, out)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda rows: _render_strip(palette, size, seed, rows, out), strips))
+    return out
+
+
+def bake_texture(
+    palette: np.ndarray,
+    output_path: Path,
+    rng: Optional[np.random.Generator] = None,
+    *,
+    size: int = TEXTURE_SIZE,
+    workers: int = 1,
+    timings: Optional[Dict[str, float]] = None,
+) -> None:
+    timings = {} if timings is None else timings
+    rng = _default_rng() if rng is None else rng
+    seed = int(rng.integers(0, 2**63 - 1))
+    with _timed(timings, "bake"):
+        texture = render_radial_gradient(palette, size, seed=seed, workers=workers)
+    with _timed(timings, "encode"):
+        image = Image.fromarray(texture, mode="RGB")
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        image.save(output_path, format="PNG")
 
 
 @dataclass(frozen=True)
@@ -121,11 +368,294 @@ class TextureSpec:
     reference: Path
     output: Path
     clusters: int = 5
+    seed: int = DEFAULT_SEED
+    size: int = TEXTURE_SIZE
+    batch_size: Optional[int] = None  # k-means mini-batch size; None clusters every pixel
 
+    def generators(self) -> tuple[np.random.Generator, np.random.Generator]:
+        """Independent k-means and noise generators derived from `seed`."""
+        kmeans_seed, noise_seed = np.random.SeedSequence(self.seed).spawn(2)
+        return np.random.default_rng(kmeans_seed), np.random.default_rng(noise_seed)
 
-def main() -> None:
-    root = Path(__file__).resolve().parent.parent
-    specs: Sequence[TextureSpec] = (
+
+@dataclass
+class TextureResult:
+    output: Path
+    status: str
+    palette: List[List[float]] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def file_sha256(path: Path) -> str:
+    with path.open("rb") as handle:
+        return hashlib.file_digest(handle, "sha256").hexdigest()
+
+
+class TextureCache:
+    """
+    Content-addressed store for palettes and baked textures.
+
+    `entries/<key>.json` holds the palette and the hash of the baked PNG;
+    `blobs/<sha256>.png` holds the PNGs themselves, shared between entries.
+    Reading an entry refreshes its mtime, and `evict` drops the least
+    recently used entries (and blobs nothing else references) until the
+    store fits in `max_bytes`.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = CACHE_MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries = directory / "entries"
+        self.blobs = directory / "blobs"
+
+    @staticmethod
+    def key(spec: TextureSpec, reference_sha256: str) -> str:
+        params = {
+            "version": CACHE_VERSION,
+            "reference": reference_sha256,
+            "clusters": spec.clusters,
+            "seed": spec.seed,
+            "downsample_limit": DOWNSAMPLE_LIMIT,
+            "texture_size": spec.size,
+            "noise_strength": NOISE_STRENGTH,
+        }
+        if spec.batch_size is not None:  # keeps full-batch keys from before the option
+            params["batch_size"] = spec.batch_size
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.entries / f"{key}.json"
+        try:
+            entry = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        os.utime(path)
+        return entry
+
+    def put(self, key: str, palette: np.ndarray, texture: Path) -> None:
+        texture_sha256 = file_sha256(texture)
+        self.entries.mkdir(parents=True, exist_ok=True)
+        self.blobs.mkdir(parents=True, exist_ok=True)
+        blob = self.blobs / f"{texture_sha256}.png"
+        # Batch workers share the store, so never expose half-written files.
+        if not blob.exists():
+            copy_atomic(texture, blob)
+        entry = json.dumps({"palette": palette.tolist(), "texture_sha256": texture_sha256})
+        write_atomic(self.entries / f"{key}.json", entry)
+
+    def restore(self, entry: Dict[str, Any], output: Path) -> bool:
+        """Copy the cached PNG for `entry` to `output`; False if it was evicted."""
+        blob = self.blobs / f"{entry['texture_sha256']}.png"
+        if not blob.exists():
+            return False
+        output.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(blob, output)
+        return True
+
+    def evict(self) -> None:
+        if not self.entries.exists():
+            return
+        entries = sorted(self.entries.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        owners: Dict[Path, str] = {}
+        refs: Dict[str, int] = {}
+        for path in entries:
+            try:
+                digest = json.loads(path.read_text())["texture_sha256"]
+            except (OSError, ValueError, KeyError):
+                path.unlink(missing_ok=True)
+                continue
+            owners[path] = digest
+            refs[digest] = refs.get(digest, 0) + 1
+
+        blob_sizes = {
+            blob.stem: blob.stat().st_size for blob in self.blobs.glob("*.png")
+        }
+        total = sum(blob_sizes.values()) + sum(path.stat().st_size for path in owners)
+        for path, digest in owners.items():
+            if total <= self.max_bytes:
+                break
+            total -= path.stat().st_size
+            path.unlink()
+            refs[digest] -= 1
+            if not refs[digest] and digest in blob_sizes:
+                total -= blob_sizes.pop(digest)
+                (self.blobs / f"{digest}.png").unlink()
+
+
+def build_texture(
+    spec: TextureSpec,
+    cache: Optional[TextureCache] = None,
+    force: bool = False,
+    threads: int = 1,
+    prefetched: Optional[Future[np.ndarray]] = None,
+) -> TextureResult:
+    """
+    Produce `spec.output`, reusing the cache where possible.
+
+    The result status says how the texture was obtained: "up to date",
+    "restored" (copied from the cache) or "baked". Callers own eviction.
+    `prefetched` is a pending `load_reference_pixels` of `spec.reference`.
+    """
+    timings: Dict[str, float] = {}
+    kmeans_rng, noise_rng = spec.generators()
+    key = entry = None
+    if cache is not None:
+        with _timed(timings, "cache"):
+            key = cache.key(spec, file_sha256(spec.reference))
+            entry = None if force else cache.get(key)
+
+    def result(status: str) -> TextureResult:
+        return TextureResult(spec.output, status, palette.tolist(), timings)
+
+    if entry is not None:
+        palette = np.asarray(entry["palette"], dtype=np.float32)
+        with _timed(timings, "cache"):
+            if spec.output.exists() and file_sha256(spec.output) == entry["texture_sha256"]:
+                return result("up to date")
+            if cache is not None and cache.restore(entry, spec.output):
+                return result("restored")
+    else:
+        if prefetched is not None:
+            with _timed(timings, "load"):
+                pixels = prefetched.result()
+        else:
+            with _timed(timings, "load"):
+                image = open_reference(spec.reference, DOWNSAMPLE_LIMIT)
+            with _timed(timings, "resize"):
+                pixels = downsample_pixels(image)
+        with _timed(timings, "kmeans"):
+            palette = kmeans_palette(
+                pixels, clusters=spec.clusters, batch_size=spec.batch_size, rng=kmeans_rng
+            )
+
+    bake_texture(
+        palette, spec.output, rng=noise_rng, size=spec.size, workers=threads, timings=timings
+    )
+    if cache is not None and key is not None:
+        with _timed(timings, "cache"):
+            cache.put(key, palette, spec.output)
+    return result("baked")
+
+
+def _build_job(
+    spec: TextureSpec,
+    cache_dir: Optional[Path],
+    force: bool,
+    threads: int,
+    prefetched: Optional[Future[np.ndarray]] = None,
+) -> TextureResult:
+    cache = TextureCache(cache_dir) if cache_dir is not None else None
+    try:
+        return build_texture(spec, cache, force=force, threads=threads, prefetched=prefetched)
+    except Exception as exc:  # isolate one bad reference from the rest of the batch
+        return TextureResult(spec.output, "failed", error=f"{type(exc).__name__}: {exc}")
+
+
+def build_batch(
+    specs: Sequence[TextureSpec],
+    cache: Optional[TextureCache] = None,
+    force: bool = False,
+    workers: Optional[int] = None,
+    threads: int = 1,
+    prefetch: int = 0,
+) -> List[TextureResult]:
+    """
+    Build every spec, spread over `workers` processes (default: one per
+    core; 1 runs in-process), then evict the cache once. Results keep
+    input order and are identical for any worker count.
+
+    In-process builds can decode references ahead on `prefetch` threads;
+    a reference that turns out to be cached is decoded for nothing.
+    """
+    cache_dir = cache.directory if cache is not None else None
+    if workers == 1 or len(specs) <= 1:
+        results = []
+        with ExitStack() as stack:
+            pending: Dict[Path, Future[np.ndarray]] = {}
+            if prefetch > 0:
+                pending = stack.enter_context(
+                    prefetch_references((spec.reference for spec in specs), threads=prefetch)
+                )
+            for spec in specs:
+                with profile_stage(f"texture {spec.output.name}"):
+                    results.append(
+                        _build_job(spec, cache_dir, force, threads, pending.get(spec.reference))
+                    )
+    else:
+        results_by_index: Dict[int, TextureResult] = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_build_job, spec, cache_dir, force, threads): index
+                for index, spec in enumerate(specs)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results_by_index[index] = future.result()
+                except Exception as exc:  # worker died (e.g. out of memory)
+                    results_by_index[index] = TextureResult(
+                        specs[index].output, "failed", error=f"{type(exc).__name__}: {exc}"
+                    )
+                result = results_by_index[index]
+                record(
+                    f"texture {result.output.name}",
+                    sum(result.timings.values()),
+                    status=result.status,
+                    **result.timings,
+                )
+        results = [results_by_index[index] for index in range(len(specs))]
+    if cache is not None:
+        cache.evict()
+    return results
+
+
+def load_manifest(manifest: Path) -> List[TextureSpec]:
+    """
+    Read `[[textures]]` entries (`reference`, `output`, optional `clusters`,
+    `seed`, `size`, `batch_size`) from a JSON or TOML manifest, relative to
+    the manifest.
+    """
+    if manifest.suffix == ".toml":
+        data = tomllib.loads(manifest.read_text())
+    else:
+        data = json.loads(manifest.read_text())
+    specs: List[TextureSpec] = []
+    for entry in data.get("textures", []):
+        try:
+            specs.append(
+                TextureSpec(
+                    reference=manifest.parent / entry["reference"],
+                    output=manifest.parent / entry["output"],
+                    clusters=int(entry.get("clusters", 5)),
+                    seed=int(entry.get("seed", DEFAULT_SEED)),
+                    size=int(entry.get("size", TEXTURE_SIZE)),
+                    batch_size=int(entry["batch_size"]) if "batch_size" in entry else None,
+                )
+            )
+        except KeyError as exc:
+            raise ValueError(f"Manifest entry {entry!r} is missing {exc}") from exc
+    return specs
+
+
+def specs_from_products(products_path: Path, output_dir: Path) -> List[TextureSpec]:
+    """One spec per product image; `/images/...` URLs resolve under `public/`."""
+    public = products_path.parent.parent
+    specs: List[TextureSpec] = []
+    for product in load_catalog(products_path):
+        if not product.image:
+            continue
+        specs.append(
+            TextureSpec(
+                reference=public / unquote(product.image).lstrip("/"),
+                output=output_dir / f"product-{product.id}_palette.png",
+            )
+        )
+    return specs
+
+
+def default_specs(root: Path) -> List[TextureSpec]:
+    return [
         TextureSpec(
             reference=root / "image.png",
             output=root / "assets" / "textures" / "lwli_palette.png",
@@ -136,16 +666,112 @@ def main() -> None:
             output=root / "assets" / "textures" / "la5ar_palette.png",
             clusters=4,
         ),
+    ]
+
+
+def format_report(results: Sequence[TextureResult], wall_seconds: float) -> str:
+    header = f"{'status':<11}" + "".join(f"{stage:>9}" for stage in STAGES) + "  output"
+    lines = [header]
+    totals = dict.fromkeys(STAGES, 0.0)
+    for result in results:
+        for stage in STAGES:
+            totals[stage] += result.timings.get(stage, 0.0)
+        stages = "".join(f"{result.timings.get(stage, 0.0):9.3f}" for stage in STAGES)
+        detail = f"  {result.error}" if result.error else ""
+        lines.append(f"{result.status:<11}{stages}  {result.output}{detail}")
+    lines.append(f"{'total':<11}" + "".join(f"{totals[stage]:9.3f}" for stage in STAGES))
+    failed = sum(result.error is not None for result in results)
+    lines.append(
+        f"{len(results) - failed}/{len(results)} textures built in {wall_seconds:.2f}s wall"
+    )
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    root = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--manifest", type=Path, help="JSON/TOML list of texture specs")
+    source.add_argument(
+        "--products",
+        type=Path,
+        nargs="?",
+        const=root / "public" / "data" / "products.json",
+        help="one spec per product image (default: public/data/products.json)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=root / "public" / "assets" / "textures" / "products",
+        help="where --products textures are written",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="worker processes (default: one per core)"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="re-extract and re-bake even on a cache hit"
+    )
+    parser.add_argument("--no-cache", action="store_true", help="bypass the cache entirely")
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=root / ".cache" / "palette_textures",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=CACHE_MAX_BYTES / (1024 * 1024),
+        help="evict least recently used entries beyond this size",
     )
+    parser.add_argument(
+        "--threads", type=int, default=1, help="threads used to render texture strips"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        help="k-means mini-batch size for specs that do not set one (default: every pixel)",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=0,
+        help="threads decoding references ahead of in-process (--workers 1) builds",
+    )
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    root = Path(__file__).resolve().parent.parent
+    cache = None
+    if not args.no_cache:
+        cache = TextureCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
+    if args.manifest is not None:
+        specs = load_manifest(args.manifest)
+    elif args.products is not None:
+        specs = specs_from_products(args.products, args.output_dir)
+    else:
+        specs = default_specs(root)
+    if args.batch_size is not None:
+        specs = [
+            spec if spec.batch_size is not None else replace(spec, batch_size=args.batch_size)
+            for spec in specs
+        ]
 
-    for spec in specs:
-        pixels = load_reference_pixels(spec.reference)
-        palette = kmeans_palette(pixels, clusters=spec.clusters)
-        bake_texture(palette, spec.output)
-        print(
-            f"Wrote {spec.output.relative_to(root)} using palette "
-            f"{np.round(palette * 255).astype(int).tolist()}"
+    start = time.perf_counter()
+    with profile_run(args, "create_palette_textures"):
+        results = build_batch(
+            specs,
+            cache,
+            force=args.force,
+            workers=args.workers,
+            threads=args.threads,
+            prefetch=args.prefetch,
         )
+    print(format_report(results, time.perf_counter() - start))
+    if any(result.error is not None for result in results):
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
@@ -2,24 +2,39 @@
 Fix the extra closing div tags in menu.html
 """
 
-# Read the menu file
-with open('c:/Users/simoa/OneDrive/Documents/bakery/pages/menu.html', 'r', encoding='utf-8') as f:
-    content = f.read()
+import argparse
+from pathlib import Path
 
-# Replace the pattern where there are two consecutive closing divs followed by product-info
-# Pattern: </div>\n                    </div>\n                    <div class="product-info">
-# Should be: </div>\n                    <div class="product-info">
+from menu_cards import apply_edits, iter_cards, strip_leading_whitespace
+from profiling import add_profile_arguments, profile_run, stage
 
-import re
+parser = argparse.ArgumentParser(description="Fix the extra closing div tags in menu.html")
+parser.add_argument(
+    "--page",
+    type=Path,
+    default=Path(__file__).resolve().parent.parent / "public" / "pages" / "menu.html",
+)
+add_profile_arguments(parser)
+args = parser.parse_args()
 
-# Remove the extra </div> that appears right before <div class="product-info">
-pattern = r'(</div>)\s*</div>\s*(<div class="product-info">)'
-replacement = r'\1\n                    \2'
+with profile_run(args, "fix_menu_divs"):
+    # Read the menu file
+    with stage("read", bytes_in=args.page.stat().st_size), open(args.page, 'r', encoding='utf-8') as f:
+        content = f.read()
 
-fixed_content = re.sub(pattern, replacement, content)
+    # Remove every </div> inside a card that has no open <div> left to close,
+    # e.g. the extra one that appears right before <div class="product-info">
+    with stage("edit"):
+        edits = [
+            (*strip_leading_whitespace(content, span), '')
+            for card in iter_cards(content)
+            for span in card.stray_closes
+        ]
+        fixed_content = apply_edits(content, edits)
 
-# Write back
-with open('c:/Users/simoa/OneDrive/Documents/bakery/pages/menu.html', 'w', encoding='utf-8') as f:
-    f.write(fixed_content)
+    # Write back
+    with stage("write") as write, open(args.page, 'w', encoding='utf-8') as f:
+        f.write(fixed_content)
+        write.bytes_out = len(fixed_content.encode('utf-8'))
 
-print("Fixed extra closing divs in menu.html!")
+print(f"Fixed {len(edits)} extra closing divs in {args.page.name}!")
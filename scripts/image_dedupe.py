@@ -0,0 +1,435 @@
+"""
+Find duplicate and near-duplicate images across `public/images` and the
+repo root, and the product records that could share one canonical file.
+
+Every image gets two 64-bit perceptual hashes: a dHash (gradient signs of a
+9x8 grayscale thumbnail) and a pHash (signs of the low 8x8 DCT coefficients
+of a 32x32 thumbnail against their median). Hashing runs in a process pool.
+The results are cached in `.cache/image_hashes.json` and reused while a
+file's size and mtime are unchanged.
+
+Near-duplicates are found with a BK-tree over the pHashes. Each image only
+visits the branches within `--distance` bits, so the search is far below
+the N^2 pairwise comparison. A match must also agree on the dHash, and
+matches are merged into clusters with union-find. Each cluster picks a
+canonical file: served from `public/images`, already used by a product,
+the highest resolution, then the smallest. The report lists:
+
+- the redundant copies and the bytes they waste,
+- the products.json records whose `image` could point at the canonical
+  URL instead.
+
+Nothing is moved or rewritten.
+
+    python scripts/image_dedupe.py
+    python scripts/image_dedupe.py --distance 4 --json .cache/duplicates.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import quote, unquote
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from atomic_files import write_atomic
+from catalog import PRODUCTS_PATH, load_catalog
+from image_variants import IMAGES_PREFIX, VARIANTS_DIR, file_sha256
+from profiling import add_profile_arguments, profile_run, record, stage
+
+CACHE_VERSION = 1
+ROOT = Path(__file__).resolve().parent.parent
+PUBLIC_DIR = ROOT / "public"
+CACHE_PATH = ROOT / ".cache" / "image_hashes.json"
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp"}
+DEFAULT_DISTANCE = 6  # of 64 bits
+_PHASH_SIZE = 32
+_PHASH_BITS = 8
+
+
+@dataclass
+class ImageHash:
+    path: str  # relative to the repo root, POSIX separators
+    size: int
+    mtime_ns: int
+    sha256: str
+    width: int
+    height: int
+    dhash: int
+    phash: int
+
+
+@dataclass
+class Cluster:
+    canonical: ImageHash
+    duplicates: List[ImageHash] = field(default_factory=list)
+
+    @property
+    def wasted_bytes(self) -> int:
+        return sum(item.size for item in self.duplicates)
+
+
+@dataclass
+class Repoint:
+    product_id: Any
+    name: str
+    image: str
+    canonical: str
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """Orthonormal DCT-II basis, so `D @ X @ D.T` is the 2-D DCT of `X`."""
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT = _dct_matrix(_PHASH_SIZE)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def dhash(gray: Image.Image) -> int:
+    pixels = np.asarray(gray.resize((9, 8), Image.Resampling.LANCZOS), dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def phash(gray: Image.Image) -> int:
+    pixels = np.asarray(
+        gray.resize((_PHASH_SIZE, _PHASH_SIZE), Image.Resampling.LANCZOS), dtype=np.float64
+    )
+    low = (_DCT @ pixels @ _DCT.T)[:_PHASH_BITS, :_PHASH_BITS]
+    return _bits_to_int(low > np.median(low.ravel()[1:]))  # DC term skews the median
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def hash_image(path: Path, root: Path = ROOT) -> ImageHash:
+    stat = path.stat()
+    with Image.open(path) as image:
+        width, height = image.size
+        image.draft("L", (64, 64))  # JPEG: decode at 1/8 scale when possible
+        oriented = ImageOps.exif_transpose(image)
+        if oriented.mode in ("RGBA", "LA", "P"):
+            # Flatten transparency onto white so cut-outs hash like their page.
+            rgba = oriented.convert("RGBA")
+            background = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+            oriented = Image.alpha_composite(background, rgba)
+        gray = oriented.convert("L")
+    return ImageHash(
+        path=path.relative_to(root).as_posix(),
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        sha256=file_sha256(path),
+        width=width,
+        height=height,
+        dhash=dhash(gray),
+        phash=phash(gray),
+    )
+
+
+def discover(root: Path = ROOT, public: Path = PUBLIC_DIR) -> List[Path]:
+    """Images under `public/images` (minus generated variants) and at the repo root."""
+    images = public / IMAGES_PREFIX.strip("/")
+    found = [
+        path
+        for path in sorted(images.rglob("*"))
+        if path.suffix.lower() in IMAGE_SUFFIXES
+        and path.is_file()
+        and VARIANTS_DIR not in path.relative_to(images).parts[:1]
+    ]
+    found += [
+        path
+        for path in sorted(root.iterdir())
+        if path.suffix.lower() in IMAGE_SUFFIXES and path.is_file()
+    ]
+    return found
+
+
+def load_cache(path: Path) -> Dict[str, ImageHash]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != CACHE_VERSION:
+        return {}
+    return {entry["path"]: ImageHash(**entry) for entry in data.get("images", [])}
+
+
+def save_cache(path: Path, hashes: Iterable[ImageHash]) -> None:
+    payload = {"version": CACHE_VERSION, "images": [asdict(item) for item in hashes]}
+    write_atomic(path, json.dumps(payload, ensure_ascii=False))
+
+
+def _hash_job(path: Path, root: Path) -> Tuple[Optional[ImageHash], Optional[str], float]:
+    start = time.perf_counter()
+    try:
+        return hash_image(path, root), None, time.perf_counter() - start
+    except Exception as exc:  # one unreadable file must not stop the scan
+        return None, f"{type(exc).__name__}: {exc}", time.perf_counter() - start
+
+
+def hash_images(
+    paths: Sequence[Path],
+    cache: Dict[str, ImageHash],
+    root: Path = ROOT,
+    workers: Optional[int] = None,
+) -> Tuple[List[ImageHash], Dict[str, str]]:
+    """
+    Hashes for `paths` (in order), reusing `cache` entries whose size and
+    mtime still match. Returns the hashes and `{path: error}` for failures.
+    """
+    hashes: Dict[Path, ImageHash] = {}
+    errors: Dict[str, str] = {}
+    pending: List[Path] = []
+    for path in paths:
+        entry = cache.get(path.relative_to(root).as_posix())
+        stat = path.stat()
+        if entry is not None and (entry.size, entry.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+            hashes[path] = entry
+        else:
+            pending.append(path)
+
+    def collect(path: Path, result: Tuple[Optional[ImageHash], Optional[str], float]) -> None:
+        item, error, seconds = result
+        if item is not None:
+            hashes[path] = item
+        else:
+            errors[path.relative_to(root).as_posix()] = error or "unknown error"
+        record(f"hash {path.name}", seconds, worker=True)
+
+    if workers == 1 or len(pending) <= 1:
+        for path in pending:
+            with stage(f"hash {path.name}"):
+                item, error, _ = _hash_job(path, root)
+            if item is not None:
+                hashes[path] = item
+            else:
+                errors[path.relative_to(root).as_posix()] = error or "unknown error"
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_hash_job, path, root): path for path in pending}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    collect(path, future.result())
+                except Exception as exc:  # worker died (e.g. out of memory)
+                    collect(path, (None, f"{type(exc).__name__}: {exc}", 0.0))
+    return [hashes[path] for path in paths if path in hashes], errors
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes with Hamming distance."""
+
+    def __init__(self) -> None:
+        # Each node is [hash, item index, {distance: child node}].
+        self.root: Optional[list] = None
+
+    def add(self, value: int, index: int) -> None:
+        node = [value, index, {}]
+        if self.root is None:
+            self.root = node
+            return
+        current = self.root
+        while True:
+            distance = hamming(value, current[0])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def query(self, value: int, radius: int) -> List[int]:
+        """Indices of every hash within `radius` bits of `value`."""
+        found: List[int] = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= radius:
+                found.append(node[1])
+            for edge, child in node[2].items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return found
+
+
+def cluster_hashes(hashes: Sequence[ImageHash], distance: int = DEFAULT_DISTANCE) -> List[List[int]]:
+    """Groups of indices (2+ members) whose pHash and dHash are within `distance`."""
+    parent = list(range(len(hashes)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    tree = BKTree()
+    for index, item in enumerate(hashes):
+        for match in tree.query(item.phash, distance):
+            if item.sha256 == hashes[match].sha256 or hamming(item.dhash, hashes[match].dhash) <= distance:
+                parent[find(index)] = find(match)
+        tree.add(item.phash, index)
+
+    groups: Dict[int, List[int]] = {}
+    for index in range(len(hashes)):
+        groups.setdefault(find(index), []).append(index)
+    return [members for members in groups.values() if len(members) > 1]
+
+
+def public_url(item: ImageHash, public: Path = PUBLIC_DIR, root: Path = ROOT) -> Optional[str]:
+    """The site URL of a file under `public/`, or None for files that are not served."""
+    path = root / item.path
+    try:
+        relative = path.relative_to(public)
+    except ValueError:
+        return None
+    return "/" + quote(relative.as_posix(), safe="/,")
+
+
+def pick_canonical(
+    items: Sequence[ImageHash], referenced: Iterable[str], public: Path = PUBLIC_DIR
+) -> ImageHash:
+    used = {unquote(url) for url in referenced}
+
+    def rank(item: ImageHash) -> Tuple[bool, bool, int, int, str]:
+        url = public_url(item, public)
+        return (
+            url is None,  # served files first
+            url is None or unquote(url) not in used,  # then files products already use
+            -item.width * item.height,  # then the sharpest
+            item.size,  # then the lightest
+            item.path,
+        )
+
+    return min(items, key=rank)
+
+
+def find_clusters(
+    hashes: Sequence[ImageHash],
+    referenced: Iterable[str],
+    distance: int = DEFAULT_DISTANCE,
+    public: Path = PUBLIC_DIR,
+) -> List[Cluster]:
+    referenced = list(referenced)
+    clusters = []
+    for members in cluster_hashes(hashes, distance):
+        items = [hashes[index] for index in members]
+        canonical = pick_canonical(items, referenced, public)
+        clusters.append(Cluster(canonical, [item for item in items if item is not canonical]))
+    clusters.sort(key=lambda cluster: cluster.wasted_bytes, reverse=True)
+    return clusters
+
+
+def repoint_products(
+    clusters: Sequence[Cluster], products_path: Path = PRODUCTS_PATH, public: Path = PUBLIC_DIR
+) -> List[Repoint]:
+    """Products whose image is a non-canonical member of a cluster with a served canonical."""
+    canonical_for: Dict[str, str] = {}
+    for cluster in clusters:
+        target = public_url(cluster.canonical, public)
+        if target is None:
+            continue
+        for item in cluster.duplicates:
+            url = public_url(item, public)
+            if url is not None:
+                canonical_for[unquote(url)] = target
+    repoints = []
+    for product in load_catalog(products_path):
+        target = canonical_for.get(unquote(product.image))
+        if target is not None:
+            repoints.append(Repoint(product.id, product.name, product.image, target))
+    return repoints
+
+
+def format_report(clusters: Sequence[Cluster], repoints: Sequence[Repoint], scanned: int) -> str:
+    lines = []
+    for cluster in clusters:
+        canonical = cluster.canonical
+        lines.append(
+            f"{canonical.path} ({canonical.width}x{canonical.height}, {canonical.size / 1024:.0f} KiB)"
+        )
+        for item in cluster.duplicates:
+            kind = "identical" if item.sha256 == canonical.sha256 else (
+                f"pHash {hamming(item.phash, canonical.phash)}, dHash {hamming(item.dhash, canonical.dhash)}"
+            )
+            lines.append(
+                f"  = {item.path} ({item.width}x{item.height}, {item.size / 1024:.0f} KiB, {kind})"
+            )
+    if repoints:
+        lines.append("")
+        lines.append("products that could use the canonical file:")
+        for repoint in repoints:
+            lines.append(f"  {repoint.product_id}: {repoint.image} -> {repoint.canonical}")
+    wasted = sum(cluster.wasted_bytes for cluster in clusters)
+    duplicates = sum(len(cluster.duplicates) for cluster in clusters)
+    lines.append(
+        f"{scanned} images, {len(clusters)} clusters, {duplicates} redundant copies "
+        f"({wasted / 1e6:.1f} MB), {len(repoints)} products to repoint"
+    )
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--public", type=Path, default=PUBLIC_DIR)
+    parser.add_argument("--products", type=Path, default=PRODUCTS_PATH)
+    parser.add_argument("--cache", type=Path, default=CACHE_PATH)
+    parser.add_argument(
+        "--distance",
+        type=int,
+        default=DEFAULT_DISTANCE,
+        help=f"max differing hash bits of 64 (default: {DEFAULT_DISTANCE})",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--json", type=Path, help="also write the report as JSON")
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    args.public = args.public.resolve()  # image paths are matched against it absolutely
+    with profile_run(args, "image_dedupe"):
+        with stage("scan"):
+            paths = discover(ROOT, args.public)
+        hashes, errors = hash_images(paths, load_cache(args.cache), ROOT, args.workers)
+        save_cache(args.cache, hashes)
+        with stage("cluster"):
+            referenced = [product.image for product in load_catalog(args.products)]
+            clusters = find_clusters(hashes, referenced, args.distance, args.public)
+            repoints = repoint_products(clusters, args.products, args.public)
+    print(format_report(clusters, repoints, len(hashes)))
+    for path, error in errors.items():
+        print(f"failed {path}: {error}")
+    if args.json is not None:
+        report = {
+            "clusters": [
+                {
+                    "canonical": cluster.canonical.path,
+                    "duplicates": [item.path for item in cluster.duplicates],
+                    "wastedBytes": cluster.wasted_bytes,
+                }
+                for cluster in clusters
+            ],
+            "repoint": [asdict(repoint) for repoint in repoints],
+            "errors": errors,
+        }
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Generate responsive WebP (and optionally AVIF) variants of catalog images.
+
+Every image referenced from `public/data/products.json` is resized to a fixed
+set of widths (never upscaled) under `public/images/variants/`, mirroring the
+source layout:
+
+    /images/gluten%20free/abc.jpeg -> /images/variants/gluten%20free/abc-640.webp
+
+Images are processed in worker processes. A manifest next to the variants
+records each source's size/mtime and SHA-256 along with the variants written,
+so unchanged images are skipped on the next run (stat first, hash only when
+the stat differs). Card generators read the manifest through
+`load_variant_manifest` and emit `srcset`/`sizes` with `responsive_img`.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from html import escape
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import unquote
+
+from PIL import Image, ImageOps
+
+from atomic_files import staged_file, write_atomic
+from catalog import Catalog, load_catalog
+from profiling import add_profile_arguments, profile_run, record, stage
+
+MANIFEST_VERSION = 1
+IMAGES_PREFIX = "/images/"
+VARIANTS_DIR = "variants"
+DEFAULT_WIDTHS = (320, 480, 640, 960)
+# Matches the menu grid: 3 columns up to min(1180px, 90vw), 2 below 1100px,
+# 1 below 680px.
+DEFAULT_SIZES = "(max-width: 680px) 90vw, (max-width: 1100px) 45vw, 380px"
+FORMATS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 6},
+    "avif": {"format": "AVIF", "quality": 55, "speed": 6},
+}
+MIME_TYPES = {"webp": "image/webp", "avif": "image/avif"}
+
+
+@dataclass
+class VariantResult:
+    url: str
+    status: str  # "up to date", "built" or "failed"
+    entry: Optional[Dict[str, Any]] = None
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_path(public: Path, url: str) -> Path:
+    return public / unquote(url).lstrip("/")
+
+
+def variant_manifest_path(public: Path) -> Path:
+    return public / IMAGES_PREFIX.strip("/") / VARIANTS_DIR / "manifest.json"
+
+
+def variant_url(url: str, width: int, fmt: str) -> str:
+    """URL of one variant; keeps the source URL's percent-encoding."""
+    relative = url[len(IMAGES_PREFIX):] if url.startswith(IMAGES_PREFIX) else url.lstrip("/")
+    stem = relative.rsplit(".", 1)[0]
+    return f"{IMAGES_PREFIX}{VARIANTS_DIR}/{stem}-{width}.{fmt}"
+
+
+def target_widths(source_width: int, widths: Sequence[int]) -> List[int]:
+    """Requested widths that don't upscale; at least the source width itself."""
+    fitting = [width for width in sorted(set(widths)) if width <= source_width]
+    return fitting or [source_width]
+
+
+def product_image_urls(catalog: Catalog) -> List[str]:
+    """Distinct local image URLs in catalog order."""
+    urls: Dict[str, None] = {}
+    for product in catalog:
+        if product.image.startswith(IMAGES_PREFIX):
+            urls.setdefault(product.image)
+    return list(urls)
+
+
+def _save_atomic(image: Image.Image, path: Path, options: Mapping[str, Any]) -> None:
+    with staged_file(path) as temp:
+        image.save(temp, **options)
+
+
+def _build_job(
+    public: Path, url: str, widths: Sequence[int], formats: Sequence[str]
+) -> VariantResult:
+    start = time.perf_counter()
+    source = source_path(public, url)
+    try:
+        stat = source.stat()
+        sha256 = file_sha256(source)
+        with Image.open(source) as opened:
+            image = ImageOps.exif_transpose(opened)
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        width, height = image.size
+        variants: Dict[str, List[Dict[str, Any]]] = {fmt: [] for fmt in formats}
+        # Shrink from the previous (larger) result so each step resamples less.
+        current = image
+        for target in sorted(target_widths(width, widths), reverse=True):
+            size = (target, max(1, round(height * target / width)))
+            if current.size != size:
+                current = current.resize(size, resample=Image.Resampling.LANCZOS)
+            for fmt in formats:
+                url_out = variant_url(url, target, fmt)
+                _save_atomic(current, source_path(public, url_out), FORMATS[fmt])
+                variants[fmt].append({"width": target, "url": url_out})
+        for entries in variants.values():
+            entries.sort(key=lambda item: item["width"])
+        entry = {
+            "sha256": sha256,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "width": width,
+            "height": height,
+            "variants": variants,
+        }
+        return VariantResult(url, "built", entry, time.perf_counter() - start)
+    except Exception as exc:  # one broken image shouldn't stop the batch
+        return VariantResult(
+            url, "failed", seconds=time.perf_counter() - start, error=f"{type(exc).__name__}: {exc}"
+        )
+
+
+def load_variant_manifest(path: Path) -> Dict[str, Any]:
+    """The `images` mapping of a variant manifest, or {} when absent."""
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return dict(data.get("images", {}))
+
+
+def _is_up_to_date(
+    public: Path,
+    url: str,
+    entry: Optional[Mapping[str, Any]],
+    widths: Sequence[int],
+    formats: Sequence[str],
+) -> bool:
+    if entry is None or sorted(entry.get("variants", {})) != sorted(formats):
+        return False
+    expected = target_widths(entry["width"], widths)
+    for variants in entry["variants"].values():
+        if [item["width"] for item in variants] != expected:
+            return False
+        if not all(source_path(public, item["url"]).exists() for item in variants):
+            return False
+    stat = source_path(public, url).stat()
+    if stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]:
+        return True
+    # Touched but maybe identical; the caller refreshes the stored stat.
+    return file_sha256(source_path(public, url)) == entry["sha256"]
+
+
+def build_variants(
+    public: Path,
+    urls: Sequence[str],
+    manifest_path: Path,
+    widths: Sequence[int] = DEFAULT_WIDTHS,
+    formats: Sequence[str] = ("webp",),
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> List[VariantResult]:
+    """
+    Build missing or stale variants for `urls` and rewrite the manifest.
+
+    Results keep input order; images are spread over `workers` processes
+    (default: one per core; 1 runs in-process).
+    """
+    previous = load_variant_manifest(manifest_path)
+    results: Dict[int, VariantResult] = {}
+    pending: List[Tuple[int, str]] = []
+    for index, url in enumerate(urls):
+        entry = previous.get(url)
+        try:
+            fresh = not force and _is_up_to_date(public, url, entry, widths, formats)
+        except OSError as exc:
+            results[index] = VariantResult(url, "failed", error=f"{type(exc).__name__}: {exc}")
+            continue
+        if fresh:
+            stat = source_path(public, url).stat()
+            entry = dict(entry, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            results[index] = VariantResult(url, "up to date", entry)
+        else:
+            pending.append((index, url))
+
+    if workers == 1 or len(pending) <= 1:
+        for index, url in pending:
+            with stage(f"image {unquote(url)}"):
+                results[index] = _build_job(public, url, widths, formats)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_build_job, public, url, widths, formats): index
+                for index, url in pending
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as exc:  # worker died (e.g. out of memory)
+                    results[index] = VariantResult(
+                        urls[index], "failed", error=f"{type(exc).__name__}: {exc}"
+                    )
+                record(f"image {unquote(urls[index])}", results[index].seconds, worker=True)
+
+    ordered = [results[index] for index in range(len(urls))]
+    images = {result.url: result.entry for result in ordered if result.entry is not None}
+    # Keep entries of images that failed this run so their old variants still resolve.
+    for result in ordered:
+        if result.entry is None and result.url in previous:
+            images[result.url] = previous[result.url]
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "widths": list(widths),
+        "formats": list(formats),
+        "sizes": DEFAULT_SIZES,
+        "images": images,
+    }
+    write_atomic(manifest_path, json.dumps(manifest, indent=2))
+    return ordered
+
+
+def srcset(variants: Sequence[Mapping[str, Any]]) -> str:
+    return ", ".join(f"{item['url']} {item['width']}w" for item in variants)
+
+
+def responsive_img(
+    src: str,
+    alt: str,
+    entry: Optional[Mapping[str, Any]] = None,
+    sizes: str = DEFAULT_SIZES,
+    extra: str = ' loading="lazy"',
+) -> str:
+    """
+    Markup for one catalog image; `src`/`alt` must already be escaped.
+
+    WebP goes straight into `srcset`. When AVIF variants exist the image is
+    wrapped in `<picture>` so browsers without AVIF fall back to WebP.
+    """
+    if not entry:
+        return f'<img src="{src}" alt="{alt}"{extra}>'
+    variants = entry.get("variants", {})
+    size_attrs = f' sizes="{escape(sizes)}"'
+    webp = variants.get("webp")
+    img_srcset = f' srcset="{escape(srcset(webp))}"{size_attrs}' if webp else ""
+    dimensions = f' width="{entry["width"]}" height="{entry["height"]}"'
+    img = f'<img src="{src}"{img_srcset}{dimensions} alt="{alt}"{extra}>'
+    avif = variants.get("avif")
+    if not avif:
+        return img
+    return (
+        f'<picture><source type="{MIME_TYPES["avif"]}" '
+        f'srcset="{escape(srcset(avif))}"{size_attrs}>{img}</picture>'
+    )
+
+
+def format_report(results: Sequence[VariantResult], wall_seconds: float) -> str:
+    lines = []
+    for result in results:
+        detail = f"  {result.error}" if result.error else ""
+        lines.append(f"{result.status:<11}{result.seconds:8.2f}s  {unquote(result.url)}{detail}")
+    built = sum(result.status == "built" for result in results)
+    failed = sum(result.status == "failed" for result in results)
+    lines.append(
+        f"{built} built, {len(results) - built - failed} up to date, {failed} failed "
+        f"in {wall_seconds:.2f}s wall"
+    )
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    root = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--public", type=Path, default=root / "public")
+    parser.add_argument(
+        "--products", type=Path, default=root / "public" / "data" / "products.json"
+    )
+    parser.add_argument("--widths", type=int, nargs="+", default=list(DEFAULT_WIDTHS))
+    parser.add_argument("--avif", action="store_true", help="also write AVIF variants")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="worker processes (default: one per core)"
+    )
+    parser.add_argument("--force", action="store_true", help="rebuild every variant")
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    formats = ("webp", "avif") if args.avif else ("webp",)
+    manifest = variant_manifest_path(args.public)
+    start = time.perf_counter()
+    with profile_run(args, "image_variants"):
+        results = build_variants(
+            args.public,
+            product_image_urls(load_catalog(args.products)),
+            manifest,
+            widths=args.widths,
+            formats=formats,
+            workers=args.workers,
+            force=args.force,
+        )
+    print(format_report(results, time.perf_counter() - start))
+    if any(result.error is not None for result in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
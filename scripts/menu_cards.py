@@ -0,0 +1,211 @@
+"""
+Linear-time tokenizer for the product cards in `pages/menu.html`.
+
+`iter_cards` runs `html.parser.HTMLParser` over the page once and yields a
+`Card` per `<article class="product-card">` with the fields the card
+scripts need (badge, category overlay, name, price, quick-view and cart
+names) plus the source offsets of the pieces they rewrite. Edits are then
+applied with `apply_edits` in a single pass, so a run stays O(page size)
+whether or not a card matches the expected layout.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+Span = Tuple[int, int]
+Edit = Tuple[int, int, str]
+
+# Elements whose text is captured, keyed by (tag, class) -> Card attribute.
+_TEXT_FIELDS = {
+    ("h3", None): "name",
+    ("p", "product-price"): "price",
+    ("span", "product-badge"): "badge",
+    ("span", "product-category-overlay"): "overlay",
+}
+# Divs whose full span (open tag to end of close tag) is recorded.
+_DIV_SPANS = {
+    "product-media": "media",
+    "product-actions-overlay": "actions_overlay",
+    "product-actions": "actions",
+    "product-info": "info",
+}
+
+
+@dataclass
+class Card:
+    """One product card; spans are `[start, end)` offsets into the page."""
+
+    span: Span = (0, 0)
+    open_tag: str = ""
+    badge: Optional[str] = None
+    badge_class: Optional[str] = None
+    badge_span: Optional[Span] = None
+    overlay: Optional[str] = None
+    overlay_span: Optional[Span] = None
+    name: Optional[str] = None
+    price: Optional[str] = None
+    quickview: Optional[str] = None
+    add_to_cart: Optional[str] = None
+    img_span: Optional[Span] = None
+    img_lazy: bool = False
+    media: Optional[Span] = None
+    actions_overlay: Optional[Span] = None
+    actions: Optional[Span] = None
+    info: Optional[Span] = None
+    # Offsets of the `</div>` that closes `media` / `info`.
+    media_close: Optional[int] = None
+    info_close: Optional[int] = None
+    # `</div>` tags with no open div left inside the card.
+    stray_closes: List[Span] = field(default_factory=list)
+
+
+def _classes(attrs: Sequence[Tuple[str, Optional[str]]]) -> List[str]:
+    for name, value in attrs:
+        if name == "class" and value:
+            return value.split()
+    return []
+
+
+class CardParser(HTMLParser):
+    """Collects `Card`s; feed the whole page, then read `cards`."""
+
+    def __init__(self, text: str) -> None:
+        super().__init__(convert_charrefs=False)
+        self.text = text
+        self._line_starts = [0]
+        start = text.find("\n")
+        while start != -1:
+            self._line_starts.append(start + 1)
+            start = text.find("\n", start + 1)
+        self.cards: List[Card] = []
+        self._card: Optional[Card] = None
+        self._divs: List[Tuple[Optional[str], int]] = []
+        self._capture: Optional[Tuple[str, str]] = None
+        self._buffer: List[str] = []
+
+    def parse(self) -> List[Card]:
+        self.feed(self.text)
+        self.close()
+        return self.cards
+
+    def _offset(self) -> int:
+        line, column = self.getpos()
+        return self._line_starts[line - 1] + column
+
+    def _end_of_tag(self, start: int) -> int:
+        return self.text.index(">", start) + 1
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        classes = _classes(attrs)
+        start = self._offset()
+        if tag == "article" and "product-card" in classes:
+            self._card = Card(span=(start, start), open_tag=self.get_starttag_text() or "")
+            self._divs = []
+            return
+        card = self._card
+        if card is None:
+            return
+        if tag == "div":
+            role = next((_DIV_SPANS[name] for name in classes if name in _DIV_SPANS), None)
+            self._divs.append((role, start))
+        elif tag == "img":
+            end = start + len(self.get_starttag_text() or "")
+            card.img_span = (start, end)
+            card.img_lazy = any(name == "loading" and value == "lazy" for name, value in attrs)
+        elif tag == "button":
+            for name, value in attrs:
+                if name == "data-quickview" and card.quickview is None:
+                    card.quickview = value
+                elif name == "data-add-to-cart" and card.add_to_cart is None:
+                    card.add_to_cart = value
+        key = (tag, classes[0] if classes else None)
+        if tag == "h3":
+            key = ("h3", None)
+        target = _TEXT_FIELDS.get(key)
+        if target is not None:
+            self._capture = (target, tag)
+            self._buffer = []
+            if target == "badge":
+                card.badge_class = " ".join(classes)
+            if target in ("badge", "overlay"):
+                setattr(card, f"{target}_span", (start, start))
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        # `<img ... />` never opens a div, so the start-tag handling is enough.
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag: str) -> None:
+        card = self._card
+        if card is None:
+            return
+        start = self._offset()
+        end = self._end_of_tag(start)
+        if self._capture is not None and self._capture[1] == tag:
+            target = self._capture[0]
+            setattr(card, target, "".join(self._buffer).strip())
+            if target in ("badge", "overlay"):
+                span_start = getattr(card, f"{target}_span")[0]
+                setattr(card, f"{target}_span", (span_start, end))
+            self._capture = None
+        if tag == "div":
+            if not self._divs:
+                card.stray_closes.append((start, end))
+                return
+            role, open_at = self._divs.pop()
+            if role is not None and getattr(card, role) is None:
+                setattr(card, role, (open_at, end))
+                if role in ("media", "info"):
+                    setattr(card, f"{role}_close", start)
+        elif tag == "article":
+            card.span = (card.span[0], end)
+            self.cards.append(card)
+            self._card = None
+
+    def handle_data(self, data: str) -> None:
+        if self._capture is not None:
+            self._buffer.append(data)
+
+    def handle_entityref(self, name: str) -> None:
+        self.handle_data(f"&{name};")
+
+    def handle_charref(self, name: str) -> None:
+        self.handle_data(f"&#{name};")
+
+
+def iter_cards(text: str) -> Iterator[Card]:
+    yield from CardParser(text).parse()
+
+
+def apply_edits(text: str, edits: Iterable[Edit]) -> str:
+    """Apply non-overlapping `(start, end, replacement)` edits in one pass."""
+    parts: List[str] = []
+    pos = 0
+    for start, end, replacement in sorted(edits, key=lambda edit: edit[:2]):
+        if start < pos:
+            raise ValueError(f"Overlapping edit at offset {start}")
+        parts.append(text[pos:start])
+        parts.append(replacement)
+        pos = end
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def line_indent(text: str, offset: int) -> str:
+    """Leading whitespace of the line containing `offset`."""
+    line_start = text.rfind("\n", 0, offset) + 1
+    end = line_start
+    while end < len(text) and text[end] in " \t":
+        end += 1
+    return text[line_start:end]
+
+
+def strip_leading_whitespace(text: str, span: Span) -> Span:
+    """Widen `span` left over the whitespace (and newline) that precedes it."""
+    start = span[0]
+    while start > 0 and text[start - 1] in " \t":
+        start -= 1
+    if start > 0 and text[start - 1] == "\n":
+        start -= 1
+    return start, span[1]
@@ -0,0 +1,362 @@
+"""
+Binary glTF (GLB) export for the meshes `colorize_obj` writes.
+
+The OBJ + MTL + PNG trio costs the browser three requests and a text parse.
+`export_glb` packs the same mesh into a single `.glb` next to the OBJ:
+
+- positions and the planar XZ UVs (recomputed exactly as `colorize_obj`
+  writes them, with V flipped for glTF's top-left origin),
+- triangle indices (uint16 when the mesh has at most 65535 vertices),
+- one material whose base colour texture is the palette PNG from
+  `create_palette_textures`, either embedded in the binary chunk or
+  referenced by its relative URI.
+
+With `quantize`, the mesh uses KHR_mesh_quantization. Positions are stored
+as int16 on a uniform grid around the mesh centre, and the node's
+translation/scale map them back, so the error stays within half a grid
+step. UVs are stored as normalized uint16. Positions and UVs then take 12
+bytes per vertex instead of 20.
+
+Everything is written with NumPy and `struct`; `load_glb` reads a file
+back into float arrays and is what the parse-time numbers measure.
+
+    python scripts/mesh_gltf.py lwli.obj la5ar.obj --quantize
+    python scripts/colorize_obj.py --glb --glb-quantize   # as part of the rewrite
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+import numpy as np
+
+from atomic_files import write_atomic
+from colorize_obj import ObjConfig, planar_uvs
+from mesh_lod import first_material, load_mesh, mesh_bounds
+from profiling import add_profile_arguments, profile_run, stage
+
+GLB_MAGIC = b"glTF"
+GLB_VERSION = 2
+CHUNK_JSON = b"JSON"
+CHUNK_BIN = b"BIN\x00"
+QUANTIZATION = "KHR_mesh_quantization"
+IMAGE_TYPES = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg"}
+
+# glTF enums
+_BYTE_TYPES = {
+    np.dtype(np.int16): 5122,
+    np.dtype(np.uint16): 5123,
+    np.dtype(np.uint32): 5125,
+    np.dtype(np.float32): 5126,
+}
+_ARRAY_BUFFER = 34962
+_ELEMENT_ARRAY_BUFFER = 34963
+_LINEAR = 9729
+_LINEAR_MIPMAP_LINEAR = 9987
+_TRIANGLES = 4
+
+
+@dataclass(frozen=True)
+class GlbOptions:
+    quantize: bool = False
+    embed_texture: bool = True
+
+
+@dataclass
+class GlbReport:
+    path: Path
+    bytes: int
+    vertices: int
+    triangles: int
+    quantized: bool
+    texture_bytes: int = 0  # embedded texture, included in `bytes`
+    max_error: float = 0.0  # largest position error from quantization, in model units
+    seconds: float = 0.0
+
+
+def glb_path(path: Path) -> Path:
+    return path.with_suffix(".glb")
+
+
+def quantize_positions(positions: np.ndarray) -> Tuple[np.ndarray, List[float], float]:
+    """int16 grid coordinates, the grid centre and its (uniform) step."""
+    low, high = positions.min(axis=0), positions.max(axis=0)
+    centre = (low + high) / 2
+    step = float((high - low).max()) / 2 / 32767 or 1.0
+    grid = np.rint((positions - centre) / step).astype(np.int16)
+    return grid, centre.tolist(), step
+
+
+class _BufferBuilder:
+    """The BIN chunk plus its bufferViews, every view 4-byte aligned."""
+
+    def __init__(self) -> None:
+        self.parts: List[bytes] = []
+        self.length = 0
+        self.views: List[Dict[str, Any]] = []
+
+    def add(self, data: bytes, target: Optional[int] = None, stride: Optional[int] = None) -> int:
+        pad = -self.length % 4
+        if pad:
+            self.parts.append(b"\x00" * pad)
+            self.length += pad
+        view: Dict[str, Any] = {"buffer": 0, "byteOffset": self.length, "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        if stride is not None:
+            view["byteStride"] = stride
+        self.parts.append(data)
+        self.length += len(data)
+        self.views.append(view)
+        return len(self.views) - 1
+
+    def data(self) -> bytes:
+        return b"".join(self.parts) + b"\x00" * (-self.length % 4)
+
+
+def _accessor(view: int, array: np.ndarray, kind: str, **extra: Any) -> Dict[str, Any]:
+    return {
+        "bufferView": view,
+        "componentType": _BYTE_TYPES[array.dtype],
+        "count": len(array),
+        "type": kind,
+        **extra,
+    }
+
+
+def build_glb(
+    positions: np.ndarray,
+    uvs: np.ndarray,
+    triangles: np.ndarray,
+    material_name: str,
+    texture: Optional[Path] = None,
+    texture_uri: Optional[str] = None,
+    quantize: bool = False,
+) -> Tuple[bytes, float]:
+    """
+    A GLB holding one textured mesh, and the largest quantization error.
+    `texture` is embedded when given; otherwise `texture_uri` (if any) is
+    referenced.
+    """
+    buffer = _BufferBuilder()
+    gltf: Dict[str, Any] = {"asset": {"version": "2.0", "generator": "colorize_obj"}}
+    node: Dict[str, Any] = {"mesh": 0, "name": material_name}
+    max_error = 0.0
+
+    texcoords = np.empty_like(uvs)
+    texcoords[:, 0] = uvs[:, 0]
+    texcoords[:, 1] = 1.0 - uvs[:, 1]  # glTF UVs start at the top-left
+    if quantize:
+        grid, centre, step = quantize_positions(positions)
+        max_error = float(np.abs(grid * step + centre - positions).max(initial=0.0))
+        padded = np.zeros((len(grid), 4), dtype=np.int16)  # vertex attributes need 4-byte strides
+        padded[:, :3] = grid
+        position = _accessor(
+            buffer.add(padded.tobytes(), _ARRAY_BUFFER, stride=8),
+            grid,
+            "VEC3",
+            min=grid.min(axis=0).tolist(),
+            max=grid.max(axis=0).tolist(),
+        )
+        uv_array = np.rint(np.clip(texcoords, 0.0, 1.0) * 65535).astype(np.uint16)
+        uv = _accessor(
+            buffer.add(uv_array.tobytes(), _ARRAY_BUFFER), uv_array, "VEC2", normalized=True
+        )
+        node.update(translation=centre, scale=[step] * 3)
+        gltf["extensionsUsed"] = gltf["extensionsRequired"] = [QUANTIZATION]
+    else:
+        floats = np.ascontiguousarray(positions, dtype=np.float32)
+        position = _accessor(
+            buffer.add(floats.tobytes(), _ARRAY_BUFFER),
+            floats,
+            "VEC3",
+            min=floats.min(axis=0).tolist(),
+            max=floats.max(axis=0).tolist(),
+        )
+        uv_array = np.ascontiguousarray(texcoords, dtype=np.float32)
+        uv = _accessor(buffer.add(uv_array.tobytes(), _ARRAY_BUFFER), uv_array, "VEC2")
+
+    index_type = np.uint16 if len(positions) <= 0xFFFF else np.uint32  # 0xFFFF is the restart value
+    indices = np.ascontiguousarray(triangles, dtype=index_type).ravel()
+    index = _accessor(buffer.add(indices.tobytes(), _ELEMENT_ARRAY_BUFFER), indices, "SCALAR")
+
+    material: Dict[str, Any] = {
+        "name": material_name,
+        "pbrMetallicRoughness": {"metallicFactor": 0.0, "roughnessFactor": 1.0},
+    }
+    if texture is not None or texture_uri is not None:
+        if texture is not None:
+            mime = IMAGE_TYPES.get(texture.suffix.lower())
+            if mime is None:
+                raise ValueError(f"glTF cannot embed {texture.suffix} textures")
+            image = {"bufferView": buffer.add(texture.read_bytes()), "mimeType": mime}
+        else:
+            image = {"uri": texture_uri}
+        gltf["images"] = [image]
+        gltf["samplers"] = [{"magFilter": _LINEAR, "minFilter": _LINEAR_MIPMAP_LINEAR}]
+        gltf["textures"] = [{"sampler": 0, "source": 0}]
+        material["pbrMetallicRoughness"]["baseColorTexture"] = {"index": 0}
+
+    binary = buffer.data()
+    gltf.update(
+        scene=0,
+        scenes=[{"nodes": [0]}],
+        nodes=[node],
+        meshes=[
+            {
+                "name": material_name,
+                "primitives": [
+                    {
+                        "attributes": {"POSITION": 0, "TEXCOORD_0": 1},
+                        "indices": 2,
+                        "material": 0,
+                        "mode": _TRIANGLES,
+                    }
+                ],
+            }
+        ],
+        materials=[material],
+        accessors=[position, uv, index],
+        bufferViews=buffer.views,
+        buffers=[{"byteLength": len(binary)}],
+    )
+    header = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+    header += b" " * (-len(header) % 4)  # the JSON chunk is padded with spaces
+    length = 12 + 8 + len(header) + 8 + len(binary)
+    glb = b"".join(
+        [
+            struct.pack("<4sII", GLB_MAGIC, GLB_VERSION, length),
+            struct.pack("<I4s", len(header), CHUNK_JSON),
+            header,
+            struct.pack("<I4s", len(binary), CHUNK_BIN),
+            binary,
+        ]
+    )
+    return glb, max_error
+
+
+def load_glb(path: Path) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Float positions `(N, 3)`, glTF UVs `(N, 2)` and triangles `(M, 3)` of a
+    GLB written by `build_glb`, undoing the quantization.
+    """
+    data = path.read_bytes()
+    magic, version, length = struct.unpack_from("<4sII", data)
+    if magic != GLB_MAGIC or version != GLB_VERSION or length != len(data):
+        raise ValueError(f"{path} is not a glTF 2.0 binary")
+    json_length, _ = struct.unpack_from("<I4s", data, 12)
+    gltf = json.loads(data[20 : 20 + json_length])
+    bin_start = 20 + json_length + 8
+    types = {code: dtype for dtype, code in _BYTE_TYPES.items()}
+    widths = {"SCALAR": 1, "VEC2": 2, "VEC3": 3}
+
+    def read(accessor_index: int) -> np.ndarray:
+        accessor = gltf["accessors"][accessor_index]
+        view = gltf["bufferViews"][accessor["bufferView"]]
+        dtype = types[accessor["componentType"]]
+        width = widths[accessor["type"]]
+        stride = view.get("byteStride", dtype.itemsize * width) // dtype.itemsize
+        offset = bin_start + view["byteOffset"]
+        array = np.frombuffer(data, dtype=dtype, count=accessor["count"] * stride, offset=offset)
+        array = array.reshape(-1, stride)[:, :width]
+        if accessor.get("normalized"):
+            return array / np.float32(np.iinfo(dtype).max)
+        return array
+
+    primitive = gltf["meshes"][0]["primitives"][0]
+    positions = read(primitive["attributes"]["POSITION"]).astype(np.float32)
+    node = gltf["nodes"][0]
+    if "scale" in node:
+        scale = np.float32(node["scale"][0])
+        positions = positions * scale + np.asarray(node["translation"], dtype=np.float32)
+    uvs = read(primitive["attributes"]["TEXCOORD_0"]).astype(np.float32, copy=False)
+    triangles = read(primitive["indices"]).reshape(-1, 3)
+    return positions, uvs, triangles
+
+
+def export_glb(path: Path, config: ObjConfig, options: GlbOptions = GlbOptions()) -> GlbReport:
+    """
+    Write `<stem>.glb` for an OBJ rewritten by `colorize_obj`, texturing it
+    with `config.texture_path` (relative to the OBJ, like the MTL's map_Kd).
+    """
+    start = time.perf_counter()
+    with stage("glb load", bytes_in=path.stat().st_size):
+        positions, triangles = load_mesh(path)
+    uvs = planar_uvs(positions, mesh_bounds(positions))
+    texture = path.parent / config.texture_path
+    if options.embed_texture and not texture.exists():
+        raise FileNotFoundError(f"Texture {texture} not found; build it or reference it instead")
+    with stage("glb pack"):
+        glb, max_error = build_glb(
+            positions,
+            uvs,
+            triangles,
+            config.material_name,
+            texture=texture if options.embed_texture else None,
+            texture_uri=quote(Path(config.texture_path).as_posix()),
+            quantize=options.quantize,
+        )
+    output = glb_path(path)
+    write_atomic(output, glb, mode_from=path)
+    return GlbReport(
+        output,
+        len(glb),
+        len(positions),
+        len(triangles),
+        options.quantize,
+        texture.stat().st_size if options.embed_texture else 0,
+        max_error,
+        time.perf_counter() - start,
+    )
+
+
+def format_report(report: GlbReport) -> str:
+    kind = "quantized" if report.quantized else "float"
+    texture = f", texture {report.texture_bytes / 1024:.0f} KiB" if report.texture_bytes else ""
+    error = f", max error {report.max_error:.3g}" if report.quantized else ""
+    return (
+        f"{report.path.name}: {report.bytes / 1024:.0f} KiB {kind}{texture}, "
+        f"{report.vertices} verts, {report.triangles} tris{error} ({report.seconds:.2f}s)"
+    )
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("meshes", type=Path, nargs="+", help="rewritten OBJ files")
+    parser.add_argument("--quantize", action="store_true", help=f"use {QUANTIZATION}")
+    parser.add_argument(
+        "--reference-texture",
+        action="store_true",
+        help="reference the texture by URI instead of embedding it",
+    )
+    parser.add_argument(
+        "--texture-template",
+        default="assets/textures/{stem}_palette.png",
+        help="texture path relative to the OBJ; {stem} is the OBJ name",
+    )
+    parser.add_argument("--material", help="material name (default: the OBJ's first usemtl)")
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    options = GlbOptions(quantize=args.quantize, embed_texture=not args.reference_texture)
+    with profile_run(args, "mesh_gltf"):
+        for path in args.meshes:
+            with stage(f"mesh {path.name}"):
+                config = ObjConfig(
+                    texture_path=args.texture_template.format(stem=path.stem),
+                    material_name=args.material or first_material(path),
+                )
+                print(format_report(export_glb(path, config, options)))
+
+
+if __name__ == "__main__":
+    main()
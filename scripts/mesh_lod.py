@@ -0,0 +1,465 @@
+"""
+Level-of-detail variants for the colorized OBJ models.
+
+Each mesh is simplified with quadric-error-metric edge collapses (Garland &
+Heckbert): every vertex carries the summed plane quadrics of its faces,
+and the edge whose collapse adds the least squared distance to those
+planes is merged first, into the position that minimises the error. Open
+boundaries get extra perpendicular planes so silhouettes hold. Collapses
+that would flip a triangle are skipped.
+
+One decimation pass produces every level, snapshotting the mesh as it
+crosses each triangle budget. Each level is written next to the source
+OBJ and shares its MTL. UVs are recomputed with the same planar XZ
+projection as `colorize_obj`, using the full mesh's bounds, so the texture
+stays put on every level:
+
+    pastry.obj          # level 0 (the rewritten source)
+    pastry.lod1.obj     # 50% of the triangles
+    pastry.lod2.obj     # 20%
+    pastry.lod3.obj     # 5%
+    pastry.lod.json     # {"levels": [{"file", "ratio", "triangles", ...}, ...]}
+
+Levels in the manifest go from finest to coarsest, so a client can fetch the
+last one first and swap in finer ones as they arrive. The collapse loop is
+pure Python over a heap and is meant for web-sized models (up to a few
+hundred thousand triangles).
+
+    python scripts/mesh_lod.py lwli.obj la5ar.obj --ratios 1 0.5 0.2 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from atomic_files import write_atomic
+from colorize_obj import (
+    PlanarBounds,
+    format_uvs,
+    load_mesh_cache,
+    parse_face_block,
+    parse_vertex_block,
+    planar_uvs,
+)
+from profiling import add_profile_arguments, profile_run, stage
+
+MANIFEST_VERSION = 1
+DEFAULT_RATIOS = (1.0, 0.5, 0.2, 0.05)
+MIN_TRIANGLES = 4
+BOUNDARY_WEIGHT = 100.0
+
+Quadric = List[float]  # a2 ab ac ad b2 bc bd c2 cd d2 of the symmetric 4x4
+
+
+@dataclass
+class LodLevel:
+    file: str
+    ratio: float
+    triangles: int
+    vertices: int
+    bytes: int = 0
+    error: float = 0.0  # sqrt of the largest collapse cost, in model units
+
+
+@dataclass
+class LodResult:
+    path: Path
+    levels: List[LodLevel] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+def load_mesh(path: Path) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Positions `(N, 3)` and zero-based triangles `(M, 3)` of an OBJ. Polygons
+    are fan-triangulated. The `.meshcache` sidecar is used when it matches.
+    """
+    cached = load_mesh_cache(path)
+    if cached is not None:
+        positions = np.asarray(cached.positions, dtype=np.float64)
+        indices = np.asarray(cached.indices, dtype=np.int64)
+        face_sizes = np.asarray(cached.face_sizes, dtype=np.int64)
+    else:
+        vertex_lines: List[str] = []
+        face_lines: List[str] = []
+        with path.open() as source:
+            for line in source:
+                if line.startswith("v "):
+                    vertex_lines.append(line)
+                elif line.startswith("f "):
+                    face_lines.append(line)
+        if not vertex_lines or not face_lines:
+            raise ValueError(f"{path} has no faces to simplify")
+        positions = parse_vertex_block(vertex_lines)
+        indices, face_sizes = parse_face_block(face_lines)
+        indices = np.where(indices < 0, len(positions) + indices, indices - 1)
+    if indices.size and (indices.min() < 0 or indices.max() >= len(positions)):
+        raise ValueError(f"{path} has faces referencing missing vertices")
+    return positions, triangulate(indices, face_sizes)
+
+
+def triangulate(indices: np.ndarray, face_sizes: np.ndarray) -> np.ndarray:
+    """Fan-triangulate flat polygon `indices` into an `(M, 3)` array."""
+    starts = np.cumsum(face_sizes) - face_sizes
+    fans = np.maximum(face_sizes - 2, 0)
+    first = np.repeat(starts, fans)
+    local = np.arange(int(fans.sum())) - np.repeat(np.cumsum(fans) - fans, fans) + 1
+    return np.stack(
+        [indices[first], indices[first + local], indices[first + local + 1]], axis=1
+    )
+
+
+def mesh_bounds(positions: np.ndarray) -> PlanarBounds:
+    """The XZ bounds `colorize_obj.vertex_bounds` would compute for `positions`."""
+    xmin, zmin = float(positions[:, 0].min()), float(positions[:, 2].min())
+    return PlanarBounds(
+        xmin=xmin,
+        zmin=zmin,
+        x_range=float(positions[:, 0].max()) - xmin or 1.0,
+        z_range=float(positions[:, 2].max()) - zmin or 1.0,
+    )
+
+
+def _plane_quadrics(planes: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """`(K, 10)` packed quadrics of planes `(a, b, c, d)` scaled by `weights`."""
+    a, b, c, d = planes.T
+    return weights[:, None] * np.stack(
+        [a * a, a * b, a * c, a * d, b * b, b * c, b * d, c * c, c * d, d * d], axis=1
+    )
+
+
+def vertex_quadrics(positions: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+    """Area-weighted face quadrics summed per vertex, plus boundary constraints."""
+    p0, p1, p2 = (positions[triangles[:, corner]] for corner in range(3))
+    normals = np.cross(p1 - p0, p2 - p0)
+    double_area = np.linalg.norm(normals, axis=1)
+    valid = double_area > 0
+    unit = np.zeros_like(normals)
+    unit[valid] = normals[valid] / double_area[valid, None]
+    planes = np.column_stack([unit, -(unit * p0).sum(axis=1)])
+    face_q = _plane_quadrics(planes, double_area / 2)
+
+    quadrics = np.zeros((len(positions), 10))
+    for corner in range(3):
+        np.add.at(quadrics, triangles[:, corner], face_q)
+
+    # Boundary edges (used by one triangle) get a plane through the edge,
+    # perpendicular to the face, so open rims are not eaten away.
+    edges = np.concatenate([triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]])
+    owner = np.tile(np.arange(len(triangles)), 3)
+    keys = np.sort(edges, axis=1)
+    _, inverse, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+    boundary = counts[inverse.ravel()] == 1
+    if boundary.any():
+        start, end = positions[edges[boundary, 0]], positions[edges[boundary, 1]]
+        direction = end - start
+        perpendicular = np.cross(direction, unit[owner[boundary]])
+        length = np.linalg.norm(perpendicular, axis=1)
+        keep = length > 0
+        perpendicular = perpendicular[keep] / length[keep, None]
+        planes = np.column_stack([perpendicular, -(perpendicular * start[keep]).sum(axis=1)])
+        weights = BOUNDARY_WEIGHT * (direction[keep] ** 2).sum(axis=1)
+        edge_q = _plane_quadrics(planes, weights)
+        np.add.at(quadrics, edges[boundary][keep, 0], edge_q)
+        np.add.at(quadrics, edges[boundary][keep, 1], edge_q)
+    return quadrics
+
+
+def _quadric_error(q: Quadric, x: float, y: float, z: float) -> float:
+    return (
+        q[0] * x * x + 2 * q[1] * x * y + 2 * q[2] * x * z + 2 * q[3] * x
+        + q[4] * y * y + 2 * q[5] * y * z + 2 * q[6] * y
+        + q[7] * z * z + 2 * q[8] * z
+        + q[9]
+    )
+
+
+def _optimal_position(
+    q: Quadric, a: Sequence[float], b: Sequence[float]
+) -> Tuple[float, float, float, float]:
+    """Position minimising `q` (or the best of the endpoints/midpoint) and its cost."""
+    a2, ab, ac, ad, b2, bc, bd, c2, cd, _ = q
+    det = a2 * (b2 * c2 - bc * bc) - ab * (ab * c2 - bc * ac) + ac * (ab * bc - b2 * ac)
+    scale = max(abs(a2), abs(b2), abs(c2)) ** 3
+    if abs(det) > 1e-10 * scale and scale > 0:
+        # Cramer's rule for A v = -(ad, bd, cd).
+        rx, ry, rz = -ad, -bd, -cd
+        x = (rx * (b2 * c2 - bc * bc) - ab * (ry * c2 - bc * rz) + ac * (ry * bc - b2 * rz)) / det
+        y = (a2 * (ry * c2 - rz * bc) - rx * (ab * c2 - bc * ac) + ac * (ab * rz - ry * ac)) / det
+        z = (a2 * (b2 * rz - bc * ry) - ab * (ab * rz - ry * ac) + rx * (ab * bc - b2 * ac)) / det
+        return x, y, z, _quadric_error(q, x, y, z)
+    candidates = (
+        a,
+        b,
+        ((a[0] + b[0]) / 2, (a[1] + b[1]) / 2, (a[2] + b[2]) / 2),
+    )
+    best = min(candidates, key=lambda p: _quadric_error(q, *p))
+    return best[0], best[1], best[2], _quadric_error(q, *best)
+
+
+def _normal(a: Sequence[float], b: Sequence[float], c: Sequence[float]) -> Tuple[float, float, float]:
+    ux, uy, uz = b[0] - a[0], b[1] - a[1], b[2] - a[2]
+    vx, vy, vz = c[0] - a[0], c[1] - a[1], c[2] - a[2]
+    return uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+
+
+class Decimator:
+    """
+    Incremental QEM edge collapse over a triangle mesh.
+
+    `simplify(target)` collapses edges until at most `target` triangles are
+    left (or nothing can collapse); call it with decreasing targets and take
+    a `snapshot()` after each to get nested levels from a single pass.
+    """
+
+    def __init__(self, positions: np.ndarray, triangles: np.ndarray) -> None:
+        self.positions: List[List[float]] = positions.tolist()
+        self.quadrics: List[Quadric] = vertex_quadrics(positions, triangles).tolist()
+        self.faces: List[List[int]] = triangles.tolist()
+        self.alive = bytearray(b"\x01") * len(self.faces)
+        self.live = len(self.faces)
+        self.version = [0] * len(self.positions)
+        self.vertex_faces: List[Set[int]] = [set() for _ in self.positions]
+        for index, face in enumerate(self.faces):
+            if face[0] == face[1] or face[1] == face[2] or face[0] == face[2]:
+                self.alive[index] = 0
+                self.live -= 1
+                continue
+            for vertex in face:
+                self.vertex_faces[vertex].add(index)
+        self.max_error = 0.0
+        self.heap: List[Tuple[float, int, int, int, int, float, float, float]] = []
+        edges = {
+            (min(a, b), max(a, b))
+            for index, face in enumerate(self.faces)
+            if self.alive[index]
+            for a, b in ((face[0], face[1]), (face[1], face[2]), (face[2], face[0]))
+        }
+        for a, b in edges:
+            self._push(a, b)
+        heapq.heapify(self.heap)
+
+    def _push(self, a: int, b: int, heap_push: bool = False) -> None:
+        q = [qa + qb for qa, qb in zip(self.quadrics[a], self.quadrics[b])]
+        x, y, z, cost = _optimal_position(q, self.positions[a], self.positions[b])
+        entry = (max(cost, 0.0), a, b, self.version[a], self.version[b], x, y, z)
+        if heap_push:
+            heapq.heappush(self.heap, entry)
+        else:
+            self.heap.append(entry)
+
+    def _flips(self, keep: int, drop: int, target: Sequence[float], shared: Set[int]) -> bool:
+        """True if moving `keep`/`drop` to `target` would fold a surviving face."""
+        positions = self.positions
+        for vertex in (keep, drop):
+            for index in self.vertex_faces[vertex]:
+                if index in shared:
+                    continue
+                corners = [positions[v] for v in self.faces[index]]
+                before = _normal(*corners)
+                moved = [target if v in (keep, drop) else positions[v] for v in self.faces[index]]
+                after = _normal(*moved)
+                dot = before[0] * after[0] + before[1] * after[1] + before[2] * after[2]
+                if dot <= 0:
+                    return True
+        return False
+
+    def _collapse(self, keep: int, drop: int, target: Sequence[float]) -> None:
+        shared = self.vertex_faces[keep] & self.vertex_faces[drop]
+        for index in shared:
+            self.alive[index] = 0
+            self.live -= 1
+            for vertex in self.faces[index]:
+                if vertex != keep and vertex != drop:
+                    self.vertex_faces[vertex].discard(index)
+        for index in self.vertex_faces[drop] - shared:
+            face = self.faces[index]
+            face[face.index(drop)] = keep
+            self.vertex_faces[keep].add(index)
+        self.vertex_faces[keep] -= shared
+        self.vertex_faces[drop] = set()
+        self.positions[keep] = list(target)
+        self.quadrics[keep] = [a + b for a, b in zip(self.quadrics[keep], self.quadrics[drop])]
+        self.version[keep] += 1
+        self.version[drop] += 1
+
+        neighbours = {v for index in self.vertex_faces[keep] for v in self.faces[index]}
+        neighbours.discard(keep)
+        for vertex in neighbours:
+            self._push(keep, vertex, heap_push=True)
+
+    def simplify(self, target: int) -> None:
+        heap = self.heap
+        while self.live > target and heap:
+            cost, a, b, version_a, version_b, x, y, z = heapq.heappop(heap)
+            if version_a != self.version[a] or version_b != self.version[b]:
+                continue  # stale: an endpoint moved since this edge was costed
+            if not self.vertex_faces[a] or not self.vertex_faces[b]:
+                continue
+            shared = self.vertex_faces[a] & self.vertex_faces[b]
+            if not shared:
+                continue  # the edge no longer exists
+            position = (x, y, z)
+            if self._flips(a, b, position, shared):
+                continue
+            self._collapse(a, b, position)
+            self.max_error = max(self.max_error, cost)
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Compacted `(positions, triangles)`; vertices keep their relative order."""
+        faces = np.array(
+            [face for index, face in enumerate(self.faces) if self.alive[index]], dtype=np.int64
+        ).reshape(-1, 3)
+        used = np.unique(faces)
+        remap = np.full(len(self.positions), -1, dtype=np.int64)
+        remap[used] = np.arange(used.size)
+        positions = np.array(self.positions, dtype=np.float64)[used]
+        return positions, remap[faces]
+
+
+def format_obj(
+    positions: np.ndarray,
+    uvs: np.ndarray,
+    triangles: np.ndarray,
+    mtllib_name: str,
+    material_name: str,
+    comment: str = "",
+) -> str:
+    parts = [f"# {comment}\n" if comment else "", f"mtllib {mtllib_name}\n"]
+    parts.append(("v %.6f %.6f %.6f\n" * len(positions)) % tuple(positions.ravel().tolist()))
+    parts.append(format_uvs(uvs))
+    parts.append(f"usemtl {material_name}\n")
+    corners = np.repeat(triangles + 1, 2, axis=1)
+    parts.append(("f %d/%d %d/%d %d/%d\n" * len(triangles)) % tuple(corners.ravel().tolist()))
+    return "".join(parts)
+
+
+def lod_path(path: Path, level: int) -> Path:
+    return path if level == 0 else path.with_name(f"{path.stem}.lod{level}.obj")
+
+
+def manifest_path(path: Path) -> Path:
+    return path.with_name(f"{path.stem}.lod.json")
+
+
+def build_lods(
+    path: Path, material_name: str, ratios: Sequence[float] = DEFAULT_RATIOS
+) -> LodResult:
+    """
+    Write one OBJ per ratio in `ratios` (of the source triangle count) plus
+    the LOD manifest. A ratio of 1 refers to `path` itself, which must
+    already be rewritten by `colorize_obj`.
+    """
+    start = time.perf_counter()
+    ratios = sorted({float(ratio) for ratio in ratios}, reverse=True)
+    if not ratios or ratios[-1] <= 0 or ratios[0] > 1:
+        raise ValueError(f"LOD ratios must be in (0, 1], got {ratios}")
+    with stage("lod load", bytes_in=path.stat().st_size):
+        positions, triangles = load_mesh(path)
+    bounds = mesh_bounds(positions)
+    mtllib_name = path.with_suffix(".mtl").name
+    result = LodResult(path)
+
+    with stage("lod quadrics"):
+        decimator = Decimator(positions, triangles)
+    levels = [ratio for ratio in ratios if ratio < 1]
+    if ratios[0] == 1:
+        result.levels.append(
+            LodLevel(path.name, 1.0, len(triangles), len(positions), path.stat().st_size)
+        )
+    for level, ratio in enumerate(levels, start=1):
+        target = max(MIN_TRIANGLES, round(len(triangles) * ratio))
+        with stage(f"lod {ratio:g}"):
+            decimator.simplify(target)
+            level_positions, level_triangles = decimator.snapshot()
+        text = format_obj(
+            level_positions,
+            planar_uvs(level_positions, bounds),
+            level_triangles,
+            mtllib_name,
+            material_name,
+            comment=f"LOD {level}: {ratio:g} of {path.name}",
+        )
+        output = lod_path(path, level)
+        write_atomic(output, text, mode_from=path)
+        result.levels.append(
+            LodLevel(
+                output.name,
+                ratio,
+                len(level_triangles),
+                len(level_positions),
+                len(text),
+                decimator.max_error ** 0.5,
+            )
+        )
+
+    # Drop levels left over from an earlier run with more ratios.
+    written = {level.file for level in result.levels}
+    for stale in path.parent.glob(f"{path.stem}.lod*.obj"):
+        if stale.name not in written:
+            stale.unlink()
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "source": path.name,
+        "mtllib": mtllib_name,
+        "material": material_name,
+        "levels": [asdict(level) for level in result.levels],
+    }
+    write_atomic(manifest_path(path), json.dumps(manifest, indent=2) + "\n", mode_from=path)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def format_report(results: Sequence[LodResult]) -> str:
+    lines = []
+    for result in results:
+        lines.append(f"{result.path} ({result.seconds:.2f}s)")
+        for level in result.levels:
+            lines.append(
+                f"  {level.file:<28}{level.ratio:6.0%}{level.triangles:10d} tris"
+                f"{level.vertices:10d} verts{level.bytes / 1024:10.0f} KiB  error {level.error:.4g}"
+            )
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("meshes", type=Path, nargs="+", help="rewritten OBJ files")
+    parser.add_argument(
+        "--ratios", type=float, nargs="+", default=list(DEFAULT_RATIOS), help="triangle budgets"
+    )
+    parser.add_argument(
+        "--material", help="material name (default: the OBJ's first usemtl)"
+    )
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def first_material(path: Path) -> str:
+    with path.open() as source:
+        for line in source:
+            if line.startswith("usemtl "):
+                return line.split(maxsplit=1)[1].strip()
+    return f"{path.stem}_texture"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    results: List[LodResult] = []
+    with profile_run(args, "mesh_lod"):
+        for path in args.meshes:
+            with stage(f"mesh {path.name}"):
+                material = args.material or first_material(path)
+                results.append(build_lods(path, material, args.ratios))
+    print(format_report(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Weld, clean and cache-order the meshes `colorize_obj` writes.
+
+Scanned and exported pastry models carry duplicate positions (one copy per
+face or UV seam) and triangles in whatever order the tool emitted them.
+`optimize_obj` rewrites a colorized OBJ in place:
+
+1. weld: exact duplicates are merged, then positions closer than `epsilon`
+   are joined using a spatial hash of `epsilon`-sized cells (each vertex is
+   checked against every vertex of its own and the 26 neighbouring cells,
+   all in NumPy). Triangles that collapse are dropped.
+2. vertices no triangle references are removed.
+3. triangles are reordered for the post-transform vertex cache with Tom
+   Forsyth's linear-speed algorithm (LRU cache of `CACHE_SIZE`).
+4. vertices are renumbered in first-use order, so vertex fetch is linear too.
+
+UVs travel with their vertices, and welded positions share the same planar
+UV, so the texture mapping is unchanged. Polygons are triangulated, and
+`o`/`g`/`s` lines after the vertex block are dropped since reordering mixes
+the groups anyway.
+The report gives vertex/triangle counts and the ACMR (average cache miss
+ratio: transformed vertices per triangle, lower is better, 0.5 is the ideal
+for large regular meshes) simulated on a `--fifo` entry FIFO cache.
+
+    python scripts/mesh_optimize.py lwli.obj la5ar.obj
+    python scripts/colorize_obj.py --optimize   # as part of the rewrite
+"""
+from __future__ import annotations
+
+import argparse
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from atomic_files import write_atomic
+from colorize_obj import PlanarBounds, parse_face_block, parse_vertex_block
+from mesh_lod import format_obj, mesh_bounds, triangulate
+from profiling import add_profile_arguments, profile_run, stage
+
+WELD_EPSILON = 1e-6
+CACHE_SIZE = 32  # LRU size the Forsyth scores are tuned for
+FIFO_SIZE = 16  # cache simulated for the ACMR report
+
+# Forsyth's scoring constants.
+_CACHE_DECAY_POWER = 1.5
+_LAST_TRIANGLE_SCORE = 0.75
+_VALENCE_BOOST_SCALE = 2.0
+_VALENCE_BOOST_POWER = 0.5
+_MAX_VALENCE = 64
+
+_CACHE_SCORES = [
+    _LAST_TRIANGLE_SCORE
+    if position < 3
+    else (1.0 - (position - 3) / (CACHE_SIZE - 3)) ** _CACHE_DECAY_POWER
+    for position in range(CACHE_SIZE)
+]
+_VALENCE_SCORES = [0.0] + [
+    _VALENCE_BOOST_SCALE * remaining**-_VALENCE_BOOST_POWER for remaining in range(1, _MAX_VALENCE)
+]
+
+
+@dataclass
+class ObjMesh:
+    header: List[str]  # lines before the first vertex, minus `mtllib`
+    positions: np.ndarray  # (N, 3) float64
+    uvs: np.ndarray  # (N, 2) float64, one per position
+    triangles: np.ndarray  # (M, 3) zero-based
+    mtllib: str
+    material: str
+
+
+@dataclass
+class OptimizeReport:
+    path: Path
+    vertices_before: int
+    vertices_after: int
+    triangles_before: int
+    triangles_after: int
+    acmr_before: float
+    acmr_after: float
+    bounds: PlanarBounds  # XZ bounds the UVs were computed with
+    bytes_before: int = 0
+    bytes_after: int = 0
+
+
+def read_obj(path: Path) -> ObjMesh:
+    """Load a colorized OBJ (`v`, matching `vt`, `f v/vt ...`) into arrays."""
+    header: List[str] = []
+    vertex_lines: List[str] = []
+    uv_lines: List[str] = []
+    face_lines: List[str] = []
+    mtllib = path.with_suffix(".mtl").name
+    material = f"{path.stem}_texture"
+    with path.open() as source:
+        for line in source:
+            if line.startswith("v "):
+                vertex_lines.append(line)
+            elif line.startswith("vt "):
+                uv_lines.append(line)
+            elif line.startswith("f "):
+                face_lines.append(line)
+            elif line.startswith("mtllib "):
+                mtllib = line.split(maxsplit=1)[1].strip()
+            elif line.startswith("usemtl "):
+                material = line.split(maxsplit=1)[1].strip()
+            elif not vertex_lines and not line.startswith(("vn ", "s ")):
+                header.append(line)
+    if not vertex_lines or not face_lines:
+        raise ValueError(f"{path} has no faces to optimize")
+    if len(uv_lines) != len(vertex_lines):
+        raise ValueError(f"{path} is not colorized: expected one vt per v")
+    positions = parse_vertex_block(vertex_lines)
+    uvs = np.loadtxt([line[3:] for line in uv_lines], comments=None, ndmin=2)
+    indices, face_sizes = parse_face_block(face_lines)
+    indices = np.where(indices < 0, len(positions) + indices, indices - 1)
+    if indices.size and (indices.min() < 0 or indices.max() >= len(positions)):
+        raise ValueError(f"{path} has faces referencing missing vertices")
+    return ObjMesh(header, positions, uvs, triangulate(indices, face_sizes), mtllib, material)
+
+
+def _cell_hash(cells: np.ndarray) -> np.ndarray:
+    """Spatial hash of integer grid cells (Teschner et al.); collisions are rare."""
+    return (
+        (cells[:, 0] * 73856093) ^ (cells[:, 1] * 19349663) ^ (cells[:, 2] * 83492791)
+    )
+
+
+def _close_pairs(positions: np.ndarray, epsilon: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Every pair `(i, j)`, `i < j`, of `positions` within `epsilon`, found by
+    comparing each point with every member of its own and the 26
+    neighbouring `epsilon`-sized grid cells. Candidates are always
+    distance-checked, so a hash collision only costs extra comparisons.
+    """
+    cells = np.floor((positions - positions.min(axis=0)) / epsilon).astype(np.int64)
+    keys = _cell_hash(cells)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+    bucket_keys = sorted_keys[starts]
+    bucket_sizes = np.diff(np.append(starts, len(keys)))
+
+    limit = epsilon * epsilon
+    firsts: List[np.ndarray] = []
+    seconds: List[np.ndarray] = []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            for dz in (-1, 0, 1):
+                neighbour = _cell_hash(cells + np.array([dx, dy, dz]))
+                slot = np.minimum(np.searchsorted(bucket_keys, neighbour), len(bucket_keys) - 1)
+                sizes = np.where(bucket_keys[slot] == neighbour, bucket_sizes[slot], 0)
+                # One (point, bucket member) row per member of the neighbouring bucket.
+                first = np.repeat(np.arange(len(positions)), sizes)
+                member = np.arange(first.size) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+                second = order[np.repeat(starts[slot], sizes) + member]
+                keep = first < second
+                first, second = first[keep], second[keep]
+                close = ((positions[first] - positions[second]) ** 2).sum(axis=1) <= limit
+                firsts.append(first[close])
+                seconds.append(second[close])
+    return np.concatenate(firsts), np.concatenate(seconds)
+
+
+def _components(count: int, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """Lowest index of each node's connected component (vectorized union-find)."""
+    labels = np.arange(count)
+    while True:
+        low = np.minimum(labels[first], labels[second])
+        merged = labels.copy()
+        np.minimum.at(merged, first, low)
+        np.minimum.at(merged, second, low)
+        while True:  # path compression: point every node at its root
+            rooted = merged[merged]
+            if np.array_equal(rooted, merged):
+                break
+            merged = rooted
+        if np.array_equal(merged, labels):
+            return labels
+        labels = merged
+
+
+def weld(positions: np.ndarray, epsilon: float = WELD_EPSILON) -> np.ndarray:
+    """
+    Map every vertex to the lowest index of its weld group. Exact duplicates
+    are grouped first; the distinct positions are then joined wherever two
+    of them lie within `epsilon`, and groups chain transitively (a-b and b-c
+    put a, b and c in one group).
+    """
+    count = len(positions)
+    if count == 0 or epsilon <= 0:
+        return np.arange(count)
+    unique, inverse = np.unique(positions, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    labels = _components(len(unique), *_close_pairs(unique, epsilon))
+    # Lowest original vertex index per group.
+    lowest = np.full(len(unique), count)
+    np.minimum.at(lowest, labels[inverse], np.arange(count))
+    return lowest[labels[inverse]]
+
+
+def drop_degenerate(triangles: np.ndarray) -> np.ndarray:
+    a, b, c = triangles.T
+    return triangles[(a != b) & (b != c) & (a != c)]
+
+
+def acmr(triangles: np.ndarray, cache_size: int = FIFO_SIZE) -> float:
+    """Average cache miss ratio of `triangles` on a FIFO post-transform cache."""
+    if len(triangles) == 0:
+        return 0.0
+    fifo: deque = deque()
+    cached = set()
+    misses = 0
+    for vertex in triangles.ravel().tolist():
+        if vertex in cached:
+            continue
+        misses += 1
+        fifo.append(vertex)
+        cached.add(vertex)
+        if len(fifo) > cache_size:
+            cached.discard(fifo.popleft())
+    return misses / len(triangles)
+
+
+def _vertex_score(cache_position: int, remaining: int) -> float:
+    if remaining == 0:
+        return -1.0
+    score = _CACHE_SCORES[cache_position] if 0 <= cache_position < CACHE_SIZE else 0.0
+    return score + _VALENCE_SCORES[min(remaining, _MAX_VALENCE - 1)]
+
+
+def forsyth_order(triangles: np.ndarray, vertex_count: int) -> np.ndarray:
+    """Triangle order from Tom Forsyth's linear-speed vertex cache optimisation."""
+    count = len(triangles)
+    if count == 0:
+        return np.arange(0)
+    flat = triangles.ravel()
+    valence = np.bincount(flat, minlength=vertex_count)
+    offsets = np.concatenate(([0], np.cumsum(valence)))
+    adjacency = (np.argsort(flat, kind="stable") // 3).tolist()
+    starts = offsets[:-1].tolist()
+    remaining = valence.tolist()  # also the live length of each adjacency run
+    tris = triangles.tolist()
+
+    vertex_score = [_vertex_score(-1, r) for r in remaining]
+    added = bytearray(count)
+    order: List[int] = []
+    cache: List[int] = []
+    best = max(range(count), key=lambda t: sum(vertex_score[v] for v in tris[t]))
+    scan = 0
+
+    while True:
+        order.append(best)
+        added[best] = 1
+        corners = tris[best]
+        for vertex in corners:
+            # Swap the triangle out of the vertex's live adjacency run.
+            start, live = starts[vertex], remaining[vertex]
+            for slot in range(start, start + live):
+                if adjacency[slot] == best:
+                    adjacency[slot] = adjacency[start + live - 1]
+                    adjacency[start + live - 1] = best
+                    break
+            remaining[vertex] = live - 1
+
+        new_cache = list(corners) + [v for v in cache if v not in corners]
+        for vertex in new_cache[CACHE_SIZE:]:
+            vertex_score[vertex] = _vertex_score(-1, remaining[vertex])
+        cache = new_cache[:CACHE_SIZE]
+
+        # Only triangles touching the cache changed score; pick the best of them.
+        best, best_score = -1, -1.0
+        for index, vertex in enumerate(cache):
+            vertex_score[vertex] = _vertex_score(index, remaining[vertex])
+        for vertex in cache:
+            start = starts[vertex]
+            for slot in range(start, start + remaining[vertex]):
+                triangle = adjacency[slot]
+                a, b, c = tris[triangle]
+                score = vertex_score[a] + vertex_score[b] + vertex_score[c]
+                if score > best_score:
+                    best, best_score = triangle, score
+
+        if best < 0:
+            # Nothing in the cache has triangles left: take the next unadded one.
+            while scan < count and added[scan]:
+                scan += 1
+            if scan == count:
+                break
+            best = scan
+    return np.array(order, dtype=np.int64)
+
+
+def first_use_order(triangles: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """`(old index per new vertex, remapped triangles)` numbering vertices by first use."""
+    flat = triangles.ravel()
+    _, first = np.unique(flat, return_index=True)
+    used = flat[np.sort(first)]
+    remap = np.empty(int(flat.max()) + 1 if flat.size else 0, dtype=np.int64)
+    remap[used] = np.arange(used.size)
+    return used, remap[triangles]
+
+
+def optimize_mesh(
+    positions: np.ndarray, triangles: np.ndarray, epsilon: float = WELD_EPSILON
+) -> Tuple[np.ndarray, np.ndarray]:
+    """`(source vertex per output vertex, output triangles)` after all four steps."""
+    with stage("weld"):
+        triangles = drop_degenerate(weld(positions, epsilon)[triangles])
+    with stage("reorder"):
+        triangles = triangles[forsyth_order(triangles, len(positions))]
+    return first_use_order(triangles)
+
+
+def optimize_obj(
+    path: Path, epsilon: float = WELD_EPSILON, fifo: int = FIFO_SIZE
+) -> OptimizeReport:
+    """Weld, clean and reorder the colorized OBJ at `path` in place."""
+    bytes_before = path.stat().st_size
+    with stage("read", bytes_in=bytes_before):
+        mesh = read_obj(path)
+    source, triangles = optimize_mesh(mesh.positions, mesh.triangles, epsilon)
+    positions = mesh.positions[source]
+    with stage("write") as write:
+        text = "".join(mesh.header) + format_obj(
+            positions, mesh.uvs[source], triangles, mesh.mtllib, mesh.material
+        )
+        write_atomic(path, text)
+        write.bytes_out = len(text)
+    return OptimizeReport(
+        path=path,
+        vertices_before=len(mesh.positions),
+        vertices_after=len(positions),
+        triangles_before=len(mesh.triangles),
+        triangles_after=len(triangles),
+        acmr_before=acmr(mesh.triangles, fifo),
+        acmr_after=acmr(triangles, fifo),
+        bytes_before=bytes_before,
+        bytes_after=len(text),
+        bounds=mesh_bounds(mesh.positions),
+    )
+
+
+def format_report(report: OptimizeReport) -> str:
+    return (
+        f"{report.path}: vertices {report.vertices_before} -> {report.vertices_after}, "
+        f"triangles {report.triangles_before} -> {report.triangles_after}, "
+        f"ACMR {report.acmr_before:.3f} -> {report.acmr_after:.3f}, "
+        f"{report.bytes_before / 1024:.0f} -> {report.bytes_after / 1024:.0f} KiB"
+    )
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("meshes", type=Path, nargs="+", help="colorized OBJ files")
+    parser.add_argument(
+        "--epsilon", type=float, default=WELD_EPSILON, help="weld distance in model units"
+    )
+    parser.add_argument(
+        "--fifo", type=int, default=FIFO_SIZE, help="FIFO cache size for the ACMR report"
+    )
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    with profile_run(args, "mesh_optimize"):
+        for path in args.meshes:
+            with stage(f"mesh {path.name}"):
+                print(format_report(optimize_obj(path, args.epsilon, args.fifo)))
+
+
+if __name__ == "__main__":
+    main()
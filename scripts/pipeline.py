@@ -0,0 +1,544 @@
+"""
+Build the generated site assets from a dependency graph of the asset scripts.
+
+Each stage names a script's `main`, the arguments to call it with, and the
+files it reads and writes (glob patterns relative to the repo root):
+
+    products.json ----------------> search-index
+    products.json + images -------> image-variants --> menu
+    products.json + images -------> product-textures
+    reference photos -------------> textures --> meshes (colorized OBJ/MTL, GLB)
+    images + assets + menu + products.json ---> fingerprint (dist/)
+
+A stage depends on every stage whose outputs match one of its inputs, plus
+the stages listed in `after`. A stage's own script, and every module in
+scripts/ that it imports (directly, transitively or lazily inside a
+function), are always among its inputs. A stage is stale when one of the following has changed since its
+last successful run:
+
+- the SHA-256 of any input,
+- the set of input files,
+- any recorded output.
+
+Digests are kept in `.cache/pipeline.json` together with each file's size
+and mtime, so unchanged files are not re-hashed. Inputs are hashed after
+the run, which lets a stage rewrite one of its own inputs in place (as
+colorize_obj does with OBJs). Stale stages run on a process pool as soon as
+their upstream stages succeed, so independent branches build in parallel;
+the failure of one stage only skips its downstream stages.
+
+`--watch` keeps the pool alive, so the interpreters and their NumPy/Pillow
+imports stay warm. It polls the inputs and, on a change, rebuilds the
+stages that read the changed files plus everything downstream of them. A
+change to a script restarts the pool so the new code is imported.
+
+    python scripts/pipeline.py                  # build whatever is stale
+    python scripts/pipeline.py --dry-run        # show the plan
+    python scripts/pipeline.py menu --force     # rebuild menu and its upstream
+    python scripts/pipeline.py --watch
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import fnmatch
+import functools
+import hashlib
+import importlib
+import io
+import json
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from atomic_files import write_atomic
+from profiling import add_profile_arguments, profile_run, record
+
+STATE_VERSION = 1
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = Path(__file__).resolve().parent
+STATE_PATH = ROOT / ".cache" / "pipeline.json"
+DEFAULT_INTERVAL = 1.0
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    module: str  # script in scripts/ whose main(argv) runs the stage
+    argv: Tuple[str, ...] = ()
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    exclude: Tuple[str, ...] = ()  # input paths to ignore, e.g. generated files
+    after: Tuple[str, ...] = ()  # ordering-only dependencies
+
+
+STAGES: Tuple[Stage, ...] = (
+    Stage(
+        "search-index",
+        "search_index",
+        inputs=("public/data/products.json",),
+        outputs=("public/data/search-index.json",),
+    ),
+    Stage(
+        "image-variants",
+        "image_variants",
+        inputs=("public/data/products.json", "public/images/**/*"),
+        outputs=("public/images/variants/manifest.json",),
+        exclude=("public/images/variants/*",),
+    ),
+    Stage(
+        "menu",
+        "render_menu",
+        inputs=("public/data/products.json", "public/images/variants/manifest.json"),
+        outputs=("public/pages/menu.html",),
+    ),
+    Stage(
+        "product-textures",
+        "create_palette_textures",
+        argv=("--products",),
+        inputs=("public/data/products.json", "public/images/**/*"),
+        outputs=("public/assets/textures/products/*.png",),
+        exclude=("public/images/variants/*",),
+    ),
+    Stage(
+        "textures",
+        "create_palette_textures",
+        inputs=("image.png", "images/image5.png"),
+        outputs=("assets/textures/lwli_palette.png", "assets/textures/la5ar_palette.png"),
+    ),
+    Stage(
+        "meshes",
+        "colorize_obj",
+        argv=("--cache", "--glb", "--glb-quantize"),
+        inputs=("lwli.obj", "la5ar.obj"),
+        outputs=("lwli.mtl", "la5ar.mtl", "lwli.glb", "la5ar.glb"),
+        after=("textures",),  # the MTLs reference the palette textures, the GLBs embed them
+    ),
+    Stage(
+        "fingerprint",
+        "asset_manifest",
+        inputs=(
+            "public/images/**/*",
+            "public/assets/**/*",
+            "public/pages/menu.html",
+            "public/data/products.json",
+        ),
+        outputs=("dist/static/manifest.json", "dist/pages/menu.html", "dist/data/products.json"),
+    ),
+)
+
+
+@dataclass
+class StageResult:
+    name: str
+    status: str  # "built", "up to date", "would build", "skipped", "blocked" or "failed"
+    seconds: float = 0.0
+    reason: str = ""
+    output: str = ""
+
+
+def _matches(path: str, patterns: Iterable[str]) -> bool:
+    """`fnmatch` with `Path.glob` semantics for `**/`, which may match no directory."""
+    return any(
+        fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(path, pattern.replace("**/", ""))
+        for pattern in patterns
+    )
+
+
+def resolve(patterns: Iterable[str], exclude: Iterable[str] = (), root: Path = ROOT) -> List[str]:
+    """Existing files matching `patterns`, as sorted root-relative POSIX paths."""
+    exclude = tuple(exclude)
+    found: Set[str] = set()
+    for pattern in patterns:
+        for path in root.glob(pattern):
+            relative = path.relative_to(root).as_posix()
+            if path.is_file() and not _matches(relative, exclude):
+                found.add(relative)
+    return sorted(found)
+
+
+@functools.lru_cache(maxsize=None)
+def _imported_names(path: Path, mtime_ns: int) -> FrozenSet[str]:
+    """Top-level names of every absolute import in `path` (keyed by mtime)."""
+    names: Set[str] = set()
+    for node in ast.walk(ast.parse(path.read_bytes(), str(path))):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.partition(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names.add(node.module.partition(".")[0])
+    return frozenset(names)
+
+
+def script_closure(module: str, scripts: Path = SCRIPTS_DIR) -> List[Path]:
+    """`module`'s script plus every scripts/ module it imports, transitively."""
+    found: Dict[str, Path] = {}
+    pending = [module]
+    while pending:
+        name = pending.pop()
+        path = scripts / f"{name}.py"
+        if name in found or not path.is_file():
+            continue
+        found[name] = path
+        pending.extend(_imported_names(path, path.stat().st_mtime_ns))
+    return sorted(found.values())
+
+
+def stage_scripts(stage: Stage, root: Path = ROOT) -> List[str]:
+    return [path.relative_to(root).as_posix() for path in script_closure(stage.module)]
+
+
+def stage_inputs(stage: Stage, root: Path = ROOT) -> List[str]:
+    return [*stage_scripts(stage, root), *resolve(stage.inputs, stage.exclude, root)]
+
+
+def dependencies(stages: Sequence[Stage]) -> Dict[str, Set[str]]:
+    """`{stage: upstream stages}` from output/input pattern overlap and `after`."""
+    upstream: Dict[str, Set[str]] = {stage.name: set(stage.after) for stage in stages}
+    for consumer in stages:
+        for producer in stages:
+            if producer is consumer:
+                continue
+            for output in producer.outputs:
+                reads = _matches(output, consumer.inputs) or any(
+                    fnmatch.fnmatch(pattern, output) for pattern in consumer.inputs
+                )
+                if reads and not _matches(output, consumer.exclude):
+                    upstream[consumer.name].add(producer.name)
+    return upstream
+
+
+def topological_order(stages: Sequence[Stage]) -> List[Stage]:
+    upstream = dependencies(stages)
+    by_name = {stage.name: stage for stage in stages}
+    ordered: List[Stage] = []
+    visiting: Set[str] = set()
+    done: Set[str] = set()
+
+    def visit(name: str) -> None:
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle through stage {name!r}")
+        visiting.add(name)
+        for parent in sorted(upstream[name]):
+            if parent not in by_name:
+                raise ValueError(f"Stage {name!r} runs after unknown stage {parent!r}")
+            visit(parent)
+        visiting.discard(name)
+        done.add(name)
+        ordered.append(by_name[name])
+
+    for stage in stages:
+        visit(stage.name)
+    return ordered
+
+
+def with_upstream(stages: Sequence[Stage], names: Iterable[str]) -> Set[str]:
+    upstream = dependencies(stages)
+    selected: Set[str] = set()
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name not in upstream:
+            raise ValueError(f"Unknown stage {name!r}; choose from {', '.join(upstream)}")
+        if name not in selected:
+            selected.add(name)
+            pending.extend(upstream[name])
+    return selected
+
+
+def with_downstream(stages: Sequence[Stage], names: Iterable[str]) -> Set[str]:
+    upstream = dependencies(stages)
+    selected = set(names)
+    grew = True
+    while grew:
+        grew = False
+        for name, parents in upstream.items():
+            if name not in selected and parents & selected:
+                selected.add(name)
+                grew = True
+    return selected
+
+
+class BuildState:
+    """Per-file digests (reused while size and mtime match) and per-stage signatures."""
+
+    def __init__(self, path: Path = STATE_PATH, root: Path = ROOT) -> None:
+        self.path = path
+        self.root = root
+        self.files: Dict[str, List[Any]] = {}  # path -> [size, mtime_ns, sha256]
+        self.stages: Dict[str, Dict[str, Dict[str, str]]] = {}
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("version") == STATE_VERSION:
+            self.files = data.get("files", {})
+            self.stages = data.get("stages", {})
+
+    def digest(self, relative: str) -> Optional[str]:
+        try:
+            stat = (self.root / relative).stat()
+        except OSError:
+            return None
+        entry = self.files.get(relative)
+        if entry is not None and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return entry[2]
+        with (self.root / relative).open("rb") as handle:
+            digest = hashlib.file_digest(handle, "sha256").hexdigest()
+        self.files[relative] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def digests(self, paths: Iterable[str]) -> Dict[str, str]:
+        found = {path: self.digest(path) for path in paths}
+        return {path: digest for path, digest in found.items() if digest is not None}
+
+    def stale_reason(self, stage: Stage) -> Optional[str]:
+        """Why `stage` needs to run, or None when it is up to date."""
+        recorded = self.stages.get(stage.name)
+        if recorded is None:
+            return "never built"
+        inputs = self.digests(stage_inputs(stage, self.root))
+        for path in sorted(inputs.keys() | recorded["inputs"].keys()):
+            if path not in inputs:
+                return f"{path} removed"
+            if path not in recorded["inputs"]:
+                return f"{path} added"
+            if inputs[path] != recorded["inputs"][path]:
+                return f"{path} changed"
+        outputs = self.digests(resolve(stage.outputs, root=self.root))
+        if outputs != recorded["outputs"]:
+            return "outputs changed or missing"
+        return None
+
+    def mark_built(self, stage: Stage) -> None:
+        self.stages[stage.name] = {
+            "inputs": self.digests(stage_inputs(stage, self.root)),
+            "outputs": self.digests(resolve(stage.outputs, root=self.root)),
+        }
+
+    def save(self) -> None:
+        live = {path for path in self.files if (self.root / path).exists()}
+        payload = {
+            "version": STATE_VERSION,
+            "files": {path: self.files[path] for path in sorted(live)},
+            "stages": self.stages,
+        }
+        write_atomic(self.path, json.dumps(payload, indent=1))
+
+
+def _run_stage(module: str, argv: Sequence[str]) -> Tuple[bool, float, str]:
+    """Call `module.main(argv)` in a worker; returns (ok, seconds, captured output)."""
+    start = time.perf_counter()
+    captured = io.StringIO()
+    ok = True
+    with redirect_stdout(captured), redirect_stderr(captured):
+        try:
+            importlib.import_module(module).main(list(argv))
+        except SystemExit as exc:
+            ok = exc.code in (None, 0)
+        except Exception:  # report the traceback instead of killing the worker
+            ok = False
+            traceback.print_exc()
+    return ok, time.perf_counter() - start, captured.getvalue()
+
+
+def _warm(modules: Sequence[str]) -> None:
+    for module in modules:
+        importlib.import_module(module)
+
+
+def warm_pool(pool: ProcessPoolExecutor, stages: Sequence[Stage], workers: int) -> None:
+    """Import every stage's script in each worker ahead of the first build."""
+    modules = sorted({stage.module for stage in stages})
+    for future in [pool.submit(_warm, modules) for _ in range(workers)]:
+        future.result()
+
+
+def build(
+    stages: Sequence[Stage],
+    pool: ProcessPoolExecutor,
+    state: BuildState,
+    only: Optional[Set[str]] = None,
+    force: bool = False,
+    dry_run: bool = False,
+) -> List[StageResult]:
+    """
+    Run the stale stages among `only` (default: all) in dependency order,
+    as many at a time as the pool allows. Stages whose upstream failed or
+    whose inputs do not exist are skipped.
+    """
+    ordered = [stage for stage in topological_order(stages) if only is None or stage.name in only]
+    selected = {stage.name for stage in ordered}
+    upstream = {name: parents & selected for name, parents in dependencies(stages).items()}
+    results: Dict[str, StageResult] = {}
+    running: Dict[Future, Tuple[Stage, str]] = {}
+    waiting = list(ordered)
+
+    def plan(stage: Stage) -> Tuple[Optional[StageResult], str]:
+        """A result for a stage that will not run, or the reason it must."""
+        failed = sorted(
+            name for name in upstream[stage.name] if results[name].status in ("failed", "blocked")
+        )
+        if failed:
+            return StageResult(stage.name, "blocked", reason=f"{', '.join(failed)} failed"), ""
+        if not resolve(stage.inputs, stage.exclude, state.root):
+            return StageResult(stage.name, "skipped", reason="no inputs"), ""
+        reason = "forced" if force else state.stale_reason(stage)
+        if reason is None:
+            return StageResult(stage.name, "up to date"), ""
+        if dry_run:
+            return StageResult(stage.name, "would build", reason=reason), reason
+        return None, reason
+
+    while waiting or running:
+        for stage in [stage for stage in waiting if upstream[stage.name] <= results.keys()]:
+            waiting.remove(stage)
+            result, reason = plan(stage)
+            if result is not None:
+                results[stage.name] = result
+            else:
+                running[pool.submit(_run_stage, stage.module, stage.argv)] = (stage, reason)
+        if not running:
+            continue
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            stage, reason = running.pop(future)
+            try:
+                ok, seconds, output = future.result()
+            except Exception as exc:  # worker died (e.g. out of memory)
+                ok, seconds, output = False, 0.0, f"{type(exc).__name__}: {exc}"
+            if ok:
+                state.mark_built(stage)
+                state.save()
+            status = "built" if ok else "failed"
+            results[stage.name] = StageResult(stage.name, status, seconds, reason, output)
+            record(f"stage {stage.name}", seconds, worker=True, status=status)
+    return [results[stage.name] for stage in ordered]
+
+
+def format_report(results: Sequence[StageResult], wall_seconds: float, verbose: bool = False) -> str:
+    lines = []
+    for result in results:
+        reason = f"  ({result.reason})" if result.reason else ""
+        lines.append(f"{result.seconds:8.2f}s  {result.name:<18}{result.status}{reason}")
+        if result.output and (verbose or result.status == "failed"):
+            lines.extend(f"            {line}" for line in result.output.rstrip().splitlines())
+    built = sum(result.status == "built" for result in results)
+    failed = sum(result.status == "failed" for result in results)
+    lines.append(f"{built} built, {failed} failed of {len(results)} stages in {wall_seconds:.2f}s wall")
+    return "\n".join(lines)
+
+
+def snapshot(stages: Sequence[Stage], root: Path = ROOT) -> Dict[str, Tuple[int, int]]:
+    """`{path: (size, mtime_ns)}` of every watched input."""
+    paths = {path for stage in stages for path in stage_inputs(stage, root)}
+    paths.update(path.relative_to(root).as_posix() for path in SCRIPTS_DIR.glob("*.py"))
+    found = {}
+    for path in paths:
+        try:
+            stat = (root / path).stat()
+        except OSError:
+            continue
+        found[path] = (stat.st_size, stat.st_mtime_ns)
+    return found
+
+
+def affected_stages(stages: Sequence[Stage], changed: Set[str], root: Path = ROOT) -> Set[str]:
+    direct = set()
+    for stage in stages:
+        if changed.intersection(stage_scripts(stage, root)) or any(
+            _matches(path, stage.inputs) and not _matches(path, stage.exclude) for path in changed
+        ):
+            direct.add(stage.name)
+    return with_downstream(stages, direct)
+
+
+def watch(
+    stages: Sequence[Stage],
+    state: BuildState,
+    workers: int,
+    interval: float,
+    only: Optional[Set[str]] = None,
+    verbose: bool = False,
+) -> None:
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        warm_pool(pool, stages, workers)
+        start = time.perf_counter()
+        print(format_report(build(stages, pool, state, only), time.perf_counter() - start, verbose))
+        seen = snapshot(stages, state.root)
+        print(f"watching {len(seen)} files (Ctrl+C to stop)")
+        while True:
+            time.sleep(interval)
+            current = snapshot(stages, state.root)
+            changed = {path for path in seen.keys() | current.keys() if seen.get(path) != current.get(path)}
+            if not changed:
+                continue
+            if any(path.startswith("scripts/") and path.endswith(".py") for path in changed):
+                # Modules stay imported in the workers; start fresh ones for new code.
+                pool.shutdown()
+                pool = ProcessPoolExecutor(max_workers=workers)
+                warm_pool(pool, stages, workers)
+            targets = affected_stages(stages, changed, state.root)
+            if only is not None:
+                targets &= only
+            print(f"changed: {', '.join(sorted(changed))}")
+            if targets:
+                start = time.perf_counter()
+                results = build(stages, pool, state, targets)
+                print(format_report(results, time.perf_counter() - start, verbose))
+            seen = snapshot(stages, state.root)  # outputs the build just wrote are not changes
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "stages", nargs="*", help="build only these stages and their upstream (default: all)"
+    )
+    parser.add_argument("--force", action="store_true", help="run the selected stages even if up to date")
+    parser.add_argument("--dry-run", action="store_true", help="print what would run and why")
+    parser.add_argument("--watch", action="store_true", help="keep running and rebuild on changes")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help=f"seconds between --watch polls (default: {DEFAULT_INTERVAL})",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="stages run at once (default: one per core)"
+    )
+    parser.add_argument("--state", type=Path, default=STATE_PATH)
+    parser.add_argument("-v", "--verbose", action="store_true", help="show each stage's output")
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    state = BuildState(args.state)
+    workers = args.workers or os.cpu_count() or 1
+    only = with_upstream(STAGES, args.stages) if args.stages else None
+    if args.watch:
+        watch(STAGES, state, workers, args.interval, only, args.verbose)
+        return
+
+    start = time.perf_counter()
+    with profile_run(args, "pipeline"), ProcessPoolExecutor(max_workers=workers) as pool:
+        results = build(STAGES, pool, state, only, force=args.force, dry_run=args.dry_run)
+    print(format_report(results, time.perf_counter() - start, args.verbose))
+    if any(result.status == "failed" for result in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
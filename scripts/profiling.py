@@ -0,0 +1,256 @@
+"""
+Shared stage timing and tracing for the build scripts.
+
+Scripts wrap their work in stages; the stages are no-ops unless `--profile`
+was passed, so instrumented code pays nothing in normal runs:
+
+    from profiling import add_profile_arguments, profile_run, stage
+
+    parser = argparse.ArgumentParser(...)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    with profile_run(args, "render_menu"):
+        with stage("load", bytes_in=path.stat().st_size):
+            ...
+
+`--profile [DIR]` writes `<DIR>/<script>.trace.json` (one record per stage:
+wall time, CPU time, bytes in/out, peak RSS, and with `--profile-memory`
+the `tracemalloc` peak) and `<DIR>/<script>.chrome.json` for
+chrome://tracing or Perfetto. `--profile-cprofile` also dumps
+`<DIR>/<script>.prof` for `python -m pstats`/snakeviz.
+
+Stages inside process-pool workers are not traced; their results can be
+added after the fact with `record`.
+"""
+from __future__ import annotations
+
+import argparse
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:  # not available on Windows
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore[assignment]
+
+TRACE_VERSION = 1
+DEFAULT_PROFILE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "profiles"
+
+
+def peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports KiB
+
+
+@dataclass
+class StageRecord:
+    name: str
+    start: float  # seconds since the profiler started
+    wall: float
+    cpu: Optional[float]
+    depth: int
+    thread: int
+    bytes_in: Optional[int] = None
+    bytes_out: Optional[int] = None
+    peak_rss: Optional[int] = None
+    peak_alloc: Optional[int] = None
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+class Stage:
+    """Handle yielded by `stage()`; set `bytes_out` (or `args`) before it closes."""
+
+    __slots__ = ("bytes_in", "bytes_out", "args")
+
+    def __init__(self, bytes_in: Optional[int] = None) -> None:
+        self.bytes_in = bytes_in
+        self.bytes_out: Optional[int] = None
+        self.args: Dict[str, Any] = {}
+
+
+class Profiler:
+    def __init__(self, memory: bool = False) -> None:
+        self.memory = memory
+        self.records: List[StageRecord] = []
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _depth(self) -> int:
+        return getattr(self._local, "depth", 0)
+
+    @contextmanager
+    def stage(self, name: str, bytes_in: Optional[int] = None) -> Iterator[Stage]:
+        handle = Stage(bytes_in)
+        depth = self._depth()
+        self._local.depth = depth + 1
+        if self.memory and depth == 0:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield handle
+        finally:
+            wall = time.perf_counter() - start
+            cpu = time.thread_time() - cpu_start
+            self._local.depth = depth
+            record = StageRecord(
+                name=name,
+                start=start - self.origin,
+                wall=wall,
+                cpu=cpu,
+                depth=depth,
+                thread=threading.get_ident(),
+                bytes_in=handle.bytes_in,
+                bytes_out=handle.bytes_out,
+                peak_rss=peak_rss_bytes(),
+                peak_alloc=tracemalloc.get_traced_memory()[1] if self.memory else None,
+                args=handle.args,
+            )
+            with self._lock:
+                self.records.append(record)
+
+    def record(self, name: str, wall: float, **extra: Any) -> None:
+        """Add a stage measured elsewhere (e.g. in a worker process)."""
+        end = time.perf_counter() - self.origin
+        with self._lock:
+            self.records.append(
+                StageRecord(
+                    name=name,
+                    start=max(0.0, end - wall),
+                    wall=wall,
+                    cpu=extra.pop("cpu", None),
+                    depth=self._depth(),
+                    thread=extra.pop("thread", 0),
+                    bytes_in=extra.pop("bytes_in", None),
+                    bytes_out=extra.pop("bytes_out", None),
+                    args=extra,
+                )
+            )
+
+    def trace(self, script: str, wall: float, cpu: float) -> Dict[str, Any]:
+        return {
+            "version": TRACE_VERSION,
+            "script": script,
+            "argv": sys.argv[1:],
+            "python": sys.version.split()[0],
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(time.time() - wall)),
+            "wall": wall,
+            "cpu": cpu,
+            "peak_rss": peak_rss_bytes(),
+            "stages": [asdict(record) for record in sorted(self.records, key=lambda r: r.start)],
+        }
+
+    def chrome_trace(self, script: str) -> Dict[str, Any]:
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = [
+            {"ph": "M", "pid": pid, "name": "process_name", "args": {"name": script}}
+        ]
+        for record in self.records:
+            args = {
+                key: value
+                for key, value in (
+                    ("cpu_ms", None if record.cpu is None else record.cpu * 1000),
+                    ("bytes_in", record.bytes_in),
+                    ("bytes_out", record.bytes_out),
+                    ("peak_alloc", record.peak_alloc),
+                )
+                if value is not None
+            }
+            args.update(record.args)
+            events.append(
+                {
+                    "ph": "X",
+                    "name": record.name,
+                    "cat": script,
+                    "pid": pid,
+                    "tid": record.thread,
+                    "ts": record.start * 1e6,
+                    "dur": record.wall * 1e6,
+                    "args": args,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+_ACTIVE: Optional[Profiler] = None
+
+
+@contextmanager
+def stage(name: str, bytes_in: Optional[int] = None) -> Iterator[Stage]:
+    """Time a block under the active profiler; a cheap no-op when none is active."""
+    if _ACTIVE is None:
+        yield Stage(bytes_in)
+        return
+    with _ACTIVE.stage(name, bytes_in) as handle:
+        yield handle
+
+
+def record(name: str, wall: float, **extra: Any) -> None:
+    if _ACTIVE is not None:
+        _ACTIVE.record(name, wall, **extra)
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("profiling")
+    group.add_argument(
+        "--profile",
+        type=Path,
+        nargs="?",
+        const=DEFAULT_PROFILE_DIR,
+        default=None,
+        metavar="DIR",
+        help=f"write JSON and Chrome traces to DIR (default: {DEFAULT_PROFILE_DIR})",
+    )
+    group.add_argument(
+        "--profile-memory", action="store_true", help="track allocation peaks with tracemalloc"
+    )
+    group.add_argument(
+        "--profile-cprofile", action="store_true", help="also dump a cProfile .prof file"
+    )
+
+
+@contextmanager
+def profile_run(args: argparse.Namespace, script: str) -> Iterator[Optional[Profiler]]:
+    """Profile the enclosed run when `args.profile` is set, then write the traces."""
+    global _ACTIVE
+    directory: Optional[Path] = getattr(args, "profile", None)
+    if directory is None:
+        yield None
+        return
+    memory = getattr(args, "profile_memory", False)
+    profiler = Profiler(memory=memory)
+    profile = cProfile.Profile() if getattr(args, "profile_cprofile", False) else None
+    if memory:
+        tracemalloc.start()
+    previous, _ACTIVE = _ACTIVE, profiler
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    if profile is not None:
+        profile.enable()
+    try:
+        yield profiler
+    finally:
+        if profile is not None:
+            profile.disable()
+        wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        _ACTIVE = previous
+        if memory:
+            tracemalloc.stop()
+        directory.mkdir(parents=True, exist_ok=True)
+        trace_path = directory / f"{script}.trace.json"
+        trace_path.write_text(json.dumps(profiler.trace(script, wall, cpu), indent=2))
+        (directory / f"{script}.chrome.json").write_text(json.dumps(profiler.chrome_trace(script)))
+        if profile is not None:
+            profile.dump_stats(directory / f"{script}.prof")
+        print(f"profile: {trace_path} ({wall:.3f}s wall, {cpu:.3f}s cpu)", file=sys.stderr)
@@ -0,0 +1,281 @@
+"""
+Render the menu page product cards from `public/data/products.json`.
+
+Cards are rendered from a single template (kept in step with `buildCard` in
+`public/js/menu-products.js`) and spliced into a marked region of
+`pages/menu.html`:
+
+    <!-- menu:products:start -->
+    <!-- product:1 -->
+    <article class="product-card" ...>...</article>
+    <!-- /product:1 -->
+    <!-- menu:products:end -->
+
+A manifest stores a fingerprint of the fields each card uses. On the next
+run only cards whose product changed (or whose marker is missing) are
+re-rendered; the rest are copied verbatim from the page. The page is read
+and written in one linear pass with `str.find`, and is left untouched when
+nothing changed.
+
+When `image_variants.py` has produced a variant manifest, card images get
+`srcset`/`sizes` (and an AVIF `<picture>` source) from it.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from html import escape
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from atomic_files import write_atomic
+from catalog import Catalog, Product, load_catalog
+from image_variants import load_variant_manifest, responsive_img, variant_manifest_path
+from profiling import add_profile_arguments, profile_run, stage
+
+MANIFEST_VERSION = 1
+REGION_START = "<!-- menu:products:start -->"
+REGION_END = "<!-- menu:products:end -->"
+CARD_OPEN = "<!-- product:"
+CARD_CLOSE = "<!-- /product:"
+MARKER_TAIL = " -->"
+GRID_OPEN = '<div class="product-grid">'
+INDENT = "                "
+
+CARD_TEMPLATE = """\
+{indent}<!-- product:{id} -->
+{indent}<article class="product-card" data-product data-product-id="{id}"
+{indent}    data-category="{category}"
+{indent}    data-name-en="{name_en}"
+{indent}    data-name-ar="{name_ar}"
+{indent}    data-description="{description}"
+{indent}    data-tags="{tags}">
+{indent}    <div class="product-media">
+{indent}        <span class="{badge_class}">{badge}</span>
+{indent}        {img}
+{indent}        <div class="product-actions-overlay">
+{indent}            <button class="btn-icon" aria-label="Add to Cart"
+{indent}                data-add-to-cart="{name_en}"{disabled}>
+{indent}                <svg width="20" height="20" viewBox="0 0 24 24" fill="none" stroke="currentColor"
+{indent}                    stroke-width="2">
+{indent}                    <path
+{indent}                        d="M9 20a1 1 0 1 0 0 2 1 1 0 0 0 0-2zm7 0a1 1 0 1 0 0 2 1 1 0 0 0 0-2zm-7-4h7a2 2 0 0 0 2-2V9a2 2 0 0 0-2-2h-7a2 2 0 0 0-2 2v5a2 2 0 0 0 2 2z" />
+{indent}                    <path d="M1 1h4l2.68 13.39a2 2 0 0 0 2 1.61h9.72a2 2 0 0 0 2-1.61L23 6H6" />
+{indent}                </svg>
+{indent}            </button>
+{indent}        </div>
+{indent}    </div>
+{indent}    <div class="product-info">
+{indent}        <div class="product-header">
+{indent}            <h3>{name_en}</h3>
+{indent}            <p class="product-price">{price}&nbsp;MAD</p>
+{indent}        </div>
+{indent}    </div>
+{indent}</article>
+{indent}<!-- /product:{id} -->
+"""
+TEMPLATE_SHA256 = hashlib.sha256(CARD_TEMPLATE.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class RenderStats:
+    rendered: int = 0
+    reused: int = 0
+    removed: int = 0
+    written: bool = False
+    seconds: float = 0.0
+
+
+def format_price(price: float) -> str:
+    """`80`, `12.5`, `1000000`: up to two decimals, no exponent or trailing zeros."""
+    return f"{price:.2f}".rstrip("0").rstrip(".")
+
+
+def card_fields(
+    product: Product, variants: Optional[Mapping[str, Any]] = None
+) -> Dict[str, str]:
+    """The escaped template values for one product, mirroring `buildCard`."""
+    in_stock = product.in_stock
+    category = product.category or "sugar-free"
+    price = product.price or 0
+    image = product.image or "/images/logo1.png"
+    name_en = escape(product.name or "Product")
+    return {
+        "id": escape(str(product.id)),
+        "category": escape(category),
+        "name_en": name_en,
+        "name_ar": escape(product.name_ar or ""),
+        "description": escape(product.description or ""),
+        "tags": escape(",".join(str(tag) for tag in product.tags)),
+        "badge": escape(category.replace("-", " ") if in_stock else "Sold Out"),
+        "badge_class": "product-badge" if in_stock else "product-badge product-badge--bright",
+        "img": responsive_img(escape(image), name_en, (variants or {}).get(image)),
+        "price": format_price(price) if isinstance(price, (int, float)) else escape(str(price)),
+        "disabled": "" if in_stock else ' disabled aria-disabled="true"',
+    }
+
+
+def fingerprint(fields: Mapping[str, str]) -> str:
+    """Hash of exactly what the card shows, so unrelated edits don't re-render."""
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def render_card(fields: Mapping[str, str], indent: str = INDENT) -> str:
+    return CARD_TEMPLATE.format(indent=indent, **fields)
+
+
+def menu_products(catalog: Catalog) -> List[Product]:
+    """Products the menu lists: active ones, in catalog order, unique by id."""
+    return [product for product in catalog.active() if catalog.get(product.id) is product]
+
+
+def find_region(page: str) -> Tuple[int, int, str]:
+    """
+    Return `(start, end, prefix)` so `page[start:end]` is the card region.
+
+    Pages without markers get an empty region just inside the product grid;
+    `prefix` is then the start marker that has to be inserted.
+    """
+    start = page.find(REGION_START)
+    if start != -1:
+        start = page.index("\n", start) + 1
+        end = page.find(REGION_END, start)
+        if end == -1:
+            raise ValueError(f"{REGION_START} has no matching {REGION_END}")
+        end = page.rindex("\n", 0, end) + 1
+        return start, end, ""
+    grid = page.find(GRID_OPEN)
+    if grid == -1:
+        raise ValueError(f"No {REGION_START} marker or {GRID_OPEN} in page")
+    insert = grid + len(GRID_OPEN)
+    return insert, insert, "\n"
+
+
+def iter_cards(region: str) -> Iterator[Tuple[str, str]]:
+    """Yield `(product id, card text)` for every marked card in one pass."""
+    pos = 0
+    while True:
+        open_at = region.find(CARD_OPEN, pos)
+        if open_at == -1:
+            return
+        id_start = open_at + len(CARD_OPEN)
+        id_end = region.find(MARKER_TAIL, id_start)
+        product_id = region[id_start:id_end]
+        closing = f"{CARD_CLOSE}{product_id}{MARKER_TAIL}"
+        close_at = region.find(closing, id_end)
+        if id_end == -1 or close_at == -1:
+            raise ValueError(f"Unterminated card marker for product {product_id!r}")
+        line_start = region.rfind("\n", 0, open_at) + 1
+        line_end = region.find("\n", close_at)
+        line_end = len(region) if line_end == -1 else line_end + 1
+        yield product_id, region[line_start:line_end]
+        pos = line_end
+
+
+def load_manifest(path: Path) -> Dict[str, str]:
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != MANIFEST_VERSION or data.get("template") != TEMPLATE_SHA256:
+        return {}  # template changed: every card is stale
+    return dict(data.get("cards", {}))
+
+
+def render_menu(
+    page_path: Path,
+    products_path: Path,
+    manifest_path: Path,
+    force: bool = False,
+    variants_path: Optional[Path] = None,
+) -> RenderStats:
+    start_time = time.perf_counter()
+    stats = RenderStats()
+    with stage("load", bytes_in=page_path.stat().st_size):
+        products = menu_products(load_catalog(products_path))
+        page = page_path.read_text(encoding="utf-8")
+        previous = {} if force else load_manifest(manifest_path)
+        variants = load_variant_manifest(variants_path) if variants_path is not None else {}
+
+    with stage("scan"):
+        start, end, prefix = find_region(page)
+        existing = dict(iter_cards(page[start:end]))
+    with stage("render"):
+        indent = INDENT
+        parts: List[str] = [page[:start], prefix]
+        if prefix:
+            parts.append(f"{indent}{REGION_START}\n")
+        fingerprints: Dict[str, str] = {}
+        for product in products:
+            fields = card_fields(product, variants)
+            product_id = fields["id"]
+            digest = fingerprint(fields)
+            fingerprints[product_id] = digest
+            card = existing.get(product_id)
+            if card is None or previous.get(product_id) != digest:
+                card = render_card(fields, indent)
+                stats.rendered += 1
+            else:
+                stats.reused += 1
+            parts.append(card)
+        if prefix:
+            parts.append(f"{indent}{REGION_END}\n            ")
+        parts.append(page[end:])
+        stats.removed = len(existing.keys() - fingerprints.keys())
+        updated = "".join(parts)
+
+    if updated != page:
+        with stage("write") as write:
+            write_atomic(page_path, updated)
+            write.bytes_out = len(updated.encode("utf-8"))
+        stats.written = True
+    manifest = {"version": MANIFEST_VERSION, "template": TEMPLATE_SHA256, "cards": fingerprints}
+    if previous != fingerprints or not manifest_path.exists():
+        write_atomic(manifest_path, json.dumps(manifest, indent=2))
+    stats.seconds = time.perf_counter() - start_time
+    return stats
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    root = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--page", type=Path, default=root / "public" / "pages" / "menu.html")
+    parser.add_argument(
+        "--products", type=Path, default=root / "public" / "data" / "products.json"
+    )
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        default=root / ".cache" / "menu_render.json",
+        help="per-product card fingerprints from the previous run",
+    )
+    parser.add_argument(
+        "--variants",
+        type=Path,
+        default=variant_manifest_path(root / "public"),
+        help="image variant manifest from image_variants.py",
+    )
+    parser.add_argument("--force", action="store_true", help="re-render every card")
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    with profile_run(args, "render_menu"):
+        stats = render_menu(
+            args.page, args.products, args.manifest, force=args.force, variants_path=args.variants
+        )
+    state = "updated" if stats.written else "unchanged"
+    print(
+        f"{args.page.name} {state}: {stats.rendered} rendered, {stats.reused} reused, "
+        f"{stats.removed} removed in {stats.seconds * 1000:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Build the bilingual product search index for client-side product search.
+
+Each active product's `name`, `nameAr`, `description`, `descriptionAr`,
+`tags` and `category` are normalized and tokenized. Arabic text has its
+diacritics and tatweel removed, and alef/yeh/teh-marbuta variants unified.
+Latin accents are folded, and a leading Arabic "ال" is also indexed without
+the article. Every token is indexed under all of its prefixes from
+`MIN_PREFIX` to `MAX_PREFIX` characters, so the client can answer
+search-as-you-type with one lookup per query word.
+
+The output (`public/data/search-index.json`) is a compact inverted index:
+
+    {"version": 1, "minPrefix": 2, "maxPrefix": 12,
+     "docs": [<product id>, ...],
+     "terms": {"<term>": [first doc, +delta, +delta, ...], ...}}
+
+Posting lists hold positions into `docs`, sorted and delta-encoded.
+`public/js/search-index.js` (`window.MenuSearch`) loads the file once and
+intersects the lists. A page that adds a search box includes that script;
+the menu page's category filter does not need it, so it does not load it.
+
+Tokens are cached per product in `.cache/search_tokens.json`. A rebuild only
+re-tokenizes products whose `updatedAt` changed (or, for records without
+one, whose indexed fields changed). The cache is dropped when the prefix
+lengths or the normalization tables change (`tokenizer_signature`).
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from atomic_files import write_atomic
+from catalog import PRODUCTS_PATH, Product, load_catalog
+from profiling import add_profile_arguments, profile_run, stage
+
+INDEX_VERSION = 1
+CACHE_VERSION = 1
+MIN_PREFIX = 2
+MAX_PREFIX = 12
+ROOT = Path(__file__).resolve().parent.parent
+INDEX_PATH = ROOT / "public" / "data" / "search-index.json"
+CACHE_PATH = ROOT / ".cache" / "search_tokens.json"
+
+# Arabic harakat, superscript alef and tatweel are dropped; letter variants
+# that users type interchangeably are folded together.
+_ARABIC_DROP = dict.fromkeys([*range(0x064B, 0x0653), 0x0670, 0x0640])
+_ARABIC_FOLD = str.maketrans(
+    {
+        "أ": "ا",
+        "إ": "ا",
+        "آ": "ا",
+        "ٱ": "ا",
+        "ى": "ي",
+        "ئ": "ي",
+        "ؤ": "و",
+        "ة": "ه",
+        **{chr(0x0660 + digit): str(digit) for digit in range(10)},
+        **{chr(0x06F0 + digit): str(digit) for digit in range(10)},
+    }
+)
+_TOKEN = re.compile(r"[^\W_]+")
+_ARTICLE = "ال"
+
+
+def normalize(text: str) -> str:
+    """Lowercase, fold Latin accents and Arabic letter variants."""
+    text = text.translate(_ARABIC_DROP).translate(_ARABIC_FOLD).lower()
+    decomposed = unicodedata.normalize("NFKD", text)
+    # Only strip combining marks off Latin letters; Arabic marks are gone already.
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> Iterator[str]:
+    yield from _TOKEN.findall(normalize(text))
+
+
+def token_variants(token: str) -> List[str]:
+    """The token plus, for Arabic words, the form without the "ال" article."""
+    if token.startswith(_ARTICLE) and len(token) > len(_ARTICLE) + 1:
+        return [token, token[len(_ARTICLE):]]
+    return [token]
+
+
+def prefixes(token: str) -> Iterator[str]:
+    """`token`'s prefixes from MIN_PREFIX to MAX_PREFIX chars (short tokens as-is)."""
+    if len(token) < MIN_PREFIX:
+        yield token
+        return
+    for length in range(MIN_PREFIX, min(len(token), MAX_PREFIX) + 1):
+        yield token[:length]
+
+
+def indexed_text(product: Product) -> List[str]:
+    return [
+        product.name,
+        product.name_ar,
+        product.description,
+        product.description_ar,
+        " ".join(product.tags),
+        product.category.replace("-", " "),
+    ]
+
+
+def product_terms(product: Product) -> List[str]:
+    terms = {
+        term
+        for text in indexed_text(product)
+        for token in tokenize(text or "")
+        for variant in token_variants(token)
+        for term in prefixes(variant)
+    }
+    return sorted(terms)
+
+
+def tokenizer_signature() -> str:
+    """Hash of every setting that shapes `product_terms`; cached terms need a match."""
+    settings = [
+        MIN_PREFIX,
+        MAX_PREFIX,
+        _ARTICLE,
+        _TOKEN.pattern,
+        sorted(_ARABIC_DROP),
+        sorted(_ARABIC_FOLD.items()),
+    ]
+    return hashlib.sha256(json.dumps(settings, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def revision(product: Product) -> str:
+    """`updatedAt` when present, else a hash of the indexed fields."""
+    if product.updated_at:
+        return product.updated_at
+    payload = "\x1f".join(text or "" for text in indexed_text(product))
+    return "sha1:" + hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def delta_encode(positions: Sequence[int]) -> List[int]:
+    previous = 0
+    deltas = []
+    for position in positions:
+        deltas.append(position - previous)
+        previous = position
+    return deltas
+
+
+def delta_decode(deltas: Iterable[int]) -> List[int]:
+    positions = []
+    total = 0
+    for delta in deltas:
+        total += delta
+        positions.append(total)
+    return positions
+
+
+@dataclass
+class IndexStats:
+    documents: int = 0
+    tokenized: int = 0
+    reused: int = 0
+    terms: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+
+def _load_token_cache(path: Path) -> Dict[str, Dict[str, object]]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != CACHE_VERSION or data.get("tokenizer") != tokenizer_signature():
+        return {}
+    return dict(data.get("products", {}))
+
+
+def build_index(
+    products_path: Path = PRODUCTS_PATH,
+    index_path: Path = INDEX_PATH,
+    cache_path: Optional[Path] = CACHE_PATH,
+    force: bool = False,
+) -> IndexStats:
+    start = time.perf_counter()
+    stats = IndexStats()
+    with stage("load", bytes_in=products_path.stat().st_size):
+        products = load_catalog(products_path).active()
+        cached = {} if force or cache_path is None else _load_token_cache(cache_path)
+
+    docs: List[object] = []
+    postings: Dict[str, List[int]] = {}
+    tokens: Dict[str, Dict[str, object]] = {}
+    with stage("tokenize"):
+        for position, product in enumerate(products):
+            key = str(product.id)
+            current = revision(product)
+            entry = cached.get(key)
+            if entry is not None and entry.get("revision") == current:
+                terms = entry["terms"]
+                stats.reused += 1
+            else:
+                terms = product_terms(product)
+                stats.tokenized += 1
+            tokens[key] = {"revision": current, "terms": terms}
+            docs.append(product.id)
+            for term in terms:
+                postings.setdefault(term, []).append(position)
+
+    # Positions are appended in increasing order, so lists are already sorted.
+    with stage("encode") as encode:
+        index = {
+            "version": INDEX_VERSION,
+            "minPrefix": MIN_PREFIX,
+            "maxPrefix": MAX_PREFIX,
+            "docs": docs,
+            "terms": {term: delta_encode(postings[term]) for term in sorted(postings)},
+        }
+        payload = json.dumps(index, ensure_ascii=False, separators=(",", ":"))
+        encode.bytes_out = len(payload.encode("utf-8"))
+    with stage("write"):
+        try:
+            unchanged = index_path.read_text(encoding="utf-8") == payload
+        except OSError:
+            unchanged = False
+        if not unchanged:
+            write_atomic(index_path, payload)
+        if cache_path is not None and stats.tokenized:
+            cache = {"version": CACHE_VERSION, "tokenizer": tokenizer_signature(), "products": tokens}
+            write_atomic(cache_path, json.dumps(cache, ensure_ascii=False, separators=(",", ":")))
+
+    stats.documents = len(docs)
+    stats.terms = len(postings)
+    stats.bytes = len(payload.encode("utf-8"))
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def search(index: Dict[str, object], query: str) -> List[object]:
+    """Reference query (mirrors `search-index.js`): product ids matching every word."""
+    terms = index["terms"]
+    docs = index["docs"]
+    result: Optional[set] = None
+    for token in tokenize(query):
+        matches = set()
+        for variant in token_variants(token):
+            postings = terms.get(variant[:MAX_PREFIX])  # type: ignore[union-attr]
+            matches.update(delta_decode(postings or []))
+        result = matches if result is None else result & matches
+        if not result:
+            return []
+    return [docs[position] for position in sorted(result or ())]  # type: ignore[index]
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=Path, default=PRODUCTS_PATH)
+    parser.add_argument("--output", type=Path, default=INDEX_PATH)
+    parser.add_argument("--cache", type=Path, default=CACHE_PATH)
+    parser.add_argument("--force", action="store_true", help="re-tokenize every product")
+    parser.add_argument("--query", help="run a query against the built index")
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    with profile_run(args, "search_index"):
+        stats = build_index(args.products, args.output, args.cache, force=args.force)
+    print(
+        f"{stats.documents} products, {stats.terms} terms, {stats.bytes / 1024:.1f} KiB: "
+        f"{stats.tokenized} tokenized, {stats.reused} reused in {stats.seconds * 1000:.1f}ms"
+    )
+    if args.query:
+        index = json.loads(args.output.read_text(encoding="utf-8"))
+        start = time.perf_counter()
+        ids = search(index, args.query)
+        elapsed = time.perf_counter() - start
+        print(f"{args.query!r}: {ids} ({elapsed * 1000:.3f}ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+"""
+Content-addressed store for the catalog copies in `data/recovery_snapshots/`.
+
+Every restore, sync and recovery event leaves a full copy of the products
+catalog behind, and the copies are nearly identical. `ingest` splits each
+copy into product records and stores every distinct record once under its
+SHA-256 (hashed over the key-sorted record). The records a snapshot adds to
+the store are appended to one pack file, named after its own hash, and
+`index.json` maps each record hash to its place in a pack. A store of a
+handful of packs costs a few filesystem blocks instead of one block per
+product. The snapshot itself is saved as a small manifest of `(id, hash)`
+pairs plus a root hash over them:
+
+    data/snapshot_store/
+        packs/<sha256>.pack     # one compact JSON record per line
+        index.json              # {hash: [pack, offset, length]}
+        snapshots/<name>.json   # {"root": ..., "records": [[id, hash], ...]}
+
+`diff` compares two manifests by hash alone. Identical snapshots are
+answered from the root hashes, and only changed records are ever read.
+Records are matched on their sorted ids, so duplicate ids are compared one
+for one; records without an id are matched by hash and reported by position.
+`rebuild` writes a snapshot back out as a full JSON array. The records are
+semantically identical to the source, though whitespace may differ from the
+PowerShell/Node writers; a leading BOM is restored if the source had one.
+
+    python scripts/snapshot_store.py ingest            # all recovery snapshots
+    python scripts/snapshot_store.py list
+    python scripts/snapshot_store.py diff products.recovery.latest products.data.before-restore.20260209-060953
+    python scripts/snapshot_store.py rebuild products.recovery.latest -o /tmp/products.json
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import tempfile
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from atomic_files import write_atomic
+from profiling import add_profile_arguments, profile_run, stage
+
+STORE_VERSION = 2
+ROOT = Path(__file__).resolve().parent.parent
+SNAPSHOTS_DIR = ROOT / "data" / "recovery_snapshots"
+STORE_DIR = ROOT / "data" / "snapshot_store"
+BOM = "\ufeff"
+
+Record = Dict[str, Any]
+# (id, hash) as stored in a manifest; the id is None for records without one
+Entry = Tuple[Optional[str], str]
+
+
+@dataclass
+class SnapshotDiff:
+    # ids repeat when a snapshot has duplicate ids; records without an id are
+    # listed as "#<position>" in their own snapshot
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    # parallel to `changed`: {field: (old, new)}, filled only when asked for
+    fields: List[Dict[str, Tuple[Any, Any]]] = field(default_factory=list)
+
+    @property
+    def identical(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+
+def record_hash(record: Record) -> str:
+    canonical = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def record_id(record: Record) -> Optional[str]:
+    product_id = record.get("id")
+    return None if product_id in (None, "") else str(product_id)
+
+
+def root_hash(records: Iterable[Sequence[Any]]) -> str:
+    digest = hashlib.sha256()
+    for product_id, digest_hex in records:
+        label = "" if product_id is None else product_id
+        digest.update(f"{label}\0{digest_hex}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _multiset_difference(a: List[str], b: List[str]) -> Tuple[List[str], List[str]]:
+    """`a - b` and `b - a` with repeats counted, order kept."""
+    only_a, only_b = Counter(a) - Counter(b), Counter(b) - Counter(a)
+    left, right = [], []
+    for digest in a:
+        if only_a[digest]:
+            only_a[digest] -= 1
+            left.append(digest)
+    for digest in b:
+        if only_b[digest]:
+            only_b[digest] -= 1
+            right.append(digest)
+    return left, right
+
+
+class SnapshotStore:
+    def __init__(self, directory: Path = STORE_DIR) -> None:
+        self.directory = directory
+        self.packs = directory / "packs"
+        self.snapshots = directory / "snapshots"
+        self.index_path = directory / "index.json"
+        self._index: Optional[Dict[str, List[Any]]] = None
+
+    def _manifest_path(self, name: str) -> Path:
+        return self.snapshots / f"{name}.json"
+
+    @property
+    def index(self) -> Dict[str, List[Any]]:
+        """Record hash -> `[pack name, offset, length]`."""
+        if self._index is None:
+            self._index = (
+                json.loads(self.index_path.read_text(encoding="utf-8"))
+                if self.index_path.exists()
+                else {}
+            )
+        return self._index
+
+    def _save_index(self) -> None:
+        write_atomic(self.index_path, json.dumps(self.index, separators=(",", ":")))
+
+    def _write_pack(self, records: Dict[str, Record]) -> None:
+        """Write `records` as one new pack, then point the index at it."""
+        if not records:
+            return
+        chunks, offsets, offset = [], {}, 0
+        for digest, record in records.items():
+            line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            offsets[digest] = (offset, len(line))
+            chunks.append(line + b"\n")
+            offset += len(line) + 1
+        data = b"".join(chunks)
+        pack = f"{hashlib.sha256(data).hexdigest()}.pack"
+        write_atomic(self.packs / pack, data)
+        for digest, (start, length) in offsets.items():
+            self.index[digest] = [pack, start, length]
+        self._save_index()
+
+    def get_record(self, digest: str) -> Record:
+        pack, offset, length = self.index[digest]
+        with (self.packs / pack).open("rb") as handle:
+            handle.seek(offset)
+            return json.loads(handle.read(length))
+
+    def get_records(self, digests: Iterable[str]) -> List[Record]:
+        """Like `get_record` for many hashes, reading each pack once."""
+        packs: Dict[str, bytes] = {}
+        records = []
+        for digest in digests:
+            pack, offset, length = self.index[digest]
+            if pack not in packs:
+                packs[pack] = (self.packs / pack).read_bytes()
+            records.append(json.loads(packs[pack][offset : offset + length]))
+        return records
+
+    def ingest(self, source: Path, name: Optional[str] = None) -> Tuple[str, int, int]:
+        """
+        Add the catalog copy at `source` as snapshot `name` (default: file stem).
+
+        Returns `(name, records, new objects)`. Re-ingesting an unchanged file
+        is a no-op.
+        """
+        name = name or source.stem
+        raw = source.read_bytes()
+        file_sha256 = hashlib.sha256(raw).hexdigest()
+        existing = self.manifest(name) if self._manifest_path(name).exists() else None
+        if (
+            existing is not None
+            and existing.get("version") == STORE_VERSION
+            and existing.get("sha256") == file_sha256
+        ):
+            return name, len(existing["records"]), 0
+        text = raw.decode("utf-8")
+        records = json.loads(text.lstrip(BOM))
+        if isinstance(records, dict):  # API-style {"data": [...]} payloads
+            records = records.get("data", [])
+        entries: List[Entry] = []
+        new: Dict[str, Record] = {}
+        for record in records:
+            digest = record_hash(record)
+            if digest not in self.index:
+                new.setdefault(digest, record)
+            entries.append((record_id(record), digest))
+        self._write_pack(new)
+        manifest = {
+            "version": STORE_VERSION,
+            "name": name,
+            "source": source.name,
+            "sha256": file_sha256,
+            "bom": text.startswith(BOM),
+            "ingested": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "root": root_hash(entries),
+            "records": entries,
+        }
+        write_atomic(self._manifest_path(name), json.dumps(manifest, indent=1))
+        return name, len(entries), len(new)
+
+    def manifest(self, name: str) -> Dict[str, Any]:
+        path = self._manifest_path(name)
+        if not path.exists():
+            raise KeyError(f"No snapshot named {name!r} in {self.snapshots}")
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def names(self) -> List[str]:
+        if not self.snapshots.exists():
+            return []
+        return sorted(path.stem for path in self.snapshots.glob("*.json"))
+
+    def diff(self, old: str, new: str, fields: bool = False) -> SnapshotDiff:
+        before, after = self.manifest(old), self.manifest(new)
+        result = SnapshotDiff()
+        if before["root"] == after["root"]:
+            return result
+        old_ids: Dict[str, List[str]] = defaultdict(list)
+        new_ids: Dict[str, List[str]] = defaultdict(list)
+        old_unkeyed: List[str] = []
+        new_unkeyed: List[str] = []
+        for records, by_id, unkeyed in (
+            (before["records"], old_ids, old_unkeyed),
+            (after["records"], new_ids, new_unkeyed),
+        ):
+            for product_id, digest in records:
+                if product_id is None:
+                    unkeyed.append(digest)
+                else:
+                    by_id[product_id].append(digest)
+        pairs: List[Tuple[str, str]] = []
+        for product_id in sorted(old_ids.keys() | new_ids.keys()):
+            gone, came = _multiset_difference(old_ids[product_id], new_ids[product_id])
+            for a, b in zip(gone, came):
+                result.changed.append(product_id)
+                pairs.append((a, b))
+            result.removed += [product_id] * (len(gone) - len(came))
+            result.added += [product_id] * (len(came) - len(gone))
+        # Without an id there is nothing to pair a changed record with, so
+        # unmatched ones are reported where they sit in their snapshot.
+        gone, came = map(set, _multiset_difference(old_unkeyed, new_unkeyed))
+        result.removed += [
+            f"#{position}"
+            for position, (product_id, digest) in enumerate(before["records"])
+            if product_id is None and digest in gone
+        ]
+        result.added += [
+            f"#{position}"
+            for position, (product_id, digest) in enumerate(after["records"])
+            if product_id is None and digest in came
+        ]
+        if fields:
+            olds = self.get_records(digest for digest, _ in pairs)
+            news = self.get_records(digest for _, digest in pairs)
+            for a, b in zip(olds, news):
+                result.fields.append({
+                    key: (a.get(key), b.get(key))
+                    for key in dict.fromkeys([*a, *b])
+                    if a.get(key) != b.get(key)
+                })
+        return result
+
+    def rebuild(self, name: str, output: Path) -> int:
+        manifest = self.manifest(name)
+        records = self.get_records(digest for _, digest in manifest["records"])
+        text = json.dumps(records, ensure_ascii=False, indent=2) + "\n"
+        write_atomic(output, (BOM if manifest.get("bom") else "") + text)
+        return len(records)
+
+    def gc(self) -> int:
+        """
+        Drop records no snapshot references; returns how many. Packs holding
+        any such record are rewritten with the referenced rest.
+        """
+        referenced = {
+            digest for name in self.names() for _, digest in self.manifest(name)["records"]
+        }
+        by_pack: Dict[str, List[str]] = defaultdict(list)
+        for digest, (pack, _, _) in self.index.items():
+            by_pack[pack].append(digest)
+        removed = 0
+        for pack, digests in by_pack.items():
+            keep = [digest for digest in digests if digest in referenced]
+            if len(keep) == len(digests):
+                continue
+            removed += len(digests) - len(keep)
+            records = dict(zip(keep, self.get_records(keep)))
+            for digest in digests:
+                del self.index[digest]
+            self._write_pack(records)
+        self._save_index()
+        live = {pack for pack, _, _ in self.index.values()}
+        if self.packs.exists():
+            for path in self.packs.glob("*.pack"):  # includes packs orphaned by a crash
+                if path.name not in live:
+                    path.unlink()
+        return removed
+
+    def disk_usage(self) -> int:
+        """Bytes the store occupies on disk, counting whole filesystem blocks."""
+        return sum(
+            path.stat().st_blocks * 512 for path in self.directory.rglob("*") if path.is_file()
+        )
+
+
+def _format_value(value: Any, limit: int = 60) -> str:
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+def format_diff(diff: SnapshotDiff) -> str:
+    if diff.identical:
+        return "identical"
+    lines = [f"{len(diff.added)} added, {len(diff.removed)} removed, {len(diff.changed)} changed"]
+    lines += [f"+ {product_id}" for product_id in diff.added]
+    lines += [f"- {product_id}" for product_id in diff.removed]
+    for position, product_id in enumerate(diff.changed):
+        lines.append(f"~ {product_id}")
+        changes = diff.fields[position] if position < len(diff.fields) else {}
+        for key, (old, new) in changes.items():
+            lines.append(f"    {key}: {_format_value(old)} -> {_format_value(new)}")
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--store", type=Path, default=STORE_DIR)
+    add_profile_arguments(parser)
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="add catalog copies as snapshots")
+    ingest.add_argument("files", type=Path, nargs="*", help=f"default: {SNAPSHOTS_DIR}/*.json")
+    ingest.add_argument(
+        "--prune", action="store_true", help="delete each source file once it rebuilds identically"
+    )
+    commands.add_parser("list", help="list stored snapshots")
+    diff = commands.add_parser("diff", help="compare two snapshots by record hash")
+    diff.add_argument("old")
+    diff.add_argument("new")
+    diff.add_argument("--fields", action="store_true", help="show changed fields")
+    rebuild = commands.add_parser("rebuild", help="write a snapshot back out as JSON")
+    rebuild.add_argument("name")
+    rebuild.add_argument("-o", "--output", type=Path, required=True)
+    commands.add_parser("gc", help="delete unreferenced record objects")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    with profile_run(args, "snapshot_store"):
+        run(args)
+
+
+def run(args: argparse.Namespace) -> None:
+    store = SnapshotStore(args.store)
+    if args.command == "ingest":
+        files = args.files or sorted(SNAPSHOTS_DIR.glob("*.json"))
+        source_bytes = 0
+        for source in files:
+            with stage(f"ingest {source.name}", bytes_in=source.stat().st_size):
+                name, records, created = store.ingest(source)
+            source_bytes += source.stat().st_size
+            print(f"{name}: {records} records, {created} new")
+            if args.prune:
+                with tempfile.TemporaryDirectory() as tmp:
+                    rebuilt = Path(tmp) / source.name
+                    store.rebuild(name, rebuilt)
+                    original = json.loads(source.read_text(encoding="utf-8").lstrip(BOM))
+                    if json.loads(rebuilt.read_text(encoding="utf-8").lstrip(BOM)) != original:
+                        raise SystemExit(f"{source} does not rebuild identically; kept")
+                source.unlink()
+        print(f"{source_bytes / 1024:.0f} KiB of snapshots, store {store.disk_usage() / 1024:.0f} KiB")
+    elif args.command == "list":
+        for name in store.names():
+            manifest = store.manifest(name)
+            print(f"{name:<56}{len(manifest['records']):6d} records  {manifest['root'][:12]}")
+    elif args.command == "diff":
+        start = time.perf_counter()
+        diff = store.diff(args.old, args.new, fields=args.fields)
+        elapsed = time.perf_counter() - start
+        print(format_diff(diff))
+        print(f"({elapsed * 1000:.1f}ms)")
+    elif args.command == "rebuild":
+        count = store.rebuild(args.name, args.output)
+        print(f"{args.output}: {count} records")
+    elif args.command == "gc":
+        print(f"removed {store.gc()} unreferenced objects")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,28 +5,30 @@ Update menu.html to match the new card design from homepage
 - Keep all existing products and their categories
 """
 
-import re
+import argparse
+from pathlib import Path
 
-# Read the menu file
-with open('c:/Users/simoa/OneDrive/Documents/bakery/pages/menu.html', 'r', encoding='utf-8') as f:
-    content = f.read()
+from menu_cards import Card, Edit, apply_edits, iter_cards, line_indent, strip_leading_whitespace
+from profiling import add_profile_arguments, profile_run, stage
 
-# Pattern to match each product card
-pattern = r'(\u003carticle class="product-card"[^\u003e]*data-product[^\u003e]*data-category="[^"]*"[^\u003e]*data-description="[^"]*"[^\u003e]*data-tags="[^"]*"\u003e\s*\u003cdiv class="product-media"\u003e\s*\u003cspan class="product-badge[^"]*"\u003e[^\u003c]*\u003c/span\u003e\s*\u003cimg src="[^"]*"[^/]*/?loading="lazy"\u003e)\s*\u003cdiv class="product-actions-overlay"\u003e.*?\u003c/div\u003e\s*(\u003c/div\u003e\s*\u003cdiv class="product-info"\u003e\s*\u003cdiv class="product-header"\u003e\s*\u003ch3\u003e[^\u003c]*\u003c/h3\u003e\s*\u003cp class="product-price"\u003e[^\u003c]*\u003c/p\u003e\s*\u003c/div\u003e)\s*\u003c/div\u003e'
+parser = argparse.ArgumentParser(description="Update menu.html to match the new card design")
+parser.add_argument(
+    "--page",
+    type=Path,
+    default=Path(__file__).resolve().parent.parent / "public" / "pages" / "menu.html",
+)
+add_profile_arguments(parser)
+args = parser.parse_args()
 
 # Function to replace product card structure
-def replace_card(match):
-    media_section = match.group(1)
-    info_section = match.group(2)
-    
-    # Extract product name from the h3 tag
-    product_name_match = re.search(r'\u003ch3\u003e([^\u003c]*)\u003c/h3\u003e', info_section)
-    product_name = product_name_match.group(1) if product_name_match else "Product"
-    
-    # Extract badge type (Sugar or Gluten)
-    badge_match = re.search(r'\u003cspan class="product-badge[^"]*"\u003e([^\u003c]*)\u003c/span\u003e', media_section)
-    badge_text = badge_match.group(1) if badge_match else ""
-    
+def replace_card(card: Card) -> list[Edit]:
+    if (card.actions_overlay is None or card.actions is not None or card.badge_span is None
+            or card.img_span is None or card.info_close is None):
+        return []  # already updated, or not a card with an image overlay
+
+    product_name = card.name or "Product"
+    badge_text = card.badge or ""
+
     # Determine which badge class to use based on content
     if "Sugar" in badge_text:
         badge_class = 'product-badge'
@@ -34,31 +36,44 @@ def replace_card(match):
         badge_class = 'product-badge product-badge--calm'
     else:
         badge_class = 'product-badge product-badge--bright'
-    
+
     # Update badge class in media section
-    media_section = re.sub(r'class="product-badge[^"]*"', f'class="{badge_class}"', media_section)
-    
+    edits = [(*card.badge_span, f'<span class="{badge_class}">{badge_text}</span>')]
+
     # Add category overlay after image
-    category_overlay = f'\n                        \u003cspan class="product-category-overlay"\u003e{badge_text}\u003c/span\u003e'
-    media_section = media_section.replace('loading="lazy"\u003e', f'loading="lazy"\u003e{category_overlay}')
-    
-    # Create the new structure with buttons at the bottom
-    new_card = f'''{media_section}
-                    \u003c/div\u003e
-                    {info_section}
-                        \u003cdiv class="product-actions"\u003e
-                            \u003cbutton class="btn btn-outline btn-small" type="button" data-quickview="{product_name}"\u003eQuick View\u003c/button\u003e
-                            \u003cbutton class="btn btn-ghost" type="button" data-add-to-cart="{product_name}"\u003eAdd to Cart\u003c/button\u003e
-                        \u003c/div\u003e
-                    \u003c/div\u003e'''
-    
-    return new_card
+    media_indent = line_indent(content, card.img_span[0])
+    if card.overlay_span is None:
+        category_overlay = f'\n{media_indent}<span class="product-category-overlay">{badge_text}</span>'
+        edits.append((card.img_span[1], card.img_span[1], category_overlay))
+
+    # Remove overlay buttons
+    edits.append((*strip_leading_whitespace(content, card.actions_overlay), ''))
+
+    # Add the buttons at the bottom of product-info
+    info_indent = line_indent(content, card.info[0])
+    gap_start = strip_leading_whitespace(content, (card.info_close, card.info_close))[0]
+    actions = f'''
+{info_indent}    <div class="product-actions">
+{info_indent}        <button class="btn btn-outline btn-small" type="button" data-quickview="{product_name}">Quick View</button>
+{info_indent}        <button class="btn btn-ghost" type="button" data-add-to-cart="{product_name}">Add to Cart</button>
+{info_indent}    </div>
+{info_indent}'''
+    edits.append((gap_start, card.info_close, actions))
+    return edits
+
+with profile_run(args, "update_menu_cards"):
+    # Read the menu file
+    with stage("read", bytes_in=args.page.stat().st_size), open(args.page, 'r', encoding='utf-8') as f:
+        content = f.read()
 
-# Replace all product cards
-updated_content = re.sub(pattern, replace_card, content, flags=re.DOTALL)
+    # Replace all product cards
+    with stage("edit"):
+        edits = [edit for card in iter_cards(content) for edit in replace_card(card)]
+        updated_content = apply_edits(content, edits)
 
-# Write back the updated content
-with open('c:/Users/simoa/OneDrive/Documents/bakery/pages/menu.html', 'w', encoding='utf-8') as f:
-    f.write(updated_content)
+    # Write back the updated content
+    with stage("write") as write, open(args.page, 'w', encoding='utf-8') as f:
+        f.write(updated_content)
+        write.bytes_out = len(updated_content.encode('utf-8'))
 
 print("Menu page updated successfully!")
@@ -13,10 +13,18 @@ const ASSET_CACHE_MAX_AGE_SECONDS = 60 * 5;
 const ASSET_CACHE_REGEX = /\.(css|js|mjs|cjs|svg|png|jpg|jpeg|gif|webp|ico|ttf|otf|woff|woff2|eot)$/i;
 const HTML_CACHE_REGEX = /\.html$/i;
 const JSON_CACHE_REGEX = /\.json$/i;
+// Names written by scripts/asset_manifest.py carry a 12-hex content hash.
+const FINGERPRINTED_REGEX = /[\\/]static[\\/].+\.[0-9a-f]{12}\.[^.\\/]+$/i;
 const PUBLIC_DIR = path.join(__dirname, 'public');
+// Output of scripts/asset_manifest.py: /static/ fingerprinted files and rewritten page/catalog copies.
+const DEPLOY_DIR = path.join(__dirname, 'dist');
 const ADMIN_DIR = path.join(PUBLIC_DIR, 'admin');
 
 const setAssetCacheHeaders = (res, filePath) => {
+    if (FINGERPRINTED_REGEX.test(filePath)) {
+        res.setHeader('Cache-Control', 'public, max-age=31536000, immutable');
+        return;
+    }
     // Revalidate HTML/JSON on each request to avoid stale page/locale content.
     if (HTML_CACHE_REGEX.test(filePath) || JSON_CACHE_REGEX.test(filePath)) {
         res.setHeader('Cache-Control', 'no-cache, max-age=0, must-revalidate');
@@ -40,6 +48,9 @@ app.use('/api', apiRouter);
 // Serve admin panel static files
 app.use('/admin', express.static(ADMIN_DIR, { setHeaders: setAssetCacheHeaders }));
 
+// Serve the fingerprinted deploy tree first (when built), then the sources it was built from
+app.use(express.static(DEPLOY_DIR, { setHeaders: setAssetCacheHeaders }));
+
 // Serve static files from root (for main website)
 app.use(express.static(PUBLIC_DIR, { setHeaders: setAssetCacheHeaders }));
 
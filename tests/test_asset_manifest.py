@@ -0,0 +1,82 @@
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from asset_manifest import (  # noqa: E402
+    build_manifest,
+    fingerprint_name,
+    prune,
+    publish,
+    rewrite_html,
+    rewrite_json,
+)
+
+CAKE = "a" * 64
+LOGO = "b" * 64
+MANIFEST = build_manifest({"images/a cake.jpeg": [10, 0, CAKE], "images/logo.png": [5, 0, LOGO]})
+CAKE_URL = f"/static/images/a%20cake.{CAKE[:12]}.jpeg"
+LOGO_URL = f"/static/images/logo.{LOGO[:12]}.png"
+
+
+def test_manifest_urls_carry_the_content_hash():
+    assert fingerprint_name("images/a cake.jpeg", CAKE) == f"images/a cake.{CAKE[:12]}.jpeg"
+    assert MANIFEST["/images/a cake.jpeg"] == {"url": CAKE_URL, "sha256": CAKE, "size": 10}
+
+
+def test_rewrite_html_resolves_urls_against_the_page():
+    html = (
+        '<img src="../images/a%20cake.jpeg?v=2" '
+        'srcset="/images/logo.png 1x, /images/a%20cake.jpeg 2x">'
+        '<a href="https://example.com/images/logo.png"></a>'
+        '<a href="#top"></a><img src="/images/gone.png">'
+    )
+    rewritten, count, missing = rewrite_html(html, MANIFEST, "/pages/menu.html")
+    assert rewritten == (
+        f'<img src="{CAKE_URL}?v=2" srcset="{LOGO_URL} 1x, {CAKE_URL} 2x">'
+        '<a href="https://example.com/images/logo.png"></a>'
+        '<a href="#top"></a><img src="/images/gone.png">'
+    )
+    assert (count, missing) == (3, 1)
+
+
+def test_rewrite_json_walks_nested_values():
+    data = [{"image": "/images/logo.png", "gallery": ["/images/a cake.jpeg", "/images/x.png"]}]
+    rewritten, count, missing = rewrite_json(data, MANIFEST)
+    assert rewritten == [{"image": LOGO_URL, "gallery": [CAKE_URL, "/images/x.png"]}]
+    assert (count, missing) == (2, 1)
+
+
+def test_prune_keeps_listed_files_and_the_manifest(tmp_path):
+    static = tmp_path / "static"
+    kept = static / "images" / f"logo.{LOGO[:12]}.png"
+    stale = static / "images" / "logo.0123456789ab.png"
+    for path in (kept, stale, static / "manifest.json"):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x")
+    assert prune(static, MANIFEST) == 1
+    assert sorted(p.name for p in static.rglob("*.*")) == ["logo.bbbbbbbbbbbb.png", "manifest.json"]
+
+
+def test_publish_places_assets_and_rewrites_pages(tmp_path):
+    public, deploy, cache = tmp_path / "public", tmp_path / "dist", tmp_path / "hashes.json"
+    (public / "images").mkdir(parents=True)
+    (public / "pages").mkdir()
+    (public / "data").mkdir()
+    (public / "images" / "logo.png").write_bytes(b"png")
+    (public / "pages" / "menu.html").write_text('<img src="../images/logo.png">')
+    (public / "data" / "products.json").write_text('[{"image": "/images/logo.png"}]')
+    url = f"/static/images/logo.{hashlib.sha256(b'png').hexdigest()[:12]}.png"
+
+    manifest, counts, rewrites = publish(public, deploy, cache)
+    assert manifest["/images/logo.png"]["url"] == url
+    assert (deploy / url.lstrip("/")).read_bytes() == b"png"
+    assert (deploy / "pages" / "menu.html").read_text() == f'<img src="{url}">'
+    assert json.loads((deploy / "data" / "products.json").read_text()) == [{"image": url}]
+    assert [(stats.rewritten, stats.missing) for stats in rewrites] == [(1, 0), (1, 0)]
+    assert (counts["read"], counts["placed"]) == (1, 1)
+
+    _, counts, _ = publish(public, deploy, cache)
+    assert (counts["read"], counts["placed"]) == (0, 0)
@@ -0,0 +1,88 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from colorize_obj import ObjConfig, load_mesh_cache, rewrite_obj  # noqa: E402
+
+CONFIG = ObjConfig(texture_path="tex.png", material_name="pastry_texture")
+
+SOURCE = """# pastry
+mtllib old.mtl
+o pastry
+v 0.0 0.5 -1.0
+v 2.0 0.0 1.0
+v 1.0 1.0 0.0
+v -1.0 0.25 3.0
+vt 0.1 0.2
+vn 0.0 1.0 0.0
+usemtl old
+s off
+f 1 2 3
+f 1/1 3/1 4/1
+f 2//1 3//1 4//1
+f 1/1/1 2/1/1 -1/1/1 3/1/1
+"""
+
+# What the original list-based rewrite_obj wrote for SOURCE.
+EXPECTED = """# pastry
+o pastry
+mtllib pastry.mtl
+v 0.0 0.5 -1.0
+v 2.0 0.0 1.0
+v 1.0 1.0 0.0
+v -1.0 0.25 3.0
+vt 0.333333 1.000000
+vt 1.000000 0.500000
+vt 0.666667 0.750000
+vt 0.000000 0.000000
+vn 0.0 1.0 0.0
+s off
+usemtl pastry_texture
+f 1/1 2/2 3/3
+f 1/1 3/3 4/4
+f 2/2 3/3 4/4
+f 1/1 2/2 -1/-1 3/3
+"""
+
+
+def write_source(tmp_path: Path) -> Path:
+    path = tmp_path / "pastry.obj"
+    path.write_bytes(SOURCE.encode())
+    return path
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+@pytest.mark.parametrize("streaming", [False, True])
+def test_rewrite_matches_the_original_output(tmp_path, streaming, vectorized):
+    path = write_source(tmp_path)
+    rewrite_obj(path, CONFIG, streaming=streaming, vectorized=vectorized)
+    assert path.read_bytes() == EXPECTED.encode()
+    assert path.with_suffix(".mtl").read_text().endswith("map_Kd tex.png\n")
+
+
+def test_vectorized_faces_accept_irregular_whitespace(tmp_path):
+    path = tmp_path / "pastry.obj"
+    path.write_text(SOURCE.replace("f 1 2 3", "f  1\t2   3 "))
+    rewrite_obj(path, CONFIG, vectorized=True)
+    assert path.read_text() == EXPECTED
+
+
+def test_mesh_cache_is_reused_until_the_obj_changes(tmp_path):
+    path = write_source(tmp_path)
+    rewrite_obj(path, CONFIG, cache=True)
+    mesh = load_mesh_cache(path, CONFIG.material_name)
+    assert mesh.positions.shape == (4, 3)
+    assert mesh.face_sizes.tolist() == [3, 3, 3, 4]
+
+    rewritten = path.stat().st_mtime_ns
+    rewrite_obj(path, CONFIG, cache=True)
+    assert path.stat().st_mtime_ns == rewritten
+    assert load_mesh_cache(path, "other_texture") is None
+
+    path.write_text(SOURCE.replace("f 1/1/1 2/1/1 -1/1/1 3/1/1\n", ""))
+    assert load_mesh_cache(path, CONFIG.material_name) is None
+    rewrite_obj(path, CONFIG, cache=True)
+    assert load_mesh_cache(path, CONFIG.material_name).face_sizes.tolist() == [3, 3, 3]
@@ -0,0 +1,66 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from menu_cards import apply_edits, iter_cards  # noqa: E402
+
+CARD = """<article class="product-card" data-category="healthy">
+    <div class="product-media">
+        <img src="/images/a.jpeg" alt="Cake" loading="lazy">
+        <span class="product-badge">healthy</span>
+        <span class="product-category-overlay">healthy</span>
+    </div>
+    <div class="product-info">
+        <h3>Date &amp; Oat Cake</h3>
+        <p class="product-price">30&nbsp;MAD</p>
+        <div class="product-actions">
+            <button data-quickview="Date Cake">View</button>
+            <button data-add-to-cart="Date Cake">Add</button>
+        </div>
+    </div>
+    </div>
+</article>"""
+
+PAGE = f"<main>\n{CARD}\n<p>between</p>\n{CARD.replace('healthy', 'low-carb')}\n</main>\n"
+
+
+def test_spans_slice_back_to_the_source():
+    first, second = iter_cards(PAGE)
+    assert PAGE[slice(*first.span)] == CARD
+    assert PAGE[slice(*second.span)] == CARD.replace("healthy", "low-carb")
+    assert PAGE[slice(*first.img_span)] == '<img src="/images/a.jpeg" alt="Cake" loading="lazy">'
+    assert PAGE[slice(*first.badge_span)] == '<span class="product-badge">healthy</span>'
+    assert PAGE[slice(*first.media)].endswith("</span>\n    </div>")
+    assert PAGE[first.info_close : first.info[1]] == "</div>"
+    assert [PAGE[slice(*span)] for span in first.stray_closes] == ["</div>"]
+
+
+def test_fields_keep_entities_as_written():
+    card = next(iter_cards(PAGE))
+    assert (card.name, card.price) == ("Date &amp; Oat Cake", "30&nbsp;MAD")
+    assert (card.badge, card.badge_class, card.overlay) == ("healthy", "product-badge", "healthy")
+    assert (card.quickview, card.add_to_cart) == ("Date Cake", "Date Cake")
+    assert card.img_lazy
+
+
+def test_edits_apply_in_one_pass_regardless_of_order():
+    first, second = iter_cards(PAGE)
+    edits = [
+        (*second.overlay_span, ""),
+        (*first.badge_span, '<span class="product-badge">new</span>'),
+        (*first.stray_closes[0], ""),
+    ]
+    edited = apply_edits(PAGE, edits)
+    assert edited.count("product-category-overlay") == 1
+    assert '<span class="product-badge">new</span>' in edited
+    assert [len(card.stray_closes) for card in iter_cards(edited)] == [0, 1]
+    assert apply_edits(PAGE, []) == PAGE
+
+
+def test_overlapping_edits_are_rejected():
+    card = next(iter_cards(PAGE))
+    with pytest.raises(ValueError):
+        apply_edits(PAGE, [(*card.media, ""), (*card.badge_span, "")])
@@ -0,0 +1,19 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from mesh_optimize import weld  # noqa: E402
+
+
+def test_weld_merges_duplicates_away_from_the_bucket_head():
+    # Vertex 0 shares the cell of the duplicates 1 and 2 but is not within epsilon.
+    positions = np.array([[0, 0, 0], [9e-7] * 3, [9e-7] * 3, [5, 5, 5]], dtype=float)
+    assert weld(positions).tolist() == [0, 1, 1, 3]
+
+
+def test_weld_chains_within_epsilon():
+    positions = np.array([[0, 0, 0], [9e-7, 0, 0], [1.8e-6, 0, 0], [4e-6, 0, 0]])
+    assert weld(positions).tolist() == [0, 0, 0, 3]
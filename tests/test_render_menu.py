@@ -0,0 +1,78 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import render_menu  # noqa: E402
+from catalog import parse_catalog  # noqa: E402
+from render_menu import format_price, iter_cards  # noqa: E402
+
+PAGE = """<html><body>
+            <div class="product-grid">
+            </div>
+</body></html>
+"""
+
+
+def product(product_id, price):
+    return {"id": product_id, "name": f"Cake {product_id}", "price": price, "status": "active"}
+
+
+@pytest.fixture
+def menu(tmp_path, monkeypatch):
+    # Keep the catalog pickle out of the repo's .cache.
+    monkeypatch.setattr(render_menu, "load_catalog", parse_catalog)
+    page = tmp_path / "menu.html"
+    page.write_text(PAGE)
+    products = tmp_path / "products.json"
+
+    def render(records):
+        products.write_text(json.dumps(records))
+        return render_menu.render_menu(page, products, tmp_path / "manifest.json")
+
+    return page, render
+
+
+def cards(page):
+    text = page.read_text()
+    start, end, _ = render_menu.find_region(text)
+    return dict(iter_cards(text[start:end]))
+
+
+def test_only_changed_cards_are_rendered_again(menu):
+    page, render = menu
+    stats = render([product(1, 20), product(2, 30), product(3, 45)])
+    assert (stats.rendered, stats.reused, stats.written) == (3, 0, True)
+    first = cards(page)
+
+    # A hand edit inside an unchanged card survives, proving it was copied.
+    page.write_text(page.read_text().replace("Cake 1</h3>", "Cake 1 </h3>"))
+    stats = render([product(1, 20), product(2, 35), product(3, 45)])
+    assert (stats.rendered, stats.reused, stats.removed) == (1, 2, 0)
+    after = cards(page)
+    assert "Cake 1 </h3>" in after["1"]
+    assert after["2"] != first["2"] and ">35&nbsp;MAD<" in after["2"]
+    assert after["3"] == first["3"]
+
+    stats = render([product(1, 20), product(2, 35)])
+    assert (stats.rendered, stats.reused, stats.removed) == (0, 2, 1)
+    assert list(cards(page)) == ["1", "2"]
+
+
+def test_unchanged_catalog_leaves_the_page_alone(menu):
+    page, render = menu
+    render([product(1, 20)])
+    written = page.read_bytes()
+    stats = render([product(1, 20)])
+    assert (stats.rendered, stats.written) == (0, False)
+    assert page.read_bytes() == written
+
+
+@pytest.mark.parametrize(
+    "price, text", [(80, "80"), (12.5, "12.5"), (1_000_000, "1000000"), (9.999, "10")]
+)
+def test_format_price(price, text):
+    assert format_price(price) == text
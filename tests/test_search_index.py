@@ -0,0 +1,79 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import search_index  # noqa: E402
+from catalog import parse_catalog  # noqa: E402
+from search_index import (  # noqa: E402
+    build_index,
+    delta_decode,
+    delta_encode,
+    normalize,
+    search,
+    token_variants,
+)
+
+PRODUCTS = [
+    {"id": 1, "name": "Crème Brûlée", "nameAr": "كعكة اللوز", "status": "active"},
+    {"id": 2, "name": "Almond Cookie", "nameAr": "بسكويت اللوز", "status": "active"},
+    {"id": 3, "name": "Oat Bread", "tags": ["Gluten Free"], "status": "active"},
+    {"id": 4, "name": "Almond Tart", "status": "inactive"},
+]
+
+
+@pytest.mark.parametrize("positions", [[], [0], [3, 4, 10, 250, 251]])
+def test_delta_round_trip(positions):
+    assert delta_decode(delta_encode(positions)) == positions
+
+
+def test_normalize_folds_accents_and_arabic_variants():
+    assert normalize("Crème BRÛLÉE") == "creme brulee"
+    assert normalize("أَحْمَد إسلام آمنة") == "احمد اسلام امنه"
+    assert normalize("حلـــوى ١٢٣") == "حلوي 123"
+
+
+def test_token_variants_drop_the_arabic_article():
+    assert token_variants("اللوز") == ["اللوز", "لوز"]
+    assert token_variants("ال") == ["ال"]
+    assert token_variants("oat") == ["oat"]
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    # Keep the catalog pickle out of the repo's .cache.
+    monkeypatch.setattr(search_index, "load_catalog", parse_catalog)
+    products = tmp_path / "products.json"
+    products.write_text(json.dumps(PRODUCTS, ensure_ascii=False), encoding="utf-8")
+    paths = (products, tmp_path / "search-index.json", tmp_path / "tokens.json")
+
+    def build():
+        stats = build_index(*paths)
+        return stats, json.loads(paths[1].read_text(encoding="utf-8"))
+
+    return build
+
+
+def test_queries_match_prefixes_in_both_languages(index):
+    _, data = index()
+    assert data["docs"] == [1, 2, 3]
+    assert search(data, "alm") == [2]
+    assert search(data, "creme") == [1]
+    assert search(data, "لوز") == [1, 2]
+    assert search(data, "gluten oat") == [3]
+    assert search(data, "almond oat") == []
+    assert search(data, "constructor") == []
+
+
+def test_token_cache_follows_the_tokenizer_settings(index, monkeypatch):
+    stats, _ = index()
+    assert (stats.tokenized, stats.reused) == (3, 0)
+    stats, _ = index()
+    assert (stats.tokenized, stats.reused) == (0, 3)
+    monkeypatch.setattr(search_index, "MIN_PREFIX", 3)
+    stats, data = index()
+    assert (stats.tokenized, stats.reused) == (3, 0)
+    assert "al" not in data["terms"]
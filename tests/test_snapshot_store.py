@@ -0,0 +1,77 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from snapshot_store import BOM, SnapshotStore  # noqa: E402
+
+BEFORE = [
+    {"id": 1, "name": "Cake", "price": 20},
+    {"id": 2, "name": "Tart", "price": 30},
+    {"id": 2, "name": "Tart", "price": 31},
+    {"name": "orphan", "price": 5},
+]
+AFTER = [
+    {"id": 1, "name": "Cake", "price": 20},
+    {"id": 2, "name": "Tart", "price": 30},
+    {"id": 3, "name": "Bread", "price": 12},
+    {"name": "orphan", "price": 6},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SnapshotStore(tmp_path / "store")
+    for name, records, prefix in (("before", BEFORE, BOM), ("after", AFTER, "")):
+        source = tmp_path / f"{name}.json"
+        source.write_text(prefix + json.dumps(records), encoding="utf-8")
+        store.ingest(source)
+    return store
+
+
+def test_records_are_stored_once_in_packs(store, tmp_path):
+    assert store.names() == ["after", "before"]
+    assert len(store.index) == 6
+    assert len(list(store.packs.glob("*.pack"))) == 2
+    source = tmp_path / "after.json"
+    assert store.ingest(source) == ("after", 4, 0)
+    assert store.ingest(source, "copy") == ("copy", 4, 0)
+
+
+def test_rebuild_round_trips_records_and_bom(store, tmp_path):
+    for name, records in (("before", BEFORE), ("after", AFTER)):
+        output = tmp_path / f"{name}.rebuilt.json"
+        assert store.rebuild(name, output) == len(records)
+        text = output.read_text(encoding="utf-8")
+        assert text.startswith(BOM) == (name == "before")
+        assert json.loads(text.lstrip(BOM)) == records
+
+
+def test_diff_keeps_duplicate_and_missing_ids(store):
+    diff = store.diff("before", "after", fields=True)
+    assert diff.changed == []
+    assert diff.removed == ["2", "#3"]
+    assert diff.added == ["3", "#3"]
+    assert store.diff("after", "after").identical
+
+
+def test_diff_fields_follow_changed_records(store, tmp_path):
+    source = tmp_path / "later.json"
+    source.write_text(json.dumps([{**AFTER[0], "price": 25}, *AFTER[1:]]), encoding="utf-8")
+    store.ingest(source)
+    diff = store.diff("after", "later", fields=True)
+    assert diff.changed == ["1"]
+    assert diff.fields == [{"price": (20, 25)}]
+
+
+def test_gc_repacks_without_unreferenced_records(store, tmp_path):
+    (store.snapshots / "before.json").unlink()
+    assert store.gc() == 2
+    assert len(store.index) == 4
+    assert len(list(store.packs.glob("*.pack"))) == 2
+    output = tmp_path / "out.json"
+    store.rebuild("after", output)
+    assert json.loads(output.read_text(encoding="utf-8")) == AFTER